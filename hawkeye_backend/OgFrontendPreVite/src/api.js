@@ -14,4 +14,20 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Los listados vienen paginados por cursor: { next, previous, results }.
+// getTodo sigue `next` hasta el final y devuelve todas las filas (las
+// búsquedas con ?search= no se paginan y llegan ya como array).
+export async function getTodo(url, config = {}) {
+  let res = await api.get(url, { ...config, params: { page_size: 200, ...config.params } });
+  if (Array.isArray(res.data)) return res.data;
+
+  const filas = [...res.data.results];
+  while (res.data.next) {
+    // `next` ya es absoluta y lleva cursor y page_size
+    res = await api.get(res.data.next, { headers: config.headers });
+    filas.push(...res.data.results);
+  }
+  return filas;
+}
+
 export default api;
@@ -82,3 +82,20 @@ export async function authFetch(url, options = {}) {
 
   return response;
 }
+
+// Igual que getTodo (src/api.js) pero con authFetch: recorre las páginas
+// del cursor y devuelve todas las filas, o null si la sesión caducó.
+export async function authFetchTodo(url, options = {}) {
+  const separador = url.includes("?") ? "&" : "?";
+  let siguiente = `${url}${separador}page_size=200`;
+  const filas = [];
+  while (siguiente) {
+    const response = await authFetch(siguiente, options);
+    if (!response) return null;
+    const data = await response.json();
+    if (Array.isArray(data)) return data;
+    filas.push(...data.results);
+    siguiente = data.next;
+  }
+  return filas;
+}
@@ -1,6 +1,10 @@
 import { useState, useEffect } from "react";
 import api from "../api";
 
+// El listado de inmuebles trae la calle en el edificio (?expand=edificio)
+const direccion = (r) =>
+  `${r.edificio?.calle || ""} ${r.edificio?.numero_calle || ""}`.trim();
+
 export default function SearchInmueble({ onSelect }) {
   const [query, setQuery] = useState("");
   const [results, setResults] = useState([]);
@@ -17,13 +21,13 @@ export default function SearchInmueble({ onSelect }) {
       try {
         const token = localStorage.getItem("accessToken");
         if (!token) throw new Error("No autenticado");
-        const res = await api.get(`/inmuebles/?search=${encodeURIComponent(query)}`, {
+        const res = await api.get(`/inmuebles/?search=${encodeURIComponent(query)}&expand=edificio`, {
           headers: { Authorization: `Bearer ${token}` },
         });
 
         const ordered = res.data.sort((a, b) => {
-          const qa = `${a.calle || ""} ${a.numero || ""}`.toLowerCase();
-          const qb = `${b.calle || ""} ${b.numero || ""}`.toLowerCase();
+          const qa = direccion(a).toLowerCase();
+          const qb = direccion(b).toLowerCase();
           const q = query.toLowerCase();
           const startsA = qa.startsWith(q);
           const startsB = qb.startsWith(q);
@@ -62,12 +66,12 @@ export default function SearchInmueble({ onSelect }) {
               key={r.id}
               onClick={() => {
                 onSelect(r);
-                setQuery(`${r.calle || ""} ${r.numero || ""}`.trim());
+                setQuery(direccion(r));
                 setResults([]);
               }}
               className="px-3 py-2 hover:bg-blue-50 cursor-pointer text-sm"
             >
-              {`${r.calle || ""} ${r.numero || ""}`.trim()}
+              {direccion(r)}
             </div>
           ))}
         </div>
@@ -2,7 +2,7 @@
 import React, { useContext, useEffect, useState } from "react";
 import { AuthContext } from "../context/AuthContext";
 import Login from "./Login";
-import { authFetch } from "../api/auth";
+import { authFetchTodo } from "../api/auth";
 import DayView from "./calendar/DayView";
 import ActividadCardUser from "./ActividadCardUser";
 
@@ -18,8 +18,8 @@ export default function UserPanel() {
 
     const load = async () => {
       try {
-        const res = await authFetch("/api/actividades/");
-        const data = await res.json();
+        const data = await authFetchTodo("/api/actividades/");
+        if (!data) return;
 
         const hoy = new Date().toDateString();
 
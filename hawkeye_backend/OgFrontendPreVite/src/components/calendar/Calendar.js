@@ -3,7 +3,7 @@ import { CalendarIcon } from "lucide-react";
 import WeekView from "./WeekView";
 import DayView from "./DayView";
 import MonthView from "./MonthView";
-import api from "../../api";
+import { getTodo } from "../../api";
 
 const VISTAS = {
   DIA: "DÍA",
@@ -23,11 +23,11 @@ export default function Calendar() {
       const token = localStorage.getItem("accessToken");
       if (!token) return;
       try {
-        const res = await api.get("/usuarios/", {
+        const usuarios = await getTodo("/usuarios/", {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setUsuarios(res.data);
-        setUsuariosSeleccionados(res.data.map((u) => u.id));
+        setUsuarios(usuarios);
+        setUsuariosSeleccionados(usuarios.map((u) => u.id));
       } catch (error) {
         console.error("Error al obtener usuarios:", error);
       }
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import NewActivityForm from "../forms/NewActivityForm";
-import api from "../../api";
+import { getTodo } from "../../api";
 import {
   startHour,
   endHour,
@@ -28,10 +28,10 @@ export default function MonthView({ usuariosSeleccionados }) {
       const token = localStorage.getItem("accessToken");
       if (!token) return;
       try {
-        const res = await api.get("/actividades/", {
+        const actividades = await getTodo("/actividades/", {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setActividades(res.data);
+        setActividades(actividades);
       } catch (err) {
         console.error("Error obteniendo actividades:", err);
       }
@@ -1,5 +1,5 @@
 import { useState, useEffect, useRef } from "react";
-import api from "../../api";
+import api, { getTodo } from "../../api";
 import NewActivityForm from "../forms/NewActivityForm";
 import {
   startHour,
@@ -41,10 +41,10 @@ export default function WeekView({ usuariosSeleccionados }) {
       const token = localStorage.getItem("accessToken");
       if (!token) return;
       try {
-        const res = await api.get("/actividades/", {
+        const actividades = await getTodo("/actividades/", {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setActividades(res.data);
+        setActividades(actividades);
       } catch (err) {
         console.error("Error obteniendo actividades:", err);
       }
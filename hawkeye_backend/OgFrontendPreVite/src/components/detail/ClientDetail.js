@@ -31,7 +31,7 @@ export default function ClientDetail() {
     const res = await api.get(`/actividades/cliente/${id}/`, {
       headers: { Authorization: `Bearer ${token}` },
     });
-    setActividades(res.data);
+    setActividades(res.data.results);
   };
 
   useEffect(() => {
@@ -36,7 +36,7 @@ export default function PedidoDetail() {
       const res = await api.get(`/actividades/pedido/${id}/`, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      setActividades(res.data);
+      setActividades(res.data.results);
     } catch (err) {
       console.error("Error cargando actividades:", err);
     }
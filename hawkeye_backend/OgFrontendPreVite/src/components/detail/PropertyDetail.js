@@ -86,7 +86,7 @@ export default function PropertyDetail() {
       const res = await api.get(`/actividades/inmueble/${id}/`, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      setActividades(res.data);
+      setActividades(res.data.results);
     } catch (err) {
       console.error("Error cargando actividades:", err);
     }
@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import api from "../../api";
+import api, { getTodo } from "../../api";
 import { useNavigate } from "react-router-dom";
 import SearchCliente from "../SearchCliente";
 import SearchInmueble from "../SearchInmueble";
@@ -299,11 +299,9 @@ function UserSelector({ selectedUser, onChange }) {
       const token = localStorage.getItem("accessToken");
       if (!token) return;
       try {
-        const res = await fetch("/api/usuarios/", {
-          headers: { Authorization: `Bearer ${token}`, "Content-Type": "application/json" },
+        const data = await getTodo("/usuarios/", {
+          headers: { Authorization: `Bearer ${token}` },
         });
-        if (!res.ok) return;
-        const data = await res.json();
         setUsuarios(data);
       } catch (error) {
         console.error("Error al obtener usuarios:", error);
@@ -32,7 +32,8 @@ export default function NewInmuebleForm() {
           { headers: { Authorization: `Bearer ${token}` } }
         );
 
-        const results = res.data.sort((a, b) => {
+        // SearchFilter no recorta: llega paginado, basta la primera página
+        const results = res.data.results.sort((a, b) => {
           const aStarts = a.calle.toLowerCase().startsWith(searchQuery.toLowerCase()) ? -1 : 1;
           const bStarts = b.calle.toLowerCase().startsWith(searchQuery.toLowerCase()) ? -1 : 1;
           return aStarts - bStarts;
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../../api";  // axios configurado con baseURL, etc.
+import { getTodo } from "../../api";  // recorre todas las páginas del cursor
 import { Link } from "react-router-dom";
 
 export default function ClientesList() {
@@ -21,12 +21,12 @@ export default function ClientesList() {
           return;
         }
 
-        const res = await api.get("/clientes/", {
+        const clientes = await getTodo("/clientes/", {
           headers: {
             Authorization: `Bearer ${token}`,
           },
         });
-        setClientes(res.data);
+        setClientes(clientes);
       } catch (err) {
         console.error(err);
         if (err.response?.status === 401) {
@@ -2,7 +2,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { GripVertical, ChevronDown, ChevronUp } from "lucide-react";
-import api from "../../api";
+import { getTodo } from "../../api";
 import { Link } from "react-router-dom"; // asegúrate de tenerlo arriba
 
 export default function PedidoList() {
@@ -38,10 +38,11 @@ export default function PedidoList() {
       setLoading(true);
       try {
         const token = localStorage.getItem("accessToken");
-        const res = await api.get("/pedidos/", {
+        // El listado trae el cliente como id: ?expand=cliente lo anida
+        const pedidos = await getTodo("/pedidos/?expand=cliente", {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setPedidos(res.data);
+        setPedidos(pedidos);
       } catch (err) {
         console.error(err);
         setError("Error al cargar los pedidos.");
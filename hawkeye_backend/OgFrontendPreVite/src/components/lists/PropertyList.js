@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { GripVertical, ChevronDown, ChevronUp } from "lucide-react";
-import api from "../../api";
+import { getTodo } from "../../api";
 
 export default function PropertiesList() {
   const [inmuebles, setInmuebles] = useState([]);
@@ -35,8 +35,9 @@ export default function PropertiesList() {
       setError(null);
       setLoading(true);
       try {
-        const res = await api.get("/inmuebles/");
-        setInmuebles(res.data);
+        // El listado trae edificio y propietario como ids: ?expand= los anida
+        const inmuebles = await getTodo("/inmuebles/?expand=edificio,propietario");
+        setInmuebles(inmuebles);
       } catch (err) {
         console.error(err);
         if (err.response?.status === 401) {
@@ -0,0 +1,13 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import routers
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """JWT + base de datos de la franquicia del usuario para el resto de la petición (api/routers.py)."""
+
+    def authenticate(self, request):
+        resultado = super().authenticate(request)
+        if resultado is not None:
+            routers.fijar_usuario(resultado[0])
+        return resultado
@@ -0,0 +1,199 @@
+# ============================================================
+# HAWKEYE — ALTAS / EDICIONES / BAJAS EN LOTE
+# ============================================================
+#
+# Mismo resultado que N llamadas a perform_create / perform_update, pero:
+#   - los campos de tenant y auditoría se aplican una vez para todo el lote
+#   - las FKs / M2M que llegan como id se cargan con un in_bulk por campo
+#     antes de validar (precargar_relaciones), no con un .get() por fila
+#   - los derivados (nombre_apellido, direccion_busqueda, lat/lng) se
+#     calculan en memoria con los edificios ya validados
+#   - se escribe con bulk_create / bulk_update dentro de una transacción
+#   - SearchDocument, caché de búsqueda y fecha_ultimo_contacto se
+#     actualizan una vez por lote (bulk_* no envía post_save)
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import relations
+
+from .contacto import registrar_contacto
+from .models import Cliente, Edificio, Inmueble, Actividad
+from .routers import alias_actual
+from .signals import lote_guardado
+
+BATCH_SIZE = 500
+
+
+# ==========================================================
+# 🔗 RELACIONES PRECARGADAS
+# ==========================================================
+class _Precargadas:
+    """Ocupa el sitio del queryset de un PrimaryKeyRelatedField: .get(pk=...) sobre un dict."""
+
+    def __init__(self, model, instancias):
+        self.model, self.instancias = model, instancias
+
+    def get(self, pk):
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise ValueError(pk)  # DRF → "incorrect_type", igual que con el queryset
+        try:
+            return self.instancias[pk]
+        except KeyError:
+            raise self.model.DoesNotExist()
+
+
+def _relacion_pk(campo):
+    relacion = campo.child_relation if isinstance(campo, relations.ManyRelatedField) else campo
+    if campo.read_only or not isinstance(relacion, relations.PrimaryKeyRelatedField) or relacion.pk_field is not None:
+        return None
+    return relacion
+
+
+def precargar_relaciones(serializer, filas):
+    """
+    {campo: _Precargadas} con un in_bulk por cada PrimaryKeyRelatedField
+    escribible de `serializer`, sobre los ids que traen las `filas` (datos
+    sin validar). Los ids que no existen se quedan fuera y DRF responde
+    "does_not_exist" como siempre.
+    """
+    mapas = {}
+    for nombre, campo in serializer.fields.items():
+        relacion = _relacion_pk(campo)
+        if relacion is None:
+            continue
+        queryset = relacion.get_queryset()
+        pk = queryset.model._meta.pk
+
+        ids = set()
+        for fila in filas:
+            valor = fila.get(nombre) if isinstance(fila, dict) else None
+            for v in valor if isinstance(valor, list) else [valor]:
+                if v is None or isinstance(v, bool):
+                    continue
+                try:
+                    ids.add(pk.to_python(v))
+                except ValidationError:
+                    continue
+
+        mapas[nombre] = _Precargadas(queryset.model, queryset.in_bulk(ids) if ids else {})
+    return mapas
+
+
+def usar_precargadas(serializer, mapas):
+    """Hace que `serializer` valide sus relaciones contra `mapas` en vez de consultar."""
+    for nombre, mapa in mapas.items():
+        _relacion_pk(serializer.fields[nombre]).queryset = mapa
+    return serializer
+
+
+# ==========================================================
+# 🧮 DERIVADOS EN MEMORIA
+# ==========================================================
+def _derivados_cliente(objs):
+    for obj in objs:
+        obj.calcular_derivados()
+
+
+def _derivados_inmueble(objs):
+    # El edificio validado (o el del select_related) ya está en la instancia:
+    # solo se cargan los que falten
+    campo = Inmueble._meta.get_field("edificio")
+    faltan = {obj.edificio_id for obj in objs if obj.edificio_id and not campo.is_cached(obj)}
+    edificios = Edificio.objects.in_bulk(faltan) if faltan else {}
+    for obj in objs:
+        if obj.edificio_id:
+            obj.calcular_derivados(edificios.get(obj.edificio_id) or obj.edificio)
+
+
+def _derivados_actividad(objs):
+    for obj in objs:
+        obj.corregir_fechas()
+
+
+# modelo → (función, campos que escribe)
+DERIVADOS = {
+    Cliente: (
+        _derivados_cliente,
+        [
+            "nombre_apellido", "nombre_apellidos_completo", "telefono_norm", "telefono_movil_norm",
+            "email_norm", "email_secundario_norm", "num_identificacion_norm",
+        ],
+    ),
+    Inmueble: (_derivados_inmueble, ["direccion_busqueda", "latitud", "longitud"]),
+    Actividad: (_derivados_actividad, ["fecha_fin"]),
+}
+
+
+def _separar_m2m(model, datos):
+    m2m = {f.name for f in model._meta.many_to_many}
+    return (
+        {k: v for k, v in datos.items() if k not in m2m},
+        {k: v for k, v in datos.items() if k in m2m},
+    )
+
+
+# ==========================================================
+# ➕ ALTA
+# ==========================================================
+def crear_lote(model, validados, comunes):
+    """`validados`: lista de validated_data; `comunes`: tenant + auditoría."""
+    objs, relaciones = [], []
+    for datos in validados:
+        campos, m2m = _separar_m2m(model, datos)
+        objs.append(model(**campos, **comunes))
+        relaciones.append(m2m)
+
+    derivar = DERIVADOS.get(model, (None, []))[0]
+    if derivar:
+        derivar(objs)
+
+    with transaction.atomic(using=alias_actual()):
+        model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        for obj, m2m in zip(objs, relaciones):
+            for nombre, valores in m2m.items():
+                getattr(obj, nombre).set(valores)
+        if model is Actividad:
+            registrar_contacto(objs)
+        lote_guardado(model, objs, creados=True)
+
+    return objs
+
+
+# ==========================================================
+# ✏️ EDICIÓN
+# ==========================================================
+def actualizar_lote(model, pares, comunes):
+    """`pares`: lista de (instancia, validated_data parcial)."""
+    campos_escritos = set(comunes) | {"fecha_ultima_modificacion"}
+    ahora = timezone.now()
+    objs, relaciones = [], []
+
+    for obj, datos in pares:
+        campos, m2m = _separar_m2m(model, datos)
+        for nombre, valor in {**campos, **comunes}.items():
+            setattr(obj, nombre, valor)
+        # bulk_update no aplica auto_now
+        obj.fecha_ultima_modificacion = ahora
+        campos_escritos.update(campos)
+        objs.append(obj)
+        relaciones.append(m2m)
+
+    derivar, derivados = DERIVADOS.get(model, (None, []))
+    if derivar:
+        derivar(objs)
+        campos_escritos.update(derivados)
+
+    # FK escritas por nombre ("edificio") → bulk_update las acepta tal cual
+    with transaction.atomic(using=alias_actual()):
+        model.objects.bulk_update(objs, sorted(campos_escritos), batch_size=BATCH_SIZE)
+        for obj, m2m in zip(objs, relaciones):
+            for nombre, valores in m2m.items():
+                getattr(obj, nombre).set(valores)
+        if model is Actividad:
+            registrar_contacto(objs)
+        lote_guardado(model, objs)
+
+    return objs
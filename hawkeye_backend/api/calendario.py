@@ -0,0 +1,107 @@
+# ============================================================
+# HAWKEYE — CALENDARIO (vistas día / semana / mes)
+# ============================================================
+#
+# /api/calendario/?start=2024-05-01&end=2024-06-01[&usuario=<id>|&oficina=<id>]
+#   modo=eventos (defecto) → actividades que se solapan con [start, end),
+#                            forma compacta, sin serializers
+#   modo=dias              → {"AAAA-MM-DD": n} por día de inicio (rejilla mensual)
+#
+# El solape usa tstzrange(fecha_inicio, fecha_fin) && tstzrange(start, end),
+# servido por los GiST (oficina_id | creado_por_id, tstzrange(...)) de la
+# migración 0016. Los conteos por día filtran por fecha_inicio y usan
+# idx_act_oficina_fecha / idx_act_user_fecha.
+#
+# api_actividad está particionada por mes de fecha_inicio: ambos modos acotan
+# fecha_inicio (en eventos, con DURACION_MAXIMA_ACTIVIDAD) para que Postgres
+# solo abra las particiones de la ventana.
+
+from datetime import timedelta
+
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Count, F, Func
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework import exceptions
+
+from .models import Actividad, DURACION_MAXIMA_ACTIVIDAD
+from .timeline import rango_fechas
+
+MODOS = ("eventos", "dias")
+
+# Ventana máxima por petición (un mes con semanas de borde cabe de sobra)
+MAX_DIAS = 45
+MAX_DIAS_CONTEOS = 400
+
+CAMPOS_EVENTO = ("id", "tipo", "estado", "fecha_inicio", "fecha_fin", "cliente_id", "inmueble_id", "pedido_id")
+
+
+class RangoActividad(Func):
+    """tstzrange(fecha_inicio, fecha_fin): misma expresión que los índices GiST."""
+
+    function = "tstzrange"
+    output_field = DateTimeRangeField()
+
+    def __init__(self):
+        super().__init__(F("fecha_inicio"), F("fecha_fin"))
+
+
+def _entero(params, nombre):
+    valor = params.get(nombre)
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise exceptions.ValidationError({nombre: "Debe ser un id numérico."})
+
+
+def actividades_calendario(user, params):
+    """(modo, queryset base, inicio, fin) ya filtrado por tenant y usuario/oficina."""
+    modo = params.get("modo", "eventos")
+    if modo not in MODOS:
+        raise exceptions.ValidationError({"modo": f"Usa uno de: {', '.join(MODOS)}"})
+
+    inicio, fin = rango_fechas(params, "start", "end", requerido=True)
+    maximo = MAX_DIAS if modo == "eventos" else MAX_DIAS_CONTEOS
+    if fin - inicio > timedelta(days=maximo):
+        raise exceptions.ValidationError({"end": f"La ventana no puede superar {maximo} días."})
+
+    queryset = Actividad.objects.para_usuario(user)
+
+    usuario, oficina = _entero(params, "usuario"), _entero(params, "oficina")
+    if usuario is not None:
+        queryset = queryset.filter(creado_por_id=usuario)
+    elif oficina is not None:
+        queryset = queryset.filter(oficina_id=oficina)
+    elif user.oficina_id is None:
+        # Usuario de franquicia sin oficina: el GiST necesita oficina o usuario
+        raise exceptions.ValidationError({"detail": "Indica usuario u oficina."})
+
+    return modo, queryset, inicio, fin
+
+
+def eventos(queryset, inicio, fin):
+    """Actividades que se solapan con [inicio, fin) en forma compacta."""
+    filas = (
+        queryset.alias(rango=RangoActividad())
+        .filter(rango__overlap=DateTimeTZRange(inicio, fin))
+        # Redundante con el solape, pero poda particiones
+        .filter(fecha_inicio__gt=inicio - DURACION_MAXIMA_ACTIVIDAD, fecha_inicio__lt=fin)
+        .order_by("fecha_inicio", "id")
+        .values(*CAMPOS_EVENTO, usuario=F("creado_por_id"))
+    )
+    return list(filas)
+
+
+def conteos_por_dia(queryset, inicio, fin):
+    """{"AAAA-MM-DD": n} por día local de fecha_inicio dentro de [inicio, fin)."""
+    filas = (
+        queryset.filter(fecha_inicio__gte=inicio, fecha_inicio__lt=fin)
+        .annotate(dia=TruncDate("fecha_inicio", tzinfo=timezone.get_current_timezone()))
+        .order_by("dia")
+        .values("dia")
+        .annotate(n=Count("id"))
+    )
+    return {fila["dia"].isoformat(): fila["n"] for fila in filas}
@@ -0,0 +1,102 @@
+# ============================================================
+# HAWKEYE — FECHA DE ÚLTIMO CONTACTO (Cliente / Inmueble / Pedido)
+# ============================================================
+#
+# fecha_ultimo_contacto = día local del fecha_inicio más reciente de sus
+# actividades. Se mantiene con un UPDATE por tabla y GREATEST, así que una
+# actividad antigua dada de alta tarde nunca pisa una fecha más nueva, y
+# no se carga ningún objeto relacionado. recompute_last_contact lo
+# recalcula todo desde api_actividad. Los dos UPDATE ponen también
+# fecha_ultima_modificacion = now(), igual que haría auto_now con save():
+# de ella dependen los ETag de los listados y move_franquicia.
+#
+# La antigüedad ("sin contacto hace N días") se filtra y ordena sobre
+# fecha_ultimo_contacto (UltimoContactoMixin); dias_ultimo_contacto es solo
+# una copia que refresh_last_contact_days pone al día cada noche.
+
+from django.db import connections
+from django.utils import timezone
+
+from .models import Cliente, Inmueble, Pedido
+from .routers import DEFAULT, base_de
+
+# (modelo destino, FK de Actividad que apunta a él)
+OBJETIVOS = [
+    (Cliente, "cliente_id"),
+    (Inmueble, "inmueble_id"),
+    (Pedido, "pedido_id"),
+]
+
+
+def registrar_contacto(actividades):
+    """Sube fecha_ultimo_contacto de los relacionados de `actividades` (nunca la baja)."""
+    if not actividades:
+        return
+    # Todas de la misma franquicia → misma base
+    with connections[base_de(actividades[0])].cursor() as cursor:
+        for model, fk in OBJETIVOS:
+            fechas = {}
+            for actividad in actividades:
+                pk = getattr(actividad, fk)
+                if pk is not None and actividad.fecha_inicio:
+                    fecha = timezone.localdate(actividad.fecha_inicio)
+                    fechas[pk] = max(fecha, fechas.get(pk, fecha))
+            if not fechas:
+                continue
+
+            valores = ", ".join(["(%s, %s::date)"] * len(fechas))
+            cursor.execute(
+                f"""
+                UPDATE {model._meta.db_table} t
+                SET fecha_ultimo_contacto = GREATEST(t.fecha_ultimo_contacto, v.fecha),
+                    fecha_ultima_modificacion = now()
+                FROM (VALUES {valores}) AS v(id, fecha)
+                WHERE t.id = v.id
+                  AND (t.fecha_ultimo_contacto IS NULL OR t.fecha_ultimo_contacto < v.fecha)
+                """,
+                [x for par in fechas.items() for x in par],
+            )
+
+
+def recalcular_contactos(using=DEFAULT):
+    """Recalcula fecha_ultimo_contacto de las tres tablas en una pasada. Devuelve filas cambiadas por modelo."""
+    cambios = {}
+    with connections[using].cursor() as cursor:
+        for model, fk in OBJETIVOS:
+            tabla = model._meta.db_table
+            cursor.execute(
+                f"""
+                UPDATE {tabla} t
+                SET fecha_ultimo_contacto = a.fecha,
+                    fecha_ultima_modificacion = now()
+                FROM {tabla} t2
+                LEFT JOIN (
+                    SELECT {fk} AS id, max((fecha_inicio AT TIME ZONE %s)::date) AS fecha
+                    FROM api_actividad
+                    WHERE {fk} IS NOT NULL
+                    GROUP BY {fk}
+                ) a ON a.id = t2.id
+                WHERE t.id = t2.id
+                  AND t.fecha_ultimo_contacto IS DISTINCT FROM a.fecha
+                """,
+                [timezone.get_current_timezone_name()],
+            )
+            cambios[model.__name__] = cursor.rowcount
+    return cambios
+
+
+def refrescar_dias(using=DEFAULT):
+    """dias_ultimo_contacto = hoy - fecha_ultimo_contacto (0 si nunca). Devuelve filas cambiadas por modelo."""
+    cambios = {}
+    with connections[using].cursor() as cursor:
+        for model in (Cliente, Inmueble):
+            cursor.execute(
+                f"""
+                UPDATE {model._meta.db_table}
+                SET dias_ultimo_contacto = COALESCE(GREATEST(%s::date - fecha_ultimo_contacto, 0), 0)
+                WHERE dias_ultimo_contacto IS DISTINCT FROM COALESCE(GREATEST(%s::date - fecha_ultimo_contacto, 0), 0)
+                """,
+                [timezone.localdate(), timezone.localdate()],
+            )
+            cambios[model.__name__] = cursor.rowcount
+    return cambios
@@ -0,0 +1,146 @@
+# ============================================================
+# HAWKEYE — DOCUMENTOS DE BÚSQUEDA (SearchDocument)
+# ============================================================
+#
+# Convierte cada Cliente / Inmueble / Edificio / Pedido / Actividad en una
+# fila de SearchDocument. `datos` guarda exactamente lo que devuelve
+# global_search para esa entidad, así la respuesta no toca las tablas origen.
+
+import unicodedata
+
+from django.db import transaction
+
+from .models import Cliente, Inmueble, Edificio, Pedido, Actividad, SearchDocument
+from .routers import DEFAULT, base_de
+
+
+def normalizar(*partes):
+    """Une las partes no vacías, en minúsculas y sin acentos."""
+    texto = " ".join(str(p) for p in partes if p)
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+# ==========================================================
+# 🧩 CONSTRUCTORES POR ENTIDAD
+# ==========================================================
+def _doc_cliente(c):
+    return SearchDocument(
+        texto=normalizar(
+            c.nombre_apellidos_completo, c.email, c.email_secundario,
+            c.telefono, c.telefono_movil, c.num_identificacion,
+        ),
+        datos={"nombre": c.nombre_apellidos_completo, "email": c.email, "telefono": c.telefono_movil},
+    )
+
+
+def _doc_inmueble(i):
+    return SearchDocument(
+        texto=normalizar(i.direccion_busqueda, i.ref_catastral, i.zona_asignada),
+        datos={"direccion": i.direccion_busqueda, "ref_catastral": i.ref_catastral},
+    )
+
+
+def _doc_edificio(e):
+    return SearchDocument(
+        texto=normalizar(e.calle, e.numero_calle, e.codigo_postal, e.provincia),
+        datos={"direccion": f"{e.calle} {e.numero_calle}", "cp": e.codigo_postal},
+    )
+
+
+def _doc_pedido(p):
+    return SearchDocument(
+        texto=normalizar(p.descripcion, p.motivacion, p.tipo_inmueble, p.ubicaciones),
+        datos={"descripcion": p.descripcion, "cliente": str(p.cliente)},
+    )
+
+
+def _doc_actividad(a):
+    return SearchDocument(
+        texto=normalizar(a.descripcion_publica, a.descripcion_empleado, a.tipo),
+        datos={"descripcion": a.descripcion_publica or a.descripcion_empleado},
+        fecha=a.fecha_inicio,
+    )
+
+
+# modelo → (tipo, constructor, select_related necesario)
+CONSTRUCTORES = {
+    Cliente: (SearchDocument.Tipo.CLIENTE, _doc_cliente, ()),
+    Inmueble: (SearchDocument.Tipo.INMUEBLE, _doc_inmueble, ()),
+    Edificio: (SearchDocument.Tipo.EDIFICIO, _doc_edificio, ()),
+    Pedido: (SearchDocument.Tipo.PEDIDO, _doc_pedido, ("cliente",)),
+    Actividad: (SearchDocument.Tipo.ACTIVIDAD, _doc_actividad, ()),
+}
+
+
+def construir(instance):
+    tipo, constructor, _ = CONSTRUCTORES[type(instance)]
+    doc = constructor(instance)
+    doc.tipo = tipo
+    doc.objeto_id = instance.pk
+    doc.franquicia_id = instance.franquicia_id
+    doc.oficina_id = instance.oficina_id
+    return doc
+
+
+# ==========================================================
+# 🔄 SINCRONIZACIÓN INCREMENTAL (llamada desde signals)
+# ==========================================================
+def sincronizar(instance):
+    doc = construir(instance)
+    SearchDocument.objects.using(base_de(instance)).update_or_create(
+        tipo=doc.tipo,
+        objeto_id=doc.objeto_id,
+        defaults={
+            "franquicia_id": doc.franquicia_id,
+            "oficina_id": doc.oficina_id,
+            "texto": doc.texto,
+            "datos": doc.datos,
+            "fecha": doc.fecha,
+        },
+    )
+
+
+def sincronizar_lote(instances):
+    """sincronizar() para un lote (bulk_create / bulk_update): un solo upsert."""
+    docs = [construir(instance) for instance in instances]
+    SearchDocument.objects.using(base_de(instances[0])).bulk_create(
+        docs,
+        update_conflicts=True,
+        unique_fields=["tipo", "objeto_id"],
+        update_fields=["franquicia", "oficina", "texto", "datos", "fecha", "fecha_ultima_modificacion"],
+    )
+
+
+def eliminar(instance):
+    tipo = CONSTRUCTORES[type(instance)][0]
+    SearchDocument.objects.using(base_de(instance)).filter(tipo=tipo, objeto_id=instance.pk).delete()
+
+
+# ==========================================================
+# 🏗️ RECONSTRUCCIÓN MASIVA
+# ==========================================================
+def reconstruir(modelo, batch=2000, log=None, using=DEFAULT):
+    """Regenera todos los documentos de `modelo` en la base `using`. Devuelve cuántos escribió."""
+    tipo, _, relacionados = CONSTRUCTORES[modelo]
+    queryset = modelo.objects.using(using).select_related(*relacionados).order_by("pk")
+    documentos = SearchDocument.objects.using(using)
+
+    total = 0
+    with transaction.atomic(using=using):
+        documentos.filter(tipo=tipo).delete()
+
+        lote = []
+        for instance in queryset.iterator(chunk_size=batch):
+            lote.append(construir(instance))
+            if len(lote) >= batch:
+                documentos.bulk_create(lote)
+                total += len(lote)
+                lote = []
+                if log:
+                    log(f"  {modelo.__name__}: {total}")
+        if lote:
+            documentos.bulk_create(lote)
+            total += len(lote)
+
+    return total
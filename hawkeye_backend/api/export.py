@@ -0,0 +1,52 @@
+# ============================================================
+# HAWKEYE — EXPORTACIÓN EN STREAMING (CSV / NDJSON)
+# ============================================================
+#
+# values_list + iterator(chunk_size) → cursor del lado del servidor en
+# Postgres: en memoria solo hay un lote de filas, sea cual sea el tamaño de
+# la oficina. La cabecera se envía antes de lanzar la consulta, así que el
+# primer byte sale de inmediato.
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+CHUNK_SIZE = 2000
+
+
+class _Eco:
+    """Pseudo-fichero para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas_csv(queryset, columnas):
+    writer = csv.writer(_Eco())
+    yield "\ufeff" + writer.writerow(columnas)  # BOM → Excel detecta UTF-8
+    for fila in queryset.values_list(*columnas).iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow(fila)
+
+
+def _filas_ndjson(queryset, columnas):
+    for fila in queryset.values_list(*columnas).iterator(chunk_size=CHUNK_SIZE):
+        yield json.dumps(dict(zip(columnas, fila)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def exportar(queryset, columnas, formato, nombre):
+    """StreamingHttpResponse con `columnas` de `queryset` en CSV o NDJSON."""
+    queryset = queryset.order_by("pk")
+    filas = _filas_csv(queryset, columnas) if formato == "csv" else _filas_ndjson(queryset, columnas)
+
+    response = StreamingHttpResponse(filas, content_type=FORMATOS[formato])
+    fecha = timezone.localdate().isoformat()
+    response["Content-Disposition"] = f'attachment; filename="{nombre}-{fecha}.{formato}"'
+    return response
@@ -0,0 +1,143 @@
+# ============================================================
+# HAWKEYE — LISTADOS RÁPIDOS (values() en vez de ModelSerializer)
+# ============================================================
+#
+# Lee un serializer de listado (ya recortado por ?fields= / ?omit= /
+# ?expand=) y lo traduce a una lista de lookups para .values():
+#   - campo simple / FK como pk   → lookup directo
+#   - source="rel.campo"          → "rel__campo"
+#   - serializer anidado (FK)     → sus campos con prefijo "rel__"
+# Cada valor pasa por el to_representation del propio campo DRF, así que
+# la salida es idéntica a la del serializer; lo que se ahorra es instanciar
+# modelos y serializers por fila. Si hay algo que no se puede traducir
+# (SerializerMethodField, many=True, source="*"...) se devuelve None y el
+# ViewSet usa el camino normal.
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import relations, serializers
+from rest_framework.fields import empty
+
+
+class NoSoportado(Exception):
+    pass
+
+
+def _ruta_modelo(model, source, anotaciones):
+    """'propietario.nombre' → ('propietario__nombre', modelo final) o NoSoportado."""
+    partes = source.split(".")
+    if len(partes) == 1 and partes[0] in anotaciones:
+        return partes[0], None
+
+    actual = model
+    for i, parte in enumerate(partes):
+        try:
+            field = actual._meta.get_field(parte)
+        except FieldDoesNotExist:
+            raise NoSoportado(source)
+        if field.many_to_many or field.one_to_many:
+            raise NoSoportado(source)
+        if field.is_relation and i < len(partes) - 1:
+            actual = field.related_model
+    return "__".join(partes), field
+
+
+def _plan(serializer, model, prefijo, anotaciones):
+    """Lista de (nombre, lookup, convertir) para los campos legibles de `serializer`."""
+    plan = []
+    for campo in serializer._readable_fields:
+        if isinstance(campo, (serializers.SerializerMethodField, serializers.ListSerializer,
+                              relations.ManyRelatedField, serializers.HiddenField)):
+            raise NoSoportado(campo.field_name)
+        if campo.source == "*":
+            raise NoSoportado(campo.field_name)
+
+        if campo.source in anotaciones and not prefijo:
+            plan.append((campo.field_name, campo.source, campo.to_representation))
+            continue
+
+        raiz = campo.source.split(".")[0]
+        if raiz not in _nombres(model):
+            if hasattr(model, raiz):
+                raise NoSoportado(campo.field_name)  # @property u otro atributo Python
+            # Ni columna ni anotación (p. ej. rank sin ?texto=): DRF lo omite
+            if campo.read_only and campo.default is empty and not campo.allow_null:
+                continue
+            raise NoSoportado(campo.field_name)
+
+        lookup, field = _ruta_modelo(model, campo.source, anotaciones if not prefijo else ())
+        lookup = f"{prefijo}{lookup}"
+
+        if isinstance(campo, serializers.BaseSerializer):
+            if not (field.many_to_one or field.one_to_one):
+                raise NoSoportado(campo.field_name)
+            hijo = _plan(campo, field.related_model, f"{lookup}__", ())
+            plan.append((campo.field_name, lookup, hijo))
+        elif isinstance(campo, relations.PrimaryKeyRelatedField):
+            if campo.pk_field is not None:
+                raise NoSoportado(campo.field_name)
+            plan.append((campo.field_name, lookup, None))  # el id tal cual
+        elif isinstance(campo, relations.RelatedField):
+            raise NoSoportado(campo.field_name)
+        else:
+            plan.append((campo.field_name, lookup, campo.to_representation))
+    return plan
+
+
+def _nombres(model):
+    return {f.name for f in model._meta.get_fields()} | {
+        f.attname for f in model._meta.concrete_fields
+    }
+
+
+def _lookups(plan):
+    for nombre, lookup, convertir in plan:
+        yield lookup
+        if isinstance(convertir, list):
+            yield from _lookups(convertir)
+
+
+def _representar(fila, plan):
+    ret = {}
+    for nombre, lookup, convertir in plan:
+        valor = fila[lookup]
+        if valor is None:
+            ret[nombre] = None
+        elif convertir is None:
+            ret[nombre] = valor
+        elif isinstance(convertir, list):
+            ret[nombre] = _representar(fila, convertir)
+        else:
+            ret[nombre] = convertir(valor)
+    return ret
+
+
+class ListadoRapido:
+    """Traducción de un serializer de listado a values() + dicts."""
+
+    def __init__(self, plan, orden):
+        self.plan = plan
+        self.orden = orden
+
+    def queryset(self, queryset):
+        lookups = list(dict.fromkeys([*_lookups(self.plan), *self.orden]))
+        # Sin prefetch ni only(): values() trae exactamente estas columnas
+        return queryset.prefetch_related(None).defer(None).values(*lookups)
+
+    def representar(self, filas):
+        return [_representar(fila, self.plan) for fila in filas]
+
+
+def listado_rapido(serializer, queryset, orden=None):
+    """
+    ListadoRapido para `serializer` sobre `queryset`, o None si no es traducible.
+    `orden`: el del paginador por cursor, si lo hay (por defecto, Meta.ordering).
+    """
+    model = queryset.model
+    try:
+        plan = _plan(serializer, model, "", set(queryset.query.annotations))
+    except NoSoportado:
+        return None
+    # La paginación por cursor lee el primer campo del orden de cada fila
+    # (mismo criterio que MetaOrderingCursorPagination)
+    orden = [(list(orden or model._meta.ordering) or ["-id"])[0].lstrip("-")]
+    return ListadoRapido(plan, orden)
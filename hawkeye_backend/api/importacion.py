@@ -0,0 +1,347 @@
+# ============================================================
+# HAWKEYE — IMPORTACIÓN MASIVA CON COPY
+# ============================================================
+#
+# Fichero → COPY a una tabla temporal de texto → un único
+# INSERT ... SELECT ... ON CONFLICT (clave) DO UPDATE
+# Los casts, valores por defecto y columnas derivadas (nombre_apellido,
+# *_norm, direccion_busqueda, lat/lng heredadas) se calculan en SQL, así
+# que no se instancia ningún modelo por fila.
+#
+# - Las filas repetidas dentro del fichero se reducen a la última.
+# - Una clave que ya existe en otra franquicia no se toca (se cuenta como
+#   ignorada): las claves son únicas globalmente.
+# - En filas existentes solo se actualizan las columnas que trae el
+#   fichero y los derivados cuyas columnas origen vienen todas.
+
+import csv
+import time
+from dataclasses import dataclass, field
+
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from . import search_cache
+from .documents import CONSTRUCTORES
+from .export import _Eco
+from .models import Cliente, Edificio, Inmueble
+from .routers import alias_franquicia, usar_base
+from .signals import lote_guardado
+
+# Identificadores siempre entre comillas: hay columnas con mayúsculas
+# (Inmueble.emisiones_CO2) que Postgres plegaría a minúsculas
+qn = connection.ops.quote_name
+
+# Columnas que nunca vienen del fichero
+AUDITORIA = ("franquicia_id", "oficina_id", "creado_por_id", "ultima_modificacion_por_id")
+
+# Copias en SQL de api/normalization.py (NormalizacionSQLTests las compara).
+# btrim() solo quita espacios; str.strip() también tabuladores y saltos
+RE_TELEFONO = (
+    r"regexp_replace(regexp_replace(regexp_replace(coalesce({}, ''), '\D', '', 'g'), "
+    r"'^00', ''), '^34(\d{{9}})$', '\1')"
+)
+RE_EMAIL = r"lower(regexp_replace(coalesce({}, ''), '^\s+|\s+$', '', 'g'))"
+RE_DOCUMENTO = r"upper(regexp_replace(coalesce({}, ''), '[\s\-.]', '', 'g'))"
+
+
+@dataclass
+class Derivado:
+    sql: str                 # expresión sobre f.<columna> (y e.<columna> en inmuebles)
+    fuentes: tuple = ()      # columnas del fichero de las que depende
+
+
+@dataclass
+class Importacion:
+    model: type
+    clave: str
+    derivados: dict = field(default_factory=dict)
+    # Columna que se resuelve en SQL si no viene en el fichero:
+    # attname → (subconsulta sobre s.* filtrada por franquicia, columna del fichero que necesita)
+    resueltas: dict = field(default_factory=dict)
+    union: str = ""
+
+    @property
+    def tabla(self):
+        return self.model._meta.db_table
+
+    def campos(self):
+        return [f for f in self.model._meta.concrete_fields if not f.primary_key]
+
+    def columnas_validas(self):
+        return {
+            f.attname for f in self.campos()
+            if f.attname not in AUDITORIA and f.attname not in self.derivados
+            and not getattr(f, "auto_now", False) and not getattr(f, "auto_now_add", False)
+        } | set(self.derivados_editables())
+
+    def derivados_editables(self):
+        """Derivados que también pueden venir en el fichero (lat/lng)."""
+        return [nombre for nombre, d in self.derivados.items() if nombre in d.fuentes]
+
+    def errores(self, columnas):
+        """Problemas de la cabecera del fichero (lista vacía si es importable)."""
+        errores = [f"columna desconocida: {c}" for c in columnas if c not in self.columnas_validas()]
+        for nombre, (_, fuente) in self.resueltas.items():
+            if nombre not in columnas and fuente not in columnas:
+                errores.append(f"falta {nombre} o {fuente}")
+        return errores
+
+
+IMPORTACIONES = {
+    "edificio": Importacion(Edificio, "ref_catastral"),
+    "inmueble": Importacion(
+        Inmueble,
+        "ref_catastral",
+        derivados={
+            "direccion_busqueda": Derivado(
+                "lower(btrim(e.calle || ' ' || e.numero_calle || ' ' "
+                "|| coalesce(f.planta, '') || ' ' || coalesce(f.puerta, '')))",
+                ("planta", "puerta"),
+            ),
+            "latitud": Derivado(
+                "CASE WHEN coalesce(f.latitud, 0) = 0 OR coalesce(f.longitud, 0) = 0 "
+                "THEN e.latitud ELSE f.latitud END",
+                ("latitud", "longitud"),
+            ),
+            "longitud": Derivado(
+                "CASE WHEN coalesce(f.latitud, 0) = 0 OR coalesce(f.longitud, 0) = 0 "
+                "THEN e.longitud ELSE f.longitud END",
+                ("latitud", "longitud"),
+            ),
+        },
+        # Catastro: los 14 primeros caracteres de la referencia son la parcela
+        resueltas={
+            "edificio_id": (
+                "(SELECT ed.id FROM api_edificio ed "
+                "WHERE ed.ref_catastral = left(s.ref_catastral, 14) AND ed.franquicia_id = %s)",
+                "ref_catastral",
+            ),
+        },
+        union="JOIN api_edificio e ON e.id = f.edificio_id",
+    ),
+    "cliente": Importacion(
+        Cliente,
+        "num_identificacion",
+        derivados={
+            "nombre_apellido": Derivado(
+                "lower(btrim(f.nombre || ' ' || f.apellido1))", ("nombre", "apellido1"),
+            ),
+            "nombre_apellidos_completo": Derivado(
+                "lower(btrim(f.nombre || ' ' || f.apellido1 || ' ' || coalesce(f.apellido2, '')))",
+                ("nombre", "apellido1", "apellido2"),
+            ),
+            "telefono_norm": Derivado(RE_TELEFONO.format("f.telefono"), ("telefono",)),
+            "telefono_movil_norm": Derivado(RE_TELEFONO.format("f.telefono_movil"), ("telefono_movil",)),
+            "email_norm": Derivado(RE_EMAIL.format("f.email"), ("email",)),
+            "email_secundario_norm": Derivado(RE_EMAIL.format("f.email_secundario"), ("email_secundario",)),
+            "num_identificacion_norm": Derivado(
+                RE_DOCUMENTO.format("f.num_identificacion"), ("num_identificacion",),
+            ),
+        },
+    ),
+}
+
+
+# ==========================================================
+# 📄 LECTURA DEL FICHERO
+# ==========================================================
+class Flujo:
+    """Iterable de líneas → objeto con read() para cursor.copy_expert."""
+
+    def __init__(self, lineas):
+        self._lineas = iter(lineas)
+        self._resto = ""
+
+    def read(self, size=-1):
+        trozos, largo = [self._resto], len(self._resto)
+        while size < 0 or largo < size:
+            linea = next(self._lineas, None)
+            if linea is None:
+                break
+            trozos.append(linea)
+            largo += len(linea)
+        datos = "".join(trozos)
+        if size < 0:
+            size = len(datos)
+        self._resto = datos[size:]
+        return datos[:size]
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def lineas_ancho_fijo(fichero, columnas, registro=None):
+    """Ancho fijo → líneas CSV. `columnas`: [(nombre, inicio, fin)] con posiciones 1-based inclusivas."""
+    writer = csv.writer(_Eco())
+    for linea in fichero:
+        if registro and not linea.startswith(registro):
+            continue
+        yield writer.writerow([linea[inicio - 1:fin].strip() for _, inicio, fin in columnas])
+
+
+# ==========================================================
+# 🧱 SQL
+# ==========================================================
+def _cast(campo, expr):
+    """Texto del fichero → tipo de la columna; '' = NULL."""
+    tipo = campo.db_type(connection)
+    if campo.get_internal_type() in ("CharField", "TextField", "EmailField", "SlugField"):
+        return f"NULLIF({expr}, '')"
+    return f"NULLIF({expr}, '')::{tipo}"
+
+
+def _sql_upsert(imp, columnas, tenant, usuario, ahora):
+    """(sql, params) del INSERT ... ON CONFLICT para las `columnas` del fichero."""
+    fijos = {
+        "franquicia_id": tenant["franquicia"].pk,
+        "oficina_id": tenant["oficina"].pk,
+        "creado_por_id": usuario.pk,
+        "ultima_modificacion_por_id": usuario.pk,
+    }
+
+    # En la CTE un parámetro o NULL sin tipo sería text: se castea a la columna
+    selects, params = [], []
+    for campo in imp.campos():
+        nombre, tipo = campo.attname, campo.db_type(connection)
+        if nombre in fijos:
+            selects.append(f"CAST(%s AS {tipo}) AS {qn(nombre)}")
+            params.append(fijos[nombre])
+        elif getattr(campo, "auto_now", False) or getattr(campo, "auto_now_add", False):
+            selects.append(f"CAST(%s AS {tipo}) AS {qn(nombre)}")
+            params.append(ahora)
+        elif nombre in columnas:
+            expr = _cast(campo, f"s.{qn(nombre)}")
+            if not campo.null and campo.has_default():
+                expr = f"COALESCE({expr}, %s)"
+                params.append(campo.get_db_prep_save(campo.get_default(), connection))
+            selects.append(f"{expr} AS {qn(nombre)}")
+        elif nombre in imp.resueltas:
+            selects.append(f"{imp.resueltas[nombre][0]} AS {qn(nombre)}")
+            params.append(fijos["franquicia_id"])
+        elif campo.has_default():
+            selects.append(f"CAST(%s AS {tipo}) AS {qn(nombre)}")
+            params.append(campo.get_db_prep_save(campo.get_default(), connection))
+        else:
+            selects.append(f"CAST(NULL AS {tipo}) AS {qn(nombre)}")
+
+    nombres = [campo.attname for campo in imp.campos()]
+    valores = [imp.derivados[n].sql if n in imp.derivados else f"f.{qn(n)}" for n in nombres]
+
+    actualizar = [n for n in nombres if n in columnas and n not in imp.derivados and n != imp.clave]
+    actualizar += [n for n, d in imp.derivados.items() if set(d.fuentes) <= set(columnas)]
+    actualizar += [
+        c.attname for c in imp.campos() if getattr(c, "auto_now", False)
+    ] + ["ultima_modificacion_por_id"]
+
+    # Filas sin edificio (inmuebles) quedan fuera por el JOIN
+    sql = f"""
+        WITH f AS (
+            SELECT {", ".join(selects)} FROM tmp_importacion s
+        )
+        INSERT INTO {qn(imp.tabla)} ({", ".join(qn(n) for n in nombres)})
+        SELECT {", ".join(valores)}
+        FROM f {imp.union}
+        ON CONFLICT ({qn(imp.clave)}) DO UPDATE
+        SET {", ".join(f"{qn(n)} = EXCLUDED.{qn(n)}" for n in dict.fromkeys(actualizar))}
+        WHERE {qn(imp.tabla)}.franquicia_id = EXCLUDED.franquicia_id
+        RETURNING id, (xmax = 0) AS insertado
+    """
+    return sql, params
+
+
+# ==========================================================
+# 🚀 IMPORTAR
+# ==========================================================
+@dataclass
+class Resultado:
+    leidas: int = 0
+    segundos_copy: float = 0.0
+    segundos_upsert: float = 0.0
+    segundos_documentos: float = 0.0
+    ids_insertados: list = field(default_factory=list)
+    ids_actualizados: list = field(default_factory=list)
+
+    @property
+    def insertadas(self):
+        return len(self.ids_insertados)
+
+    @property
+    def actualizadas(self):
+        return len(self.ids_actualizados)
+
+    @property
+    def ignoradas(self):
+        return self.leidas - self.insertadas - self.actualizadas
+
+    @property
+    def segundos(self):
+        return self.segundos_copy + self.segundos_upsert + self.segundos_documentos
+
+
+def importar(entidad, flujo, columnas, usuario, tenant, delimitador=",", documentos=True, batch=2000):
+    """
+    Importa `flujo` (objeto con read() que da CSV sin cabecera con `columnas`)
+    en la entidad indicada. Todo o nada: una sola transacción.
+    """
+    imp = IMPORTACIONES[entidad]
+    if len(delimitador) != 1 or delimitador in "'\\\"":
+        raise ValueError(f"Delimitador no válido: {delimitador!r}")
+    errores = imp.errores(columnas)
+    if errores:
+        raise ValueError("; ".join(errores))
+    resultado = Resultado()
+
+    # Base de la franquicia: el SQL de aquí y el ORM de _sincronizar (router)
+    alias = alias_franquicia(tenant["franquicia"].pk)
+    with usar_base(alias), transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        t0 = time.perf_counter()
+        cursor.execute(
+            "CREATE TEMP TABLE tmp_importacion ("
+            + ", ".join(f"{qn(c)} text" for c in columnas)
+            + ") ON COMMIT DROP"
+        )
+        cursor.copy_expert(
+            # copy_expert no admite parámetros: el delimitador ya viene validado
+            f"COPY tmp_importacion ({', '.join(qn(c) for c in columnas)}) FROM STDIN WITH (FORMAT csv, DELIMITER '{delimitador}')",
+            flujo,
+        )
+        cursor.execute("SELECT count(*) FROM tmp_importacion")
+        resultado.leidas = cursor.fetchone()[0]
+
+        # La última aparición de cada clave gana
+        if imp.clave in columnas:
+            clave = qn(imp.clave)
+            cursor.execute(
+                f"DELETE FROM tmp_importacion a USING tmp_importacion b "
+                f"WHERE a.{clave} = b.{clave} AND a.{clave} <> '' AND a.ctid < b.ctid"
+            )
+        cursor.execute("ANALYZE tmp_importacion")
+        resultado.segundos_copy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        sql, params = _sql_upsert(imp, columnas, tenant, usuario, timezone.now())
+        cursor.execute(sql, params)
+        for pk, insertado in cursor.fetchall():
+            (resultado.ids_insertados if insertado else resultado.ids_actualizados).append(pk)
+        resultado.segundos_upsert = time.perf_counter() - t0
+
+        if documentos:
+            t0 = time.perf_counter()
+            _sincronizar(imp.model, resultado.ids_insertados, batch, creados=True)
+            _sincronizar(imp.model, resultado.ids_actualizados, batch, creados=False)
+            resultado.segundos_documentos = time.perf_counter() - t0
+
+    # Sin documentos, lote_guardado no ha invalidado la caché de búsqueda
+    search_cache.invalidar(entidad, tenant["franquicia"].pk, tenant["oficina"].pk)
+    return resultado
+
+
+def _sincronizar(model, ids, batch, creados):
+    """SearchDocument + caché de búsqueda de las filas importadas (como api/bulk.py)."""
+    relacionados = CONSTRUCTORES[model][2]
+    for i in range(0, len(ids), batch):
+        queryset = model.objects.filter(pk__in=ids[i:i + batch])
+        if relacionados:
+            queryset = queryset.select_related(*relacionados)
+        lote_guardado(model, list(queryset), creados=creados)
@@ -0,0 +1,93 @@
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importacion import IMPORTACIONES, Flujo, importar, lineas_ancho_fijo
+
+
+def _columnas_fijas(valor):
+    """'ref_catastral:31:50,planta:59:61' → [('ref_catastral', 31, 50), ...]."""
+    columnas = []
+    for parte in valor.split(","):
+        try:
+            nombre, inicio, fin = parte.strip().split(":")
+            columnas.append((nombre, int(inicio), int(fin)))
+        except ValueError:
+            raise CommandError(f"Columna de ancho fijo mal formada: {parte!r} (usa nombre:inicio:fin)")
+    return columnas
+
+
+class ComandoImportar(BaseCommand):
+    """Base de los comandos import_*: `entidad` es la clave de api.importacion.IMPORTACIONES."""
+
+    entidad = None
+
+    def add_arguments(self, parser):
+        parser.add_argument("fichero")
+        parser.add_argument("--user", required=True,
+                            help="username: su franquicia/oficina reciben las filas y figura como creado_por.")
+        parser.add_argument("--formato", choices=["csv", "fijo"], default="csv")
+        parser.add_argument("--delimitador", default=",")
+        parser.add_argument("--encoding", default="utf-8",
+                            help="Los ficheros CAT de Catastro vienen en latin-1.")
+        parser.add_argument("--columnas",
+                            help="Ancho fijo: nombre:inicio:fin separados por comas (posiciones 1-based).")
+        parser.add_argument("--registro", help="Ancho fijo: solo líneas que empiezan por este tipo de registro.")
+        parser.add_argument("--sin-documentos", action="store_true",
+                            help="No sincroniza SearchDocument (luego: rebuild_search_documents).")
+        parser.add_argument("--batch", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        usuario = get_user_model().objects.select_related("franquicia", "oficina").filter(
+            username=opts["user"]
+        ).first()
+        if usuario is None:
+            raise CommandError(f"No existe el usuario {opts['user']!r}.")
+        if not usuario.franquicia_id or not usuario.oficina_id:
+            raise CommandError("El usuario necesita franquicia y oficina asignadas.")
+        tenant = {"franquicia": usuario.franquicia, "oficina": usuario.oficina}
+
+        with open(opts["fichero"], encoding=opts["encoding"], newline="") as fichero:
+            if opts["formato"] == "fijo":
+                if not opts["columnas"]:
+                    raise CommandError("--formato fijo necesita --columnas.")
+                fijas = _columnas_fijas(opts["columnas"])
+                columnas = [nombre for nombre, _, _ in fijas]
+                flujo, delimitador = Flujo(lineas_ancho_fijo(fichero, fijas, opts["registro"])), ","
+            else:
+                # La cabecera da las columnas; el resto del fichero va tal cual a COPY
+                cabecera = fichero.readline()
+                columnas = [c.strip() for c in next(csv.reader(io.StringIO(cabecera), delimiter=opts["delimitador"]))]
+                flujo, delimitador = fichero, opts["delimitador"]
+
+            try:
+                resultado = importar(
+                    self.entidad, flujo, columnas, usuario, tenant,
+                    delimitador=delimitador,
+                    documentos=not opts["sin_documentos"],
+                    batch=opts["batch"],
+                )
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        self._informe(resultado, opts["sin_documentos"])
+
+    def _informe(self, r, sin_documentos):
+        fps = lambda n, s: n / s if s else 0  # noqa: E731
+        self.stdout.write(
+            f"{r.leidas} filas leídas: {r.insertadas} insertadas, "
+            f"{r.actualizadas} actualizadas, {r.ignoradas} ignoradas"
+        )
+        self.stdout.write(f"  COPY       {r.segundos_copy:>7.2f}s {fps(r.leidas, r.segundos_copy):>10.0f} filas/s")
+        self.stdout.write(f"  upsert     {r.segundos_upsert:>7.2f}s {fps(r.leidas, r.segundos_upsert):>10.0f} filas/s")
+        if not sin_documentos:
+            self.stdout.write(
+                f"  documentos {r.segundos_documentos:>7.2f}s "
+                f"{fps(r.insertadas + r.actualizadas, r.segundos_documentos):>10.0f} filas/s"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{IMPORTACIONES[self.entidad].model.__name__}: "
+            f"{fps(r.leidas, r.segundos):.0f} filas/s en total ({r.segundos:.2f}s)"
+        ))
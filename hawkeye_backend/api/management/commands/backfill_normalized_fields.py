@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Cliente
+from api.routers import bases_tenant
+
+
+CAMPOS_NORM = [
+    "telefono_norm",
+    "telefono_movil_norm",
+    "email_norm",
+    "email_secundario_norm",
+    "num_identificacion_norm",
+]
+
+
+class Command(BaseCommand):
+    help = "Rellena las columnas *_norm de Cliente (teléfonos, emails, documento)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        for alias in bases_tenant():
+            total = self._rellenar(alias, opts["batch"])
+            self.stdout.write(self.style.SUCCESS(f"[{alias}] {total} clientes actualizados"))
+
+    def _rellenar(self, alias, batch):
+        queryset = Cliente.objects.using(alias).only(
+            "id", "telefono", "telefono_movil", "email", "email_secundario", "num_identificacion",
+            *CAMPOS_NORM,
+        ).order_by("pk")
+
+        total = 0
+        lote = []
+        for cliente in queryset.iterator(chunk_size=batch):
+            antes = [getattr(cliente, campo) for campo in CAMPOS_NORM]
+            cliente.normalizar_identificadores()
+            if antes != [getattr(cliente, campo) for campo in CAMPOS_NORM]:
+                lote.append(cliente)
+
+            if len(lote) >= batch:
+                total += self._guardar(alias, lote)
+                lote = []
+        if lote:
+            total += self._guardar(alias, lote)
+        return total
+
+    def _guardar(self, alias, lote):
+        with transaction.atomic(using=alias):
+            Cliente.objects.using(alias).bulk_update(lote, CAMPOS_NORM)
+        self.stdout.write(f"  +{len(lote)}")
+        return len(lote)
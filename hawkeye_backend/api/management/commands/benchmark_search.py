@@ -0,0 +1,203 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import Franquicia, Oficina, Cliente, Edificio, Inmueble, Pedido, Actividad
+from api.search import AUTOCOMPLETAR, MOTORES, autocompletar
+
+
+NOMBRES = ["maria", "jose", "antonio", "carmen", "manuel", "laura", "david", "lucia", "javier", "marta", "jordi", "montse"]
+APELLIDOS = ["garcia", "martinez", "lopez", "sanchez", "perez", "gomez", "martin", "puig", "ferrer", "vidal", "soler", "roca"]
+CALLES = ["calle mayor", "gran via", "avinguda diagonal", "carrer de sants", "paseo de gracia", "rambla nova", "calle real", "plaza españa"]
+TEXTOS = [
+    "busca piso luminoso con terraza",
+    "cliente interesado en vender pronto",
+    "llamar despues de las cinco",
+    "visita realizada, le gusta la zona",
+    "quiere alquilar cerca del metro",
+    "herencia, varios propietarios",
+]
+
+# Reparto de filas sembradas entre entidades
+REPARTO = {
+    "clientes": 0.35,
+    "edificios": 0.05,
+    "inmuebles": 0.30,
+    "pedidos": 0.10,
+    "actividades": 0.20,
+}
+
+CONSULTAS_POR_DEFECTO = ["garcia", "mayor 12", "maria lopez", "terraza", "600", "gmail"]
+
+# Lo que se teclea letra a letra en SearchCliente.js / SearchInmueble.js
+PREFIJOS_AUTOCOMPLETAR = {
+    "cliente": ["m", "ma", "mar", "maria", "maria g", "jordi p", "xyzw"],
+    "inmueble": ["c", "ca", "calle m", "gran", "gran via 1", "rambla"],
+    "edificio": ["c", "carrer", "paseo de", "plaza"],
+}
+
+
+class Command(BaseCommand):
+    help = "Compara los motores de global_search (orm vs union) sobre un tenant de benchmark."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=0,
+                            help="Filas a sembrar en el tenant BENCH antes de medir (p. ej. 1000000).")
+        parser.add_argument("--batch", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--franquicia", default="BENCH", help="Código de la franquicia a medir.")
+        parser.add_argument("--engines", nargs="+", default=list(MOTORES))
+        parser.add_argument("--q", nargs="+", default=CONSULTAS_POR_DEFECTO)
+        parser.add_argument("--autocomplete", action="store_true",
+                            help="Mide también /api/autocomplete/ (p99 por tipo).")
+
+    def handle(self, *args, **opts):
+        franquicia, oficina = self._tenant(opts["franquicia"])
+
+        if opts["rows"]:
+            self._sembrar(franquicia, oficina, opts["rows"], opts["batch"])
+
+        for nombre in opts["engines"]:
+            if nombre not in MOTORES:
+                raise CommandError(f"Motor desconocido: {nombre}")
+
+        self.stdout.write(f"{'motor':<10} {'consultas':>9} {'media ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for nombre in opts["engines"]:
+            motor = MOTORES[nombre]
+            tiempos = []
+            num_queries = 0
+            for q in opts["q"]:
+                motor(q, franquicia.id, oficina.id)  # calentamiento
+                for _ in range(opts["repeat"]):
+                    with CaptureQueriesContext(connection) as ctx:
+                        t0 = time.perf_counter()
+                        motor(q, franquicia.id, oficina.id)
+                        tiempos.append((time.perf_counter() - t0) * 1000)
+                    num_queries = max(num_queries, len(ctx.captured_queries))
+
+            tiempos.sort()
+            p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+            self.stdout.write(
+                f"{nombre:<10} {num_queries:>9} {statistics.mean(tiempos):>9.2f} "
+                f"{statistics.median(tiempos):>8.2f} {p95:>8.2f}"
+            )
+
+        if opts["autocomplete"]:
+            self._autocompletar(franquicia, oficina, opts["repeat"])
+
+    def _autocompletar(self, franquicia, oficina, repeat):
+        self.stdout.write("")
+        self.stdout.write(f"{'autocomplete':<12} {'media ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for tipo in AUTOCOMPLETAR:
+            tiempos = []
+            for q in PREFIJOS_AUTOCOMPLETAR[tipo]:
+                autocompletar(tipo, q, franquicia.id, oficina.id)  # calentamiento
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    autocompletar(tipo, q, franquicia.id, oficina.id)
+                    tiempos.append((time.perf_counter() - t0) * 1000)
+
+            tiempos.sort()
+            p99 = tiempos[max(0, int(len(tiempos) * 0.99) - 1)]
+            self.stdout.write(
+                f"{tipo:<12} {statistics.mean(tiempos):>9.2f} "
+                f"{statistics.median(tiempos):>8.2f} {p99:>8.2f}"
+            )
+
+    # ==========================================================
+    # 🧪 TENANT + DATOS SINTÉTICOS
+    # ==========================================================
+    def _tenant(self, codigo):
+        franquicia, _ = Franquicia.objects.get_or_create(codigo=codigo, defaults={"nombre": f"Benchmark {codigo}"})
+        oficina, _ = Oficina.objects.get_or_create(
+            codigo=f"{codigo}-01",
+            defaults={"nombre": f"Benchmark {codigo}", "franquicia": franquicia},
+        )
+        return franquicia, oficina
+
+    def _sembrar(self, franquicia, oficina, total, batch):
+        rnd = random.Random(42)
+        tenant = {"franquicia": franquicia, "oficina": oficina}
+        cuantos = {k: max(1, int(total * v)) for k, v in REPARTO.items()}
+        ahora = timezone.now()
+
+        def en_lotes(model, n, fabrica):
+            creados = 0
+            while creados < n:
+                size = min(batch, n - creados)
+                with transaction.atomic():
+                    model.objects.bulk_create([fabrica(creados + k) for k in range(size)])
+                creados += size
+                self.stdout.write(f"  {model.__name__}: {creados}/{n}", ending="\r")
+            self.stdout.write("")
+
+        def cliente(n):
+            nombre, ap1, ap2 = rnd.choice(NOMBRES), rnd.choice(APELLIDOS), rnd.choice(APELLIDOS)
+            c = Cliente(
+                **tenant,
+                nombre=nombre, apellido1=ap1, apellido2=ap2,
+                nombre_apellido=f"{nombre} {ap1}",
+                nombre_apellidos_completo=f"{nombre} {ap1} {ap2}",
+                telefono_movil=f"6{rnd.randint(0, 99999999):08d}",
+                email=f"{nombre}.{ap1}{n}@{rnd.choice(['gmail.com', 'hotmail.com', 'yahoo.es'])}",
+            )
+            c.normalizar_identificadores()
+            return c
+
+        def edificio(n):
+            return Edificio(
+                **tenant,
+                calle=rnd.choice(CALLES),
+                numero_calle=str(rnd.randint(1, 200)),
+                codigo_postal=f"08{rnd.randint(0, 999):03d}",
+            )
+
+        en_lotes(Cliente, cuantos["clientes"], cliente)
+        en_lotes(Edificio, cuantos["edificios"], edificio)
+
+        edificios = list(Edificio.objects.filter(oficina=oficina).values_list("id", "calle", "numero_calle"))
+        clientes_ids = list(Cliente.objects.filter(oficina=oficina).values_list("id", flat=True)[:100000])
+        inicio_refs = Inmueble.objects.count()
+
+        def inmueble(n):
+            edificio_id, calle, numero = rnd.choice(edificios)
+            planta, puerta = str(rnd.randint(0, 8)), rnd.choice("ABCD")
+            return Inmueble(
+                **tenant,
+                edificio_id=edificio_id, planta=planta, puerta=puerta,
+                ref_catastral=f"BENCH{inicio_refs + n:014d}",
+                direccion_busqueda=f"{calle} {numero} {planta} {puerta}",
+            )
+
+        def pedido(n):
+            return Pedido(
+                **tenant,
+                cliente_id=rnd.choice(clientes_ids),
+                descripcion=rnd.choice(TEXTOS),
+                motivacion=rnd.choice(TEXTOS),
+                tipo_inmueble=rnd.choice(["piso", "casa", "local", "atico"]),
+            )
+
+        def actividad(n):
+            inicio = ahora - timedelta(days=rnd.randint(0, 1500), minutes=rnd.randint(0, 600))
+            return Actividad(
+                **tenant,
+                fecha_inicio=inicio,
+                fecha_fin=inicio + timedelta(minutes=30),
+                descripcion_publica=rnd.choice(TEXTOS),
+                descripcion_empleado=rnd.choice(TEXTOS),
+                cliente_id=rnd.choice(clientes_ids),
+            )
+
+        en_lotes(Inmueble, cuantos["inmuebles"], inmueble)
+        en_lotes(Pedido, cuantos["pedidos"], pedido)
+        en_lotes(Actividad, cuantos["actividades"], actividad)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE api_cliente, api_edificio, api_inmueble, api_pedido, api_actividad;")
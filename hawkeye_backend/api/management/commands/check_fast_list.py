@@ -0,0 +1,88 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.mixins import FastListMixin
+from api.renderers import ORJSONRenderer
+from api.urls import router
+
+
+# Variantes de query string a comprobar en cada ruta
+VARIANTES_POR_DEFECTO = ["", "page_size=200", "omit=id", "expand=cliente,propietario,edificio"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara byte a byte el listado normal (ModelSerializer + JSONRenderer) con el "
+        "rápido (values() + ORJSONRenderer) en las rutas con FastListMixin y mide "
+        "filas/s de cada camino. Falla si alguna respuesta difiere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="username con el que autenticar (por defecto, el primero).")
+        parser.add_argument("--query", nargs="+", default=VARIANTES_POR_DEFECTO)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **opts):
+        User = get_user_model()
+        user = User.objects.get(username=opts["user"]) if opts["user"] else User.objects.order_by("pk").first()
+        if user is None:
+            raise CommandError("No hay usuarios: crea uno para autenticar las peticiones.")
+
+        self.factory = APIRequestFactory()
+        self.user = user
+        errores = []
+
+        self.stdout.write(f"{'ruta':<14} {'query':<38} {'filas':>6} {'normal f/s':>11} {'rápido f/s':>11} {'x':>5}")
+        for prefijo, viewset, basename in router.registry:
+            if not issubclass(viewset, FastListMixin):
+                continue
+            vista = viewset.as_view({"get": "list"})
+
+            for query in opts["query"]:
+                with override_settings(HAWKEYE_FAST_LIST=False):
+                    normal, t_normal = self._medir(vista, prefijo, query, JSONRenderer(), opts["repeat"])
+                rapido, t_rapido = self._medir(vista, prefijo, query, ORJSONRenderer(), opts["repeat"])
+
+                cuerpo_normal, filas = normal
+                cuerpo_rapido, _ = rapido
+                if cuerpo_normal != cuerpo_rapido:
+                    errores.append(f"{prefijo}?{query}: {self._diferencia(cuerpo_normal, cuerpo_rapido)}")
+
+                fps = lambda t: filas / t if t else 0  # noqa: E731
+                self.stdout.write(
+                    f"{prefijo:<14} {query or '-':<38} {filas:>6} "
+                    f"{fps(t_normal):>11.0f} {fps(t_rapido):>11.0f} "
+                    f"{(t_normal / t_rapido if t_rapido else 0):>5.1f}"
+                )
+
+        if errores:
+            raise CommandError("Salida distinta entre caminos:\n  " + "\n  ".join(errores))
+        self.stdout.write(self.style.SUCCESS("Listado rápido idéntico al normal en todas las rutas."))
+
+    def _medir(self, vista, prefijo, query, renderer, repeat):
+        """(cuerpo, filas) de la última ejecución y mediana de segundos por petición."""
+        tiempos = []
+        for _ in range(repeat):
+            request = self.factory.get(f"/api/{prefijo}/?{query}")
+            force_authenticate(request, user=self.user)
+            t0 = time.perf_counter()
+            response = vista(request)
+            cuerpo = renderer.render(response.data)
+            tiempos.append(time.perf_counter() - t0)
+
+        datos = response.data
+        filas = len(datos["results"]) if isinstance(datos, dict) and "results" in datos else len(datos or [])
+        return (cuerpo, filas), statistics.median(tiempos)
+
+    @staticmethod
+    def _diferencia(a, b):
+        for i, (x, y) in enumerate(zip(a, b)):
+            if x != y:
+                return f"byte {i}: ...{a[max(0, i - 40):i + 40]!r} vs ...{b[max(0, i - 40):i + 40]!r}"
+        return f"longitudes {len(a)} vs {len(b)}"
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.urls import router
+
+
+# Consultas máximas por página de listado: principal + prefetches del plan.
+# No depende del tamaño de página; si crece con él, hay un N+1.
+PRESUPUESTO_POR_DEFECTO = 6
+
+
+class Command(BaseCommand):
+    help = (
+        "Llama al listado de las rutas del router con varios tamaños de página y "
+        "falla si alguna supera el presupuesto de consultas o si el número de "
+        "consultas cambia con el tamaño de página (N+1)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget", type=int, default=PRESUPUESTO_POR_DEFECTO)
+        parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50])
+        parser.add_argument("--user", help="username con el que autenticar (por defecto, el primero).")
+        parser.add_argument("--detail", action="store_true",
+                            help="Mide también el retrieve del primer objeto de cada ruta.")
+
+    def handle(self, *args, **opts):
+        User = get_user_model()
+        user = User.objects.get(username=opts["user"]) if opts["user"] else User.objects.order_by("pk").first()
+        if user is None:
+            raise CommandError("No hay usuarios: crea uno para autenticar las peticiones.")
+
+        factory = APIRequestFactory()
+        errores = []
+
+        self.stdout.write(f"{'ruta':<14} " + " ".join(f"{'n=' + str(n):>7}" for n in opts["sizes"]) + f" {'filas':>6}")
+        for prefijo, viewset, basename in router.registry:
+            vista = viewset.as_view({"get": "list"})
+            consultas, filas = [], 0
+
+            for size in opts["sizes"]:
+                request = factory.get(f"/api/{prefijo}/", {"page_size": size})
+                force_authenticate(request, user=user)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = vista(request)
+                    response.render()
+                if response.status_code != 200:
+                    errores.append(f"{prefijo}: HTTP {response.status_code}")
+                consultas.append(len(ctx.captured_queries))
+                filas = max(filas, len(response.data.get("results", [])) if isinstance(response.data, dict) else 0)
+
+            self.stdout.write(
+                f"{prefijo:<14} " + " ".join(f"{n:>7}" for n in consultas) + f" {filas:>6}"
+            )
+
+            if max(consultas) > opts["budget"]:
+                errores.append(f"{prefijo}: {max(consultas)} consultas > presupuesto {opts['budget']}")
+            if len(set(consultas)) > 1:
+                errores.append(f"{prefijo}: las consultas crecen con el tamaño de página {consultas}")
+            if filas < 2:
+                self.stdout.write(self.style.WARNING(f"  {prefijo}: menos de 2 filas, el control de N+1 no es concluyente"))
+
+            if opts["detail"]:
+                errores.extend(self._detalle(factory, user, prefijo, viewset, opts["budget"]))
+
+        if errores:
+            raise CommandError("Presupuesto de consultas superado:\n  " + "\n  ".join(errores))
+
+        self.stdout.write(self.style.SUCCESS("Todas las rutas dentro del presupuesto."))
+
+    def _detalle(self, factory, user, prefijo, viewset, budget):
+        objeto = viewset.queryset.model._default_manager.order_by("pk").first()
+        if objeto is None:
+            return []
+
+        request = factory.get(f"/api/{prefijo}/{objeto.pk}/")
+        force_authenticate(request, user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = viewset.as_view({"get": "retrieve"})(request, pk=objeto.pk)
+            response.render()
+
+        n = len(ctx.captured_queries)
+        self.stdout.write(f"  {prefijo} detalle: {n} consultas")
+        # El detalle de Cliente anida ~15 relaciones: presupuesto propio, más holgado
+        if n > budget * 4:
+            return [f"{prefijo} detalle: {n} consultas > {budget * 4}"]
+        return []
@@ -0,0 +1,81 @@
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import routers
+from api.models import Cliente, Franquicia, Oficina, SearchDocument
+from api.search import buscar
+
+
+class _Deshacer(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Comprueba el reparto de franquicias entre bases (api/routers.py): por cada alias "
+        "de DATABASES crea una franquicia de prueba, escribe un cliente por el router y "
+        "verifica dónde acaba, su SearchDocument, para_usuario y global_search. Todo se "
+        "deshace al final. Falla si algo se lee o escribe en otra base."
+    )
+
+    def handle(self, *args, **opts):
+        errores = []
+        try:
+            with ExitStack() as pila:
+                for alias in routers.bases():
+                    pila.enter_context(transaction.atomic(using=alias))
+                for alias in routers.bases():
+                    errores += self._comprobar(alias)
+                raise _Deshacer()
+        except _Deshacer:
+            pass
+        finally:
+            routers.olvidar_franquicias()
+
+        if errores:
+            for error in errores:
+                self.stderr.write(f"  ✗ {error}")
+            raise CommandError(f"{len(errores)} comprobaciones fallidas")
+        self.stdout.write(self.style.SUCCESS(f"Reparto correcto en {len(routers.bases())} bases"))
+
+    def _comprobar(self, alias):
+        errores = []
+        codigo = f"check-{alias}"
+
+        # Globales en default; la señal las replica en las demás bases
+        franquicia = Franquicia.objects.create(nombre=codigo, codigo=codigo, base_datos=alias)
+        oficina = Oficina.objects.create(franquicia=franquicia, nombre=codigo, codigo=codigo)
+        user = get_user_model().objects.create(username=codigo, franquicia=franquicia, oficina=oficina)
+        routers.olvidar_franquicias()
+
+        if routers.alias_franquicia(franquicia.pk) != alias:
+            errores.append(f"{codigo}: el router no la asigna a {alias}")
+
+        routers.fijar_usuario(user)
+        try:
+            cliente = Cliente.objects.create(
+                franquicia=franquicia, oficina=oficina, nombre="Comprobacion", apellido1=alias,
+            )
+        finally:
+            routers.limpiar()
+
+        for otra in routers.bases():
+            esta = Cliente.objects.using(otra).filter(pk=cliente.pk, franquicia=franquicia).exists()
+            if esta != (otra == alias):
+                errores.append(f"{codigo}: cliente {'presente' if esta else 'ausente'} en {otra}")
+
+        if not SearchDocument.objects.using(alias).filter(tipo="cliente", objeto_id=cliente.pk).exists():
+            errores.append(f"{codigo}: sin SearchDocument en {alias}")
+
+        if not Cliente.objects.para_usuario(user).filter(pk=cliente.pk).exists():
+            errores.append(f"{codigo}: para_usuario no ve el cliente")
+
+        encontrados = buscar("comprobacion", franquicia.pk, oficina.pk)
+        if not any(r.get("id") == cliente.pk for r in encontrados.get("clientes", [])):
+            errores.append(f"{codigo}: global_search no encuentra el cliente")
+
+        self.stdout.write(f"  {alias}: {'ok' if not errores else f'{len(errores)} fallos'}")
+        return errores
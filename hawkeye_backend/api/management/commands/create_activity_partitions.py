@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from api import particiones
+from api.routers import bases_tenant
+
+
+def _mes(valor):
+    try:
+        anio, mes = valor.split("-")
+        return date(int(anio), int(mes), 1)
+    except ValueError:
+        raise CommandError(f"Mes no válido: {valor} (usa AAAA-MM)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea por adelantado las particiones mensuales de api_actividad (las filas "
+        "de esos meses que hubiera en el default se mueven a su partición). Con "
+        "--desanclar-antes, desancla los meses anteriores para archivarlos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--meses", type=int, default=settings.HAWKEYE_ACTIVIDAD_PARTICIONES_FUTURAS)
+        parser.add_argument(
+            "--desanclar-antes", metavar="AAAA-MM",
+            help="DETACH de las particiones anteriores a ese mes; quedan como tablas sueltas",
+        )
+
+    def handle(self, *args, **opts):
+        limite = _mes(opts["desanclar_antes"]) if opts["desanclar_antes"] else None
+        for alias in bases_tenant():
+            creadas, desancladas = self._mantener(alias, opts["meses"], limite)
+            self.stdout.write(self.style.SUCCESS(
+                f"[{alias}] {creadas} particiones creadas, {desancladas} desancladas"
+            ))
+
+    def _mantener(self, alias, meses, limite):
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            if not particiones.es_particionada(cursor):
+                raise CommandError(f"[{alias}] api_actividad no está particionada (migración 0020 sin aplicar)")
+
+            creadas = particiones.crear_futuras(cursor, meses)
+            for mes, movidas in creadas.items():
+                self.stdout.write(f"  {particiones.nombre_particion(mes)}: creada ({movidas} filas desde el default)")
+
+            desancladas = []
+            if limite:
+                for mes in particiones.particiones(cursor):
+                    if mes < limite:
+                        particiones.desanclar(cursor, mes)
+                        desancladas.append(particiones.nombre_particion(mes))
+                for nombre in desancladas:
+                    self.stdout.write(f"  {nombre}: desanclada")
+
+        return len(creadas), len(desancladas)
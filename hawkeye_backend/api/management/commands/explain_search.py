@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import Franquicia, Oficina
+from api.search import sql_trgm, params_trgm, preparar_umbrales_trgm
+
+
+# Tablas que nunca deben leerse con Seq Scan en el motor trgm
+TABLAS_VIGILADAS = {
+    "clientes": "api_cliente",
+    "inmuebles": "api_inmueble",
+    "edificios": "api_edificio",
+}
+
+
+def nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN sobre las ramas del motor trgm de global_search y "
+        "falla si Cliente/Inmueble/Edificio se leen con Seq Scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--q", nargs="+", default=["garcia", "mayor 12", "maria lopez"])
+        parser.add_argument("--franquicia", help="Código de franquicia (por defecto, la primera).")
+        parser.add_argument("--oficina", help="Código de oficina (opcional).")
+        parser.add_argument(
+            "--force-index",
+            action="store_true",
+            help="Desactiva enable_seqscan: útil en BDs de desarrollo casi vacías, "
+                 "donde el planner prefiere Seq Scan aunque el índice sea utilizable.",
+        )
+
+    def handle(self, *args, **opts):
+        franquicia = (
+            Franquicia.objects.get(codigo=opts["franquicia"]) if opts["franquicia"]
+            else Franquicia.objects.first()
+        )
+        if franquicia is None:
+            raise CommandError("No hay franquicias en la base de datos.")
+
+        oficina_id = None
+        if opts["oficina"]:
+            oficina_id = Oficina.objects.get(codigo=opts["oficina"]).id
+
+        errores = []
+        for q in opts["q"]:
+            for grupo, tabla in TABLAS_VIGILADAS.items():
+                plan = self._explain(grupo, q, franquicia.id, oficina_id, opts["force_index"])
+                escaneos = [
+                    n for n in nodos(plan)
+                    if n.get("Node Type") == "Seq Scan" and n.get("Relation Name") == tabla
+                ]
+                indices = sorted({n["Index Name"] for n in nodos(plan) if "Index Name" in n})
+
+                estado = "SEQ SCAN" if escaneos else "ok"
+                self.stdout.write(f"{q!r:<16} {grupo:<10} {estado:<9} {', '.join(indices) or '-'}")
+                if escaneos:
+                    errores.append(f"{grupo} ({q!r})")
+
+        if errores:
+            raise CommandError("Seq Scan detectado en: " + "; ".join(errores))
+
+        self.stdout.write(self.style.SUCCESS("Sin Seq Scan en Cliente/Inmueble/Edificio."))
+
+    def _explain(self, grupo, q, franquicia_id, oficina_id, force_index):
+        with transaction.atomic(), connection.cursor() as cursor:
+            preparar_umbrales_trgm(cursor)
+            if force_index:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(
+                "EXPLAIN (FORMAT JSON) " + sql_trgm(oficina_id, [grupo]),
+                params_trgm(q, franquicia_id, oficina_id),
+            )
+            resultado = cursor.fetchone()[0]
+
+        if isinstance(resultado, str):
+            resultado = json.loads(resultado)
+        return resultado[0]["Plan"]
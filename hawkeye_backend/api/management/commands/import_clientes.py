@@ -0,0 +1,6 @@
+from ._importar import ComandoImportar
+
+
+class Command(ComandoImportar):
+    help = "Importa clientes (hojas de leads) con COPY + upsert por num_identificacion."
+    entidad = "cliente"
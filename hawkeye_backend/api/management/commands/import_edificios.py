@@ -0,0 +1,6 @@
+from ._importar import ComandoImportar
+
+
+class Command(ComandoImportar):
+    help = "Importa edificios (p. ej. parcelas de Catastro) con COPY + upsert por ref_catastral."
+    entidad = "edificio"
@@ -0,0 +1,6 @@
+from ._importar import ComandoImportar
+
+
+class Command(ComandoImportar):
+    help = "Importa inmuebles con COPY + upsert por ref_catastral; el edificio se resuelve por los 14 primeros caracteres de la referencia."
+    entidad = "inmueble"
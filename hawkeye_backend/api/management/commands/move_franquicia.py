@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Franquicia
+from api.mover import IdsEnConflicto, limpiar_origen, mover
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve en línea las filas de una franquicia a otra base de datos (api/mover.py): "
+        "copia completa, pasadas de puesta al día y un corte de unos segundos sin "
+        "escrituras. Con --limpiar-origen, borra lo que quedó en la base anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("codigo", help="Código de la franquicia")
+        parser.add_argument("destino", nargs="?", help="Alias de settings.DATABASES")
+        parser.add_argument("--pasadas", type=int, default=5, help="Máximo de pasadas de puesta al día")
+        parser.add_argument("--umbral", type=int, default=500, help="Filas pendientes con las que ya se corta")
+        parser.add_argument("--limpiar-origen", metavar="ALIAS", help="Borra la franquicia de ALIAS en vez de moverla")
+
+    def handle(self, *args, **opts):
+        try:
+            franquicia = Franquicia.objects.get(codigo=opts["codigo"])
+        except Franquicia.DoesNotExist:
+            raise CommandError(f"No existe la franquicia {opts['codigo']}")
+
+        try:
+            if opts["limpiar_origen"]:
+                for tabla, n in limpiar_origen(franquicia, opts["limpiar_origen"]).items():
+                    self.stdout.write(f"  {tabla}: {n} filas borradas")
+                self.stdout.write(self.style.SUCCESS(f"{franquicia.codigo} borrada de {opts['limpiar_origen']}"))
+                return
+
+            if not opts["destino"]:
+                raise CommandError("Indica la base de destino")
+            origen = mover(
+                franquicia, opts["destino"], pasadas=opts["pasadas"], umbral=opts["umbral"], log=self.stdout.write,
+            )
+        except (ValueError, IdsEnConflicto) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{franquicia.codigo} ya trabaja contra {opts['destino']}. Cuando pasen "
+            f"HAWKEYE_BASES_TTL segundos: move_franquicia {franquicia.codigo} --limpiar-origen {origen}"
+        ))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Eliminacion
+from api.routers import bases_tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los tombstones de /sync/ más antiguos que la retención. Los clientes "
+        "con un token anterior reciben un volcado completo en su siguiente sincronización."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=settings.HAWKEYE_SYNC_RETENCION_DIAS)
+
+    def handle(self, *args, **opts):
+        limite = timezone.now() - timedelta(days=opts["dias"])
+        for alias in bases_tenant():
+            borrados, _ = Eliminacion.objects.using(alias).filter(fecha__lt=limite).delete()
+            self.stdout.write(self.style.SUCCESS(f"[{alias}] {borrados} tombstones anteriores a {limite:%Y-%m-%d} borrados"))
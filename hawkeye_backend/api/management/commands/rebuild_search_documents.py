@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.documents import CONSTRUCTORES, reconstruir
+from api.routers import bases_tenant
+
+
+class Command(BaseCommand):
+    help = "Reconstruye en bloque la tabla SearchDocument a partir de las tablas origen."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tipo",
+            nargs="+",
+            choices=[tipo for tipo, _, _ in CONSTRUCTORES.values()],
+            help="Solo estos tipos (por defecto, todos).",
+        )
+        parser.add_argument("--batch", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        for alias in bases_tenant():
+            for modelo, (tipo, _, _) in CONSTRUCTORES.items():
+                if opts["tipo"] and tipo not in opts["tipo"]:
+                    continue
+
+                t0 = time.perf_counter()
+                total = reconstruir(modelo, batch=opts["batch"], log=self.stdout.write, using=alias)
+                segundos = time.perf_counter() - t0
+                self.stdout.write(self.style.SUCCESS(
+                    f"[{alias}] {tipo}: {total} documentos en {segundos:.1f}s"
+                ))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.contacto import recalcular_contactos
+from api.routers import bases_tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula fecha_ultimo_contacto de clientes, inmuebles y pedidos desde "
+        "api_actividad (un UPDATE agrupado por tabla). Solo escribe las filas que cambian."
+    )
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        for alias in bases_tenant():
+            with transaction.atomic(using=alias):
+                cambios = recalcular_contactos(using=alias)
+            for modelo, n in cambios.items():
+                self.stdout.write(f"  [{alias}] {modelo}: {n} filas actualizadas")
+        self.stdout.write(self.style.SUCCESS(f"Fechas de último contacto recalculadas en {time.perf_counter() - t0:.1f}s"))
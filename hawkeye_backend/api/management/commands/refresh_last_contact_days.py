@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.contacto import refrescar_dias
+from api.routers import bases_tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Job nocturno: pone dias_ultimo_contacto de clientes e inmuebles al día a partir "
+        "de fecha_ultimo_contacto (un UPDATE por tabla, solo filas que cambian)."
+    )
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        for alias in bases_tenant():
+            with transaction.atomic(using=alias):
+                cambios = refrescar_dias(using=alias)
+            for modelo, n in cambios.items():
+                self.stdout.write(f"  [{alias}] {modelo}: {n} filas actualizadas")
+        self.stdout.write(self.style.SUCCESS(f"dias_ultimo_contacto al día en {time.perf_counter() - t0:.1f}s"))
@@ -0,0 +1,86 @@
+# ============================================================
+# HAWKEYE — CONTADORES EN MEMORIA
+# ============================================================
+#
+# Contadores por proceso (cada worker de gunicorn/uwsgi lleva los suyos).
+# Suficiente para ver el reparto de tráfico y latencias sin servicios
+# externos; se consultan con /search/stats/.
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Contadores:
+    """Número de llamadas y latencia (total / máxima) por clave."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos = {}
+
+    def registrar(self, clave, ms):
+        with self._lock:
+            d = self._datos.setdefault(clave, {"llamadas": 0, "total_ms": 0.0, "max_ms": 0.0})
+            d["llamadas"] += 1
+            d["total_ms"] += ms
+            d["max_ms"] = max(d["max_ms"], ms)
+
+    @contextmanager
+    def medir(self, clave):
+        """Mide el bloque; `clave` puede cambiarse dentro con medicion["clave"]."""
+        medicion = {"clave": clave}
+        t0 = time.perf_counter()
+        try:
+            yield medicion
+        finally:
+            self.registrar(medicion["clave"], (time.perf_counter() - t0) * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                clave: {
+                    "llamadas": d["llamadas"],
+                    "media_ms": round(d["total_ms"] / d["llamadas"], 3),
+                    "max_ms": round(d["max_ms"], 3),
+                }
+                for clave, d in self._datos.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._datos.clear()
+
+
+# Rutas de global_search (ver api/search.py → buscar)
+rutas_busqueda = Contadores()
+
+
+class TasaAciertos:
+    """Aciertos / fallos por espacio de nombres (caché de búsqueda)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos = {}
+
+    def registrar(self, clave, acierto):
+        with self._lock:
+            d = self._datos.setdefault(clave, {"aciertos": 0, "fallos": 0})
+            d["aciertos" if acierto else "fallos"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                clave: {
+                    **d,
+                    "tasa_aciertos": round(d["aciertos"] / ((d["aciertos"] + d["fallos"]) or 1), 3),
+                }
+                for clave, d in self._datos.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._datos.clear()
+
+
+# Caché de resultados de búsqueda (ver api/search_cache.py)
+cache_busqueda = TasaAciertos()
@@ -1,6 +1,19 @@
 from django.utils.deprecation import MiddlewareMixin
 
+from . import routers
+
 class DisableCSRFOnAPI(MiddlewareMixin):
     def process_request(self, request):
         if request.path.startswith('/api/'):
             setattr(request, '_dont_enforce_csrf_checks', True)
+
+
+class TenantDatabaseMiddleware(MiddlewareMixin):
+    """Cada petición empieza y acaba sin base de tenant: nada se hereda de la anterior del mismo hilo."""
+
+    def process_request(self, request):
+        routers.limpiar()
+
+    def process_response(self, request, response):
+        routers.limpiar()
+        return response
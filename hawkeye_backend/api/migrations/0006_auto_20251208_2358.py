@@ -1,6 +1,5 @@
 # Generated by Django 4.2.13 on 2025-12-08 22:58
 from django.db import migrations, models
-import django
 
 
 class Migration(migrations.Migration):
@@ -10,10 +9,12 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.AddField(
+        # 0003 ya añade cliente.creado_en: volver a añadirla rompe `migrate`
+        # en una base nueva (DuplicateColumn). Se deja como AlterField al
+        # mismo estado, que no ejecuta SQL.
+        migrations.AlterField(
             model_name='cliente',
             name='creado_en',
-            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
-            preserve_default=False,
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
         ),
     ]
@@ -0,0 +1,96 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_alter_actividad_tipo'),
+    ]
+
+    operations = [
+
+        # -----------------------------------------------------
+        # 1️⃣ btree_gist → permite GiST multicolumna (tenant + trgm)
+        # -----------------------------------------------------
+        migrations.RunSQL(
+            sql="CREATE EXTENSION IF NOT EXISTS btree_gist;",
+            reverse_sql="DROP EXTENSION IF EXISTS btree_gist;"
+        ),
+
+        # -----------------------------------------------------
+        # 2️⃣ GiST KNN — CLIENTE / INMUEBLE / EDIFICIO
+        # Las expresiones deben coincidir con RAMAS_TRGM (api/search.py)
+        # -----------------------------------------------------
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_cliente_busqueda_gist
+            ON api_cliente
+            USING gist (
+                franquicia_id,
+                oficina_id,
+                (nombre_apellidos_completo || ' ' || COALESCE(email, '')) gist_trgm_ops
+            );
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_cliente_busqueda_gist;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_inmueble_busqueda_gist
+            ON api_inmueble
+            USING gist (
+                franquicia_id,
+                oficina_id,
+                (direccion_busqueda || ' ' || COALESCE(ref_catastral, '')) gist_trgm_ops
+            );
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_inmueble_busqueda_gist;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_edif_busqueda_gist
+            ON api_edificio
+            USING gist (
+                franquicia_id,
+                oficina_id,
+                (calle || ' ' || numero_calle) gist_trgm_ops
+            );
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_edif_busqueda_gist;"
+        ),
+
+        # -----------------------------------------------------
+        # 3️⃣ GIN trgm — PEDIDO / ACTIVIDAD (texto largo, sin KNN)
+        # -----------------------------------------------------
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_pedido_busqueda_trgm
+            ON api_pedido
+            USING gin (
+                (
+                    COALESCE(descripcion, '') || ' ' ||
+                    COALESCE(motivacion, '') || ' ' ||
+                    COALESCE(tipo_inmueble, '')
+                ) gin_trgm_ops
+            );
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_pedido_busqueda_trgm;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_act_busqueda_trgm
+            ON api_actividad
+            USING gin (
+                (
+                    COALESCE(descripcion_publica, '') || ' ' ||
+                    COALESCE(descripcion_empleado, '')
+                ) gin_trgm_ops
+            );
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_act_busqueda_trgm;"
+        ),
+    ]
@@ -0,0 +1,62 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_trgm_gist_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('cliente', 'Cliente'), ('inmueble', 'Inmueble'), ('edificio', 'Edificio'), ('pedido', 'Pedido'), ('actividad', 'Actividad')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('texto', models.TextField(blank=True, default='')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('datos', models.JSONField(blank=True, default=dict)),
+                ('fecha', models.DateTimeField(blank=True, null=True)),
+                ('fecha_ultima_modificacion', models.DateTimeField(auto_now=True)),
+                ('franquicia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documentos_busqueda', to='api.franquicia')),
+                ('oficina', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documentos_busqueda', to='api.oficina')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['franquicia', 'oficina', 'tipo'], name='idx_searchdoc_tenant'),
+                    django.contrib.postgres.indexes.GinIndex(fields=['vector'], name='idx_searchdoc_vector'),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='searchdoc_tipo_objeto_unico'),
+        ),
+
+        # -----------------------------------------------------
+        # tsvector mantenido por trigger (sirve también para bulk_create)
+        # -----------------------------------------------------
+        migrations.RunSQL(
+            sql="""
+            CREATE TRIGGER searchdocument_vector_trigger
+            BEFORE INSERT OR UPDATE OF texto ON api_searchdocument
+            FOR EACH ROW EXECUTE FUNCTION
+            tsvector_update_trigger(vector, 'pg_catalog.simple', texto);
+            """,
+            reverse_sql="DROP TRIGGER IF EXISTS searchdocument_vector_trigger ON api_searchdocument;"
+        ),
+
+        # TRGM para tolerancia a errores tipográficos
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_searchdoc_texto_trgm
+            ON api_searchdocument
+            USING gin (texto gin_trgm_ops);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_searchdoc_texto_trgm;"
+        ),
+    ]
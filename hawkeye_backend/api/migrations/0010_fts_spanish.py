@@ -0,0 +1,85 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_searchdocument'),
+    ]
+
+    operations = [
+
+        # -----------------------------------------------------
+        # 1️⃣ unaccent + configuración "spanish_unaccent"
+        # -----------------------------------------------------
+        migrations.RunSQL(
+            sql="CREATE EXTENSION IF NOT EXISTS unaccent;",
+            reverse_sql="DROP EXTENSION IF EXISTS unaccent;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'spanish_unaccent') THEN
+                    CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+                    ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+                        ALTER MAPPING FOR hword, hword_part, word
+                        WITH unaccent, spanish_stem;
+                END IF;
+            END
+            $$;
+            """,
+            reverse_sql="DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent;"
+        ),
+
+        # -----------------------------------------------------
+        # 2️⃣ tsvector STORED — PEDIDO / ACTIVIDAD
+        # Columnas generadas: no están en el modelo, Django nunca las lee
+        # ni las escribe. Se consultan desde api/search.py (vector_fts).
+        # -----------------------------------------------------
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE api_pedido
+            ADD COLUMN IF NOT EXISTS busqueda_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('spanish_unaccent'::regconfig, COALESCE(descripcion, '')), 'A') ||
+                setweight(to_tsvector('spanish_unaccent'::regconfig, COALESCE(motivacion, '')), 'B')
+            ) STORED;
+            """,
+            reverse_sql="ALTER TABLE api_pedido DROP COLUMN IF EXISTS busqueda_vector;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE api_actividad
+            ADD COLUMN IF NOT EXISTS busqueda_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('spanish_unaccent'::regconfig, COALESCE(descripcion_publica, '')), 'A') ||
+                setweight(to_tsvector('spanish_unaccent'::regconfig, COALESCE(descripcion_empleado, '')), 'B')
+            ) STORED;
+            """,
+            reverse_sql="ALTER TABLE api_actividad DROP COLUMN IF EXISTS busqueda_vector;"
+        ),
+
+        # -----------------------------------------------------
+        # 3️⃣ GIN sobre los tsvector
+        # -----------------------------------------------------
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_pedido_fts
+            ON api_pedido
+            USING gin (busqueda_vector);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_pedido_fts;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_act_fts
+            ON api_actividad
+            USING gin (busqueda_vector);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_act_fts;"
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_fts_spanish'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='telefono_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='telefono_movil_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='email_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='email_secundario_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='num_identificacion_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['telefono_norm'], name='idx_cliente_tel_norm'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['telefono_movil_norm'], name='idx_cliente_movil_norm'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['email_norm'], name='idx_cliente_email_norm'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['email_secundario_norm'], name='idx_cliente_email2_norm'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['num_identificacion_norm'], name='idx_cliente_doc_norm'),
+        ),
+
+        # -----------------------------------------------------
+        # Sufijo de teléfono: reverse(col) LIKE '33221%'
+        # -----------------------------------------------------
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_cliente_movil_sufijo
+            ON api_cliente (reverse(telefono_movil_norm) text_pattern_ops);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_cliente_movil_sufijo;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_cliente_tel_sufijo
+            ON api_cliente (reverse(telefono_norm) text_pattern_ops);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_cliente_tel_sufijo;"
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_cliente_normalized_fields'),
+    ]
+
+    operations = [
+
+        # -----------------------------------------------------
+        # ⌨️ AUTOCOMPLETAR — prefijo (LIKE 'abc%') por tenant
+        # Las columnas deben coincidir con AUTOCOMPLETAR (api/search.py).
+        # text_pattern_ops → LIKE con prefijo y ORDER BY ... USING ~<~
+        # usan el índice sea cual sea la collation de la BD.
+        # -----------------------------------------------------
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_cliente_nombre_prefijo
+            ON api_cliente (franquicia_id, nombre_apellido text_pattern_ops);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_cliente_nombre_prefijo;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_inmueble_dir_prefijo
+            ON api_inmueble (franquicia_id, direccion_busqueda text_pattern_ops);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_inmueble_dir_prefijo;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_edif_calle_prefijo
+            ON api_edificio (franquicia_id, lower(calle) text_pattern_ops);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_edif_calle_prefijo;"
+        ),
+    ]
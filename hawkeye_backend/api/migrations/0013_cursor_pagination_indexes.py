@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-fecha_ultima_modificacion', 'id'], name='idx_cliente_cursor'),
+        ),
+        migrations.AddIndex(
+            model_name='edificio',
+            index=models.Index(fields=['-fecha_ultima_modificacion', 'id'], name='idx_edif_cursor'),
+        ),
+        migrations.AddIndex(
+            model_name='inmueble',
+            index=models.Index(fields=['-fecha_ultima_modificacion', 'edificio', 'planta', 'puerta', 'id'], name='idx_inm_cursor'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['-fecha_ultima_modificacion', '-fecha', '-prioridad', 'id'], name='idx_pedido_cursor'),
+        ),
+        migrations.AddIndex(
+            model_name='actividad',
+            index=models.Index(fields=['-fecha_inicio', '-fecha_ultima_modificacion', 'id'], name='idx_act_cursor'),
+        ),
+    ]
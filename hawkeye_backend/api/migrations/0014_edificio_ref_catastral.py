@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='edificio',
+            name='ref_catastral',
+            field=models.CharField(blank=True, max_length=14, null=True, unique=True),
+        ),
+    ]
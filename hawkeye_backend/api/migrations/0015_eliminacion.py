@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_edificio_ref_catastral'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Eliminacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('cliente', 'Cliente'), ('inmueble', 'Inmueble'), ('edificio', 'Edificio'), ('pedido', 'Pedido'), ('actividad', 'Actividad')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('franquicia_id', models.BigIntegerField()),
+                ('oficina_id', models.BigIntegerField()),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['franquicia_id', 'fecha', 'id'], name='idx_eliminacion_sync')],
+            },
+        ),
+    ]
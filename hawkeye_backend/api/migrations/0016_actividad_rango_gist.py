@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_eliminacion'),
+    ]
+
+    operations = [
+
+        # -----------------------------------------------------
+        # 📅 CALENDARIO — solape de rangos por oficina / usuario
+        # La expresión debe coincidir con RangoActividad (api/calendario.py).
+        # btree_gist (migración 0008) permite la columna escalar delante.
+        # -----------------------------------------------------
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_act_oficina_rango
+            ON api_actividad USING gist (oficina_id, tstzrange(fecha_inicio, fecha_fin));
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_act_oficina_rango;"
+        ),
+
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS idx_act_user_rango
+            ON api_actividad USING gist (creado_por_id, tstzrange(fecha_inicio, fecha_fin));
+            """,
+            reverse_sql="DROP INDEX IF EXISTS idx_act_user_rango;"
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_actividad_rango_gist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='fecha_ultimo_contacto',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='fecha_ultimo_contacto',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_fecha_ultimo_contacto'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['franquicia', 'oficina', 'fecha_ultimo_contacto', 'id'], name='idx_cliente_contacto'),
+        ),
+        migrations.AddIndex(
+            model_name='inmueble',
+            index=models.Index(fields=['franquicia', 'oficina', 'fecha_ultimo_contacto', 'id'], name='idx_inm_contacto'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['franquicia', 'oficina', 'fecha_ultimo_contacto', 'id'], name='idx_pedido_contacto'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_ultimo_contacto_indexes'),
+    ]
+
+    operations = [
+        # (franquicia, oficina) a secas → tenant + Meta.ordering + id
+        migrations.RemoveIndex(model_name='cliente', name='idx_cliente_tenant'),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['franquicia', 'oficina', '-fecha_ultima_modificacion', 'id'], name='idx_cliente_tenant_orden'),
+        ),
+        migrations.RemoveIndex(model_name='edificio', name='idx_edif_tenant'),
+        migrations.AddIndex(
+            model_name='edificio',
+            index=models.Index(fields=['franquicia', 'oficina', '-fecha_ultima_modificacion', 'id'], name='idx_edif_tenant_orden'),
+        ),
+        migrations.RemoveIndex(model_name='inmueble', name='idx_inm_tenant'),
+        migrations.AddIndex(
+            model_name='inmueble',
+            index=models.Index(fields=['franquicia', 'oficina', '-fecha_ultima_modificacion', 'edificio', 'planta', 'puerta', 'id'], name='idx_inm_tenant_orden'),
+        ),
+        migrations.RemoveIndex(model_name='pedido', name='idx_pedido_tenant'),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['franquicia', 'oficina', '-fecha_ultima_modificacion', '-fecha', '-prioridad', 'id'], name='idx_pedido_tenant_orden'),
+        ),
+        migrations.RemoveIndex(model_name='actividad', name='idx_act_tenant'),
+        migrations.AddIndex(
+            model_name='actividad',
+            index=models.Index(fields=['franquicia', 'oficina', '-fecha_inicio', '-fecha_ultima_modificacion', 'id'], name='idx_act_tenant_orden'),
+        ),
+    ]
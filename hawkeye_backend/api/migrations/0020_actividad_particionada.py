@@ -0,0 +1,60 @@
+import datetime
+
+from django.db import migrations, models
+
+from api import particiones
+
+
+def particionar(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        particiones.particionar(cursor)
+
+
+def desparticionar(apps, schema_editor):
+    # FKs de las tablas intermedias de los M2M hacia Actividad
+    actividad = apps.get_model('api', 'Actividad')
+    referencias = [
+        (rel.related_model._meta.db_table, rel.field.column)
+        for rel in actividad._meta.get_fields(include_hidden=True)
+        if rel.auto_created and not rel.concrete and rel.one_to_many and rel.field.db_constraint
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        particiones.desparticionar(cursor, referencias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_tenant_orden_indexes'),
+    ]
+
+    operations = [
+
+        # -----------------------------------------------------
+        # 1️⃣ Duración máxima (DURACION_MAXIMA_ACTIVIDAD): las actividades
+        # más largas se recortan, igual que hace Actividad.corregir_fechas
+        # -----------------------------------------------------
+        migrations.RunSQL(
+            sql="""
+            UPDATE api_actividad
+            SET fecha_fin = fecha_inicio + interval '31 days'
+            WHERE fecha_fin > fecha_inicio + interval '31 days';
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='actividad',
+            constraint=models.CheckConstraint(
+                check=models.Q(fecha_fin__lte=models.F('fecha_inicio') + datetime.timedelta(days=31)),
+                name='actividad_duracion_maxima',
+            ),
+        ),
+
+        # -----------------------------------------------------
+        # 2️⃣ api_actividad → particionada por mes de fecha_inicio
+        # Copia la tabla y conserva índices, CHECKs y FKs (api/particiones.py).
+        # Las FKs de los M2M hacia api_actividad(id) no caben: se eliminan.
+        # Bloquea api_actividad mientras dura: ventana de mantenimiento.
+        # -----------------------------------------------------
+        migrations.RunPython(particionar, desparticionar),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_actividad_particionada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='franquicia',
+            name='base_datos',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='franquicia',
+            name='en_movimiento',
+            field=models.BooleanField(default=False),
+        ),
+    ]
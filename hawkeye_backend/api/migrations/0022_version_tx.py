@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# Tablas que recorre /sync/ (api/sync.py) → nombre corto para el índice
+TABLAS = {
+    "api_cliente": "cliente",
+    "api_inmueble": "inm",
+    "api_edificio": "edif",
+    "api_pedido": "pedido",
+    "api_actividad": "act",
+    "api_eliminacion": "eliminacion",
+}
+
+
+def _sql():
+    sentencias = [
+        """
+        CREATE OR REPLACE FUNCTION hawkeye_version_tx() RETURNS trigger AS $$
+        BEGIN
+            NEW.version_tx := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+    ]
+    for tabla, corto in TABLAS.items():
+        sentencias += [
+            f"ALTER TABLE {tabla} ADD COLUMN version_tx bigint NOT NULL DEFAULT 0;",
+            f"""
+            CREATE TRIGGER {tabla}_version_tx
+            BEFORE INSERT OR UPDATE ON {tabla}
+            FOR EACH ROW EXECUTE FUNCTION hawkeye_version_tx();
+            """,
+            f"CREATE INDEX idx_{corto}_version_tx ON {tabla} (franquicia_id, version_tx, id);",
+        ]
+    return sentencias
+
+
+def _reverse_sql():
+    sentencias = [
+        f"DROP TRIGGER IF EXISTS {tabla}_version_tx ON {tabla}; ALTER TABLE {tabla} DROP COLUMN IF EXISTS version_tx;"
+        for tabla in TABLAS
+    ]
+    return sentencias + ["DROP FUNCTION IF EXISTS hawkeye_version_tx();"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_franquicia_base_datos'),
+    ]
+
+    operations = [
+
+        # -----------------------------------------------------
+        # version_tx = txid (xid8) de la transacción que escribió la fila,
+        # puesto por trigger: cubre save(), bulk_update, update() y los
+        # UPDATE a mano (contacto.py). /sync/ corta cada ventana en
+        # pg_snapshot_xmin(), así que nunca cuenta como entregada una fila
+        # cuya transacción seguía abierta.
+        # Columna solo de BD (no está en los modelos): no sale en la API y
+        # move_franquicia no la copia, el trigger del destino la rellena.
+        # Triggers en tablas particionadas (api_actividad): Postgres 13+.
+        # -----------------------------------------------------
+        migrations.RunSQL(sql=_sql(), reverse_sql=_reverse_sql()),
+    ]
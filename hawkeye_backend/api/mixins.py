@@ -1,11 +1,65 @@
-from rest_framework import exceptions
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, DecimalField, Prefetch, Q, Sum
+from django.db.models.expressions import RawSQL
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import quote_etag
+from rest_framework import exceptions, permissions, serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import bulk, routers
+from .documents import CONSTRUCTORES
+from .export import FORMATOS, exportar
+from .fast_serializers import listado_rapido
+from .prefetch import plan_consultas
+from .search_cache import obtener_o_calcular
+
+
+PARAMETROS_CAMPOS = ("fields", "omit", "expand")
+
+
+def parametros_campos(request):
+    """?fields=a,b&omit=c&expand=d → {"fields": {...}, "omit": {...}, "expand": {...}} (solo GET)."""
+    if request is None or request.method != "GET":
+        return {nombre: set() for nombre in PARAMETROS_CAMPOS}
+    return {
+        nombre: {c.strip() for c in request.query_params.get(nombre, "").split(",") if c.strip()}
+        for nombre in PARAMETROS_CAMPOS
+    }
+
+
+class FranquiciaEnMovimiento(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "La franquicia se está cambiando de base de datos. Vuelve a intentarlo en unos segundos."
+    default_code = "franquicia_en_movimiento"
+
 
 class TenantMixin:
     """
     Asigna automáticamente franquicia y oficina del usuario.
     Evita 400 silenciosos y da errores claros si no hay tenant configurado.
+    Todas las lecturas (list / retrieve / acciones) parten de
+    `objects.para_usuario(user)`: solo se ve el rango del propio tenant,
+    en la base de datos de su franquicia. Las escrituras van a esa misma
+    base por el router (TenantJWTAuthentication fija la base de la petición).
     """
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # move_franquicia: solo lectura mientras se copian las últimas filas
+        if request.method not in permissions.SAFE_METHODS and routers.en_movimiento(request.user.franquicia_id):
+            raise FranquiciaEnMovimiento()
+
+    def get_queryset(self):
+        return super().get_queryset().para_usuario(self.request.user)
+
     def _tenant_info(self):
         user = self.request.user
 
@@ -26,3 +80,438 @@ class TenantMixin:
     def perform_update(self, serializer):
         tenant = self._tenant_info()
         serializer.save(**tenant)
+
+
+class CachedSearchMixin:
+    """
+    Cachea la respuesta de `list` cuando llega ?search=.
+    `search_cache_entidades` indica qué entidades invalidan la entrada
+    (la del propio ViewSet y las que aparecen anidadas en el serializer).
+    """
+
+    search_cache_entidades = ()
+
+    def list(self, request, *args, **kwargs):
+        search = request.query_params.get("search", "").strip().lower()
+        if not search:
+            return super().list(request, *args, **kwargs)
+
+        def calcular():
+            return super(CachedSearchMixin, self).list(request, *args, **kwargs).data
+
+        # ?fields= / ?omit= / ?expand= cambian la forma de la respuesta
+        forma = "|".join(request.query_params.get(nombre, "") for nombre in PARAMETROS_CAMPOS)
+
+        user = request.user
+        datos = obtener_o_calcular(
+            f"{self.basename}:search", user.franquicia_id, user.oficina_id, f"{search}|{forma}", calcular,
+            entidades=self.search_cache_entidades,
+        )
+        return Response(datos)
+
+
+class ListDetailMixin:
+    """
+    `list` usa un serializer compacto (`list_serializer_class`, si existe);
+    el resto de acciones (retrieve / create / update) el serializer completo.
+    Los select_related / prefetch_related salen del árbol del serializer de
+    cada acción (api/prefetch.py) y se aplican en filter_queryset para no
+    pisar los get_queryset de cada ViewSet.
+
+    Con ?fields= / ?omit= / ?expand= (ver DynamicFieldsMixin) el plan se
+    recorta a las relaciones que de verdad se van a serializar, se añaden las
+    expandidas y, si todos los campos pedidos son columnas, se usa only().
+    """
+
+    list_serializer_class = None
+
+    def get_serializer_class(self):
+        if self.action == "list" and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        select, prefetch = plan_consultas(self.get_serializer_class())
+
+        params = parametros_campos(self.request)
+        if any(params.values()):
+            queryset, select, prefetch = self._plan_campos(queryset, select, prefetch, params)
+
+        # select_related() sin argumentos seguiría todas las FKs
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def _plan_campos(self, queryset, select, prefetch, params):
+        model = queryset.model
+        campos = self.get_serializer().fields  # ya filtrados por fields/omit/expand
+
+        # Raíz del source de cada campo: "cliente.nombre" → "cliente"
+        raices, columnas = set(), {model._meta.pk.name}
+        usar_only = bool(params["fields"])
+        for nombre, campo in campos.items():
+            if campo.source == "*" or isinstance(campo, serializers.SerializerMethodField):
+                # No sabemos qué atributos toca → nada de only()
+                usar_only = False
+                continue
+            raiz = campo.source.split(".")[0]
+            raices.add(raiz)
+            try:
+                field = model._meta.get_field(raiz)
+            except FieldDoesNotExist:
+                continue  # anotaciones (rank, snippet) o propiedades
+            if field.concrete and not field.many_to_many:
+                columnas.add(raiz)
+
+        def pedido(lookup):
+            return lookup.split("__")[0] in raices
+
+        select = [r for r in select if pedido(r)]
+        prefetch = [
+            p for p in prefetch
+            if pedido(p.prefetch_through if isinstance(p, Prefetch) else p)
+        ]
+
+        # Relaciones expandidas: FK → JOIN, inversas / M2M → prefetch
+        for nombre in params["expand"] & set(campos):
+            try:
+                field = model._meta.get_field(campos[nombre].source.split(".")[0])
+            except FieldDoesNotExist:
+                continue
+            if field.many_to_one or field.one_to_one:
+                select.append(field.name)
+            elif field.name not in prefetch:
+                prefetch.append(field.name)
+
+        if usar_only:
+            # Las columnas del orden las lee la paginación por cursor
+            orden = {c.lstrip("-") for c in model._meta.ordering}
+            queryset = queryset.only(*(columnas | orden | {r.split("__")[0] for r in select}))
+
+        return queryset, select, prefetch
+
+
+# Tablas con version_tx (0022_version_tx)
+TABLAS_VERSIONADAS = {"api_cliente", "api_inmueble", "api_edificio", "api_pedido", "api_actividad"}
+
+
+def _rutas_select(select_related, prefijo=""):
+    """{"edificio": {"oficina": {}}} → ["edificio", "edificio__oficina"]"""
+    rutas = []
+    for nombre, hijos in select_related.items():
+        rutas.append(prefijo + nombre)
+        rutas += _rutas_select(hijos, f"{prefijo}{nombre}__")
+    return rutas
+
+
+def _modelo_ruta(model, ruta):
+    """Modelo al final de `ruta`; None si pasa por un M2M."""
+    for nombre in ruta.split("__"):
+        try:
+            field = model._meta.get_field(nombre)
+        except FieldDoesNotExist:
+            return None  # accesor *_set de una inversa sin related_name
+        if field.many_to_many:
+            return None
+        model = field.related_model
+    return model
+
+
+def _rutas_relaciones(queryset):
+    """
+    Rutas de las relaciones que se van a serializar con `queryset`, sacadas
+    de su select_related / prefetch_related; None si alguna no tiene
+    version_tx.
+    """
+    select = queryset.query.select_related
+    if select is True:
+        return None  # select_related() sin argumentos: no sabemos qué sigue
+    rutas = _rutas_select(select or {})
+
+    for lookup in queryset._prefetch_related_lookups:
+        if isinstance(lookup, Prefetch):
+            rutas.append(lookup.prefetch_through)
+            if lookup.queryset is not None:
+                interno = lookup.queryset.query.select_related
+                if interno is True:
+                    return None
+                rutas += _rutas_select(interno or {}, f"{lookup.prefetch_through}__")
+        else:
+            rutas.append(lookup)
+
+    for ruta in rutas:
+        model = _modelo_ruta(queryset.model, ruta)
+        if model is None or model._meta.db_table not in TABLAS_VERSIONADAS:
+            return None
+    return rutas
+
+
+class ConditionalGetMixin:
+    """
+    ETag sobre `version_tx` (txid de la última escritura, trigger de 0022).
+      - list:     count + sum(version_tx) del queryset filtrado y de cada
+                  relación que serializa el listado (select_related /
+                  prefetch_related ya recortados por ?fields= / ?expand=)
+                  → 304 sin ejecutar el serializer. La suma cambia con
+                  cualquier alta, edición o borrado aunque el count y el máximo
+                  se queden igual (borrar + insertar, commits fuera de orden).
+                  Si el listado anida una tabla sin version_tx (usuarios,
+                  franquicias, oficinas) o un M2M (la tabla intermedia no se
+                  versiona), no hay validador y se responde siempre con 200.
+      - retrieve: ETag fuerte sobre la respuesta serializada. El detalle anida
+                  M2M (actividades...) que cambian sin tocar la fila principal,
+                  así que el validador sale de la propia respuesta.
+                  El 304 ahorra la transferencia, no las consultas.
+    La fecha (auto_now) no vale como validador: no la tocan los update() ni
+    los UPDATE a mano, así que no hay Last-Modified.
+    """
+
+    def _etag(self, *partes):
+        # La query string (cursor, page_size, fields...) cambia la respuesta
+        partes = (self.basename, self.request.META.get("QUERY_STRING", ""), *partes)
+        return hashlib.sha1("|".join(str(p) for p in partes).encode()).hexdigest()
+
+    def _condicional(self, request, etag):
+        return get_conditional_response(request, etag=quote_etag(etag))
+
+    def _validadores(self, response, etag):
+        response["ETag"] = quote_etag(etag)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def _version(self, queryset):
+        """[count, sum(version_tx), ...] de las filas y relaciones que serializa el listado; None si no se puede."""
+        relaciones = _rutas_relaciones(queryset)
+        if relaciones is None:
+            return None
+
+        version = []
+        for ruta in ["pk", *relaciones]:
+            model = queryset.model if ruta == "pk" else _modelo_ruta(queryset.model, ruta)
+            tabla = model._meta.db_table
+            filas = model._base_manager.db_manager(queryset.db).filter(pk__in=queryset.order_by().values(ruta))
+            resultado = filas.aggregate(
+                total=Count("pk"), suma=Sum(RawSQL(f'"{tabla}"."version_tx"', (), output_field=DecimalField()))
+            )
+            version += [resultado["total"], resultado["suma"]]
+        return version
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if queryset.query.is_sliced:
+            # Búsquedas: ya tienen su propia caché
+            return super().list(request, *args, **kwargs)
+
+        version = self._version(queryset)
+        if version is None:
+            return super().list(request, *args, **kwargs)
+        etag = self._etag(*version)
+
+        no_modificado = self._condicional(request, etag)
+        if no_modificado is not None:
+            return no_modificado
+
+        return self._validadores(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+
+        # Mismos datos + mismo renderer → mismos bytes
+        contenido = json.dumps(response.data, cls=JSONEncoder, ensure_ascii=False)
+        etag = self._etag(request.accepted_renderer.media_type, contenido)
+
+        no_modificado = self._condicional(request, etag)
+        if no_modificado is not None:
+            no_modificado["ETag"] = quote_etag(etag)
+            return no_modificado
+
+        return self._validadores(response, etag)
+
+
+class ExportMixin:
+    """
+    /<ruta>/export/?formato=csv|ndjson → volcado en streaming de las filas del
+    tenant del usuario (api/export.py). `export_fields` = columnas a exportar
+    (admite lookups tipo "propietario__nombre_apellidos_completo").
+    """
+
+    export_fields = ()
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        formato = request.query_params.get("formato", "csv")
+        if formato not in FORMATOS:
+            raise exceptions.ValidationError({"formato": f"Usa uno de: {', '.join(FORMATOS)}"})
+
+        queryset = self.queryset.model.objects.para_usuario(request.user)
+        return exportar(queryset, self.export_fields, formato, self.basename)
+
+
+class FastListMixin:
+    """
+    `list` con values() + dicts cuando el serializer de listado es traducible
+    (api/fast_serializers.py); si no, el camino normal de DRF.
+    Se desactiva con settings.HAWKEYE_FAST_LIST = False.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, "HAWKEYE_FAST_LIST", False):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        orden = None
+        if self.paginator is not None and hasattr(self.paginator, "get_ordering"):
+            orden = self.paginator.get_ordering(request, queryset, self)
+        rapido = listado_rapido(self.get_serializer(), queryset, orden)
+        if rapido is None:
+            return super().list(request, *args, **kwargs)
+
+        filas = rapido.queryset(queryset)
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(rapido.representar(page))
+        return Response(rapido.representar(filas))
+
+
+class BulkMixin:
+    """
+    /<ruta>/bulk/ → altas (POST lista), ediciones (PATCH lista con "id") y
+    bajas (DELETE {"ids": [...]}) de hasta BULK_MAX objetos en una petición,
+    con bulk_create / bulk_update en vez de un save() por fila (api/bulk.py).
+    Ediciones y bajas solo alcanzan filas del tenant del usuario.
+    """
+
+    BULK_MAX = 1000
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        if request.method == "POST":
+            return self._bulk_crear(request)
+        if request.method == "PATCH":
+            return self._bulk_actualizar(request)
+        return self._bulk_eliminar(request)
+
+    def _lista(self, datos):
+        if not isinstance(datos, list) or not datos:
+            raise exceptions.ValidationError({"detail": "Se esperaba una lista no vacía."})
+        if len(datos) > self.BULK_MAX:
+            raise exceptions.ValidationError({"detail": f"Máximo {self.BULK_MAX} objetos por petición."})
+        return datos
+
+    def _filas_tenant(self):
+        return self.queryset.model.objects.para_usuario(self.request.user)
+
+    @staticmethod
+    def _alias(serializer, datos, instance=None):
+        aplicar = getattr(serializer, "aplicar_alias", None)
+        return aplicar(datos, instance) if aplicar else datos
+
+    def _ids(self, valores, campo="ids"):
+        lista = serializers.ListField(
+            child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=self.BULK_MAX
+        )
+        try:
+            return lista.run_validation(valores)
+        except exceptions.ValidationError as e:
+            raise exceptions.ValidationError({campo: e.detail})
+
+    def _bulk_crear(self, request):
+        datos = self._lista(request.data)
+        serializer = self.get_serializer(data=datos, many=True)
+        # Un in_bulk por FK para todo el lote, no un .get() por fila
+        bulk.usar_precargadas(serializer.child, bulk.precargar_relaciones(serializer.child, datos))
+        serializer.is_valid(raise_exception=True)
+
+        user = request.user
+        comunes = {
+            **self._tenant_info(),
+            "creado_por": user,
+            "ultima_modificacion_por": user,
+        }
+        validados = [self._alias(serializer.child, dict(datos)) for datos in serializer.validated_data]
+        objs = bulk.crear_lote(self.queryset.model, validados, comunes)
+        return Response({"creados": len(objs), "ids": [o.pk for o in objs]}, status=status.HTTP_201_CREATED)
+
+    def _bulk_actualizar(self, request):
+        items = self._lista(request.data)
+        ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+        if None in ids:
+            raise exceptions.ValidationError({"detail": "Cada objeto debe incluir su \"id\"."})
+        ids = self._ids(ids, "id")
+
+        model = self.queryset.model
+        select = CONSTRUCTORES[model][2]
+        filas = self._filas_tenant()
+        if select:
+            filas = filas.select_related(*select)
+        instancias = filas.in_bulk(ids)
+
+        serializer_class = self.get_serializer_class()
+        contexto = self.get_serializer_context()
+        precargadas = bulk.precargar_relaciones(serializer_class(context=contexto), items)
+        pares, errores = [], {}
+        for i, (pk, item) in enumerate(zip(ids, items)):
+            instance = instancias.get(pk)
+            if instance is None:
+                errores[i] = {"id": ["No existe o no pertenece a tu oficina."]}
+                continue
+            serializer = serializer_class(instance, data=item, partial=True, context=contexto)
+            bulk.usar_precargadas(serializer, precargadas)
+            if not serializer.is_valid():
+                errores[i] = serializer.errors
+                continue
+            pares.append((instance, self._alias(serializer, dict(serializer.validated_data), instance)))
+
+        if errores:
+            raise exceptions.ValidationError(errores)
+
+        objs = bulk.actualizar_lote(model, pares, {"ultima_modificacion_por": request.user})
+        return Response({"actualizados": len(objs)})
+
+    def _bulk_eliminar(self, request):
+        ids = self._ids(request.data.get("ids") if isinstance(request.data, dict) else None)
+
+        # delete() por queryset sigue enviando post_delete por objeto
+        eliminados, por_modelo = self._filas_tenant().filter(pk__in=ids).delete()
+        return Response({"eliminados": por_modelo.get(self.queryset.model._meta.label, 0)})
+
+
+class UltimoContactoMixin:
+    """
+    Antigüedad del último contacto calculada en la BD a partir de
+    fecha_ultimo_contacto (índice tenant + fecha):
+      ?sin_contacto_dias=N   → contactados hace más de N días (rango sobre el índice)
+      &incluir_nunca=1       → y también los nunca contactados
+      ?orden=contacto        → el contacto más antiguo primero (deja fuera
+                                los nunca contactados: el cursor no admite NULL)
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        if self.action != "list" or queryset.query.is_sliced:
+            return queryset
+
+        if params.get("sin_contacto_dias"):
+            try:
+                dias = int(params["sin_contacto_dias"])
+            except ValueError:
+                raise exceptions.ValidationError({"sin_contacto_dias": "Debe ser un número de días."})
+            filtro = Q(fecha_ultimo_contacto__lt=timezone.localdate() - timedelta(days=dias))
+            if params.get("incluir_nunca") in ("1", "true"):
+                filtro |= Q(fecha_ultimo_contacto__isnull=True)
+            queryset = queryset.filter(filtro)
+
+        if self.orden_paginacion(self.request):
+            queryset = queryset.filter(fecha_ultimo_contacto__isnull=False)
+        return queryset
+
+    def orden_paginacion(self, request):
+        """Orden del cursor (MetaOrderingCursorPagination) o None para el de Meta."""
+        if request.query_params.get("orden") == "contacto":
+            return ("fecha_ultimo_contacto", "id")
+        return None
@@ -57,6 +57,11 @@ class Franquicia(models.Model):
     email = models.EmailField(blank=True)
     logo = models.ImageField(upload_to="franquicias/", blank=True, null=True)
 
+    # Alias de settings.DATABASES con sus datos (vacío → HAWKEYE_BASES_FRANQUICIA
+    # o "default"); en_movimiento bloquea escrituras durante move_franquicia
+    base_datos = models.CharField(max_length=50, blank=True, default="")
+    en_movimiento = models.BooleanField(default=False)
+
     creado_en = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
@@ -216,6 +221,33 @@ class User(AbstractUser):
         return f"{self.username} ({self.role})"
 
 
+# -----------------------------
+# QUERYSET MULTI-TENANT
+# -----------------------------
+from .routers import alias_franquicia
+
+
+class TenantQuerySet(models.QuerySet):
+    """
+    Filas que ve un usuario: las de su oficina o, sin oficina, las de toda su
+    franquicia; sin franquicia, ninguna (mismo criterio que filtro_tenant_q),
+    leídas de la base de datos de la franquicia (api/routers.py).
+    Los ViewSets lo aplican en TenantMixin.get_queryset; `objects` sigue sin
+    filtrar para señales, admin y comandos.
+    """
+
+    def del_tenant(self, franquicia_id, oficina_id=None):
+        if franquicia_id is None:
+            return self.none()
+        queryset = self.using(alias_franquicia(franquicia_id)).filter(franquicia_id=franquicia_id)
+        if oficina_id:
+            queryset = queryset.filter(oficina_id=oficina_id)
+        return queryset
+
+    def para_usuario(self, user):
+        return self.del_tenant(user.franquicia_id, user.oficina_id)
+
+
 # -----------------------------
 # CLIENTE
 # -----------------------------
@@ -227,8 +259,11 @@ from django.contrib.postgres.indexes import GinIndex
 from django.db.models import Index
 from django.utils.translation import gettext_lazy as _
 
+from .normalization import normalizar_telefono, normalizar_email, normalizar_documento
+
 
 class Cliente(models.Model):
+    objects = TenantQuerySet.as_manager()
 
     # ============================
     # MULTI-TENANT (FRANQUICIA / OFICINA)
@@ -287,6 +322,13 @@ class Cliente(models.Model):
     email = models.EmailField(max_length=254, blank=True, null=True, db_index=True)
     email_secundario = models.EmailField(max_length=254, blank=True, null=True)
 
+    # 🔥 Columnas sombra normalizadas (api/normalization.py) → búsqueda exacta por índice
+    telefono_norm = models.CharField(max_length=20, blank=True, default="", editable=False)
+    telefono_movil_norm = models.CharField(max_length=20, blank=True, default="", editable=False)
+    email_norm = models.CharField(max_length=254, blank=True, default="", editable=False)
+    email_secundario_norm = models.CharField(max_length=254, blank=True, default="", editable=False)
+    num_identificacion_norm = models.CharField(max_length=50, blank=True, default="", editable=False)
+
     actividades = models.ManyToManyField(
         'Actividad',
         related_name='clientes_asociados',
@@ -294,6 +336,8 @@ class Cliente(models.Model):
     )
 
     dias_ultimo_contacto = models.PositiveIntegerField(default=0)
+    # Máximo de fecha_inicio de sus actividades (api/contacto.py)
+    fecha_ultimo_contacto = models.DateField(null=True, blank=True, db_index=True)
 
     # ============================
     # AUDITORÍA
@@ -321,9 +365,22 @@ class Cliente(models.Model):
     # PATHS INTERNOS — OPTIMIZADOS PARA BÚSQUEDA
     # ============================
     def save(self, *args, **kwargs):
+        self.calcular_derivados()
+        super().save(*args, **kwargs)
+
+    def calcular_derivados(self):
+        """Campos de búsqueda derivados (también lo usan las altas en lote)."""
         self.nombre_apellido = f"{self.nombre} {self.apellido1}".strip().lower()
         self.nombre_apellidos_completo = f"{self.nombre} {self.apellido1} {self.apellido2 or ''}".strip().lower()
-        super().save(*args, **kwargs)
+        self.normalizar_identificadores()
+
+    def normalizar_identificadores(self):
+        """Rellena las columnas *_norm (también lo usa backfill_normalized_fields)."""
+        self.telefono_norm = normalizar_telefono(self.telefono)
+        self.telefono_movil_norm = normalizar_telefono(self.telefono_movil)
+        self.email_norm = normalizar_email(self.email)
+        self.email_secundario_norm = normalizar_email(self.email_secundario)
+        self.num_identificacion_norm = normalizar_documento(self.num_identificacion)
 
     def __str__(self):
         return f"{self.nombre} {self.apellido1}"
@@ -335,8 +392,21 @@ class Cliente(models.Model):
         ordering = ["-fecha_ultima_modificacion"]
 
         indexes = [
-            # 🔥 MULTI-TENANT — consultas ultra rápidas por franquicia y oficina
-            Index(fields=["franquicia", "oficina"], name="idx_cliente_tenant"),
+            # 🔥 MULTI-TENANT — tenant + Meta.ordering + id: el listado de una
+            # oficina es un único rango del índice, ya ordenado
+            Index(
+                fields=["franquicia", "oficina", "-fecha_ultima_modificacion", "id"],
+                name="idx_cliente_tenant_orden",
+            ),
+
+            # 🔥 PAGINACIÓN POR CURSOR → Meta.ordering + id
+            Index(fields=["-fecha_ultima_modificacion", "id"], name="idx_cliente_cursor"),
+
+            # 🔥 ANTIGÜEDAD DE CONTACTO → rango + orden (UltimoContactoMixin)
+            Index(
+                fields=["franquicia", "oficina", "fecha_ultimo_contacto", "id"],
+                name="idx_cliente_contacto",
+            ),
 
             # 🔥 Búsqueda exacta acelerada
             Index(fields=["nombre_apellido"], name="idx_cliente_nombreact"),
@@ -344,6 +414,16 @@ class Cliente(models.Model):
             Index(fields=["email"], name="idx_cliente_email"),
             Index(fields=["telefono_movil"], name="idx_cliente_movil"),
 
+            # 🔥 Búsqueda exacta sobre columnas normalizadas
+            Index(fields=["telefono_norm"], name="idx_cliente_tel_norm"),
+            Index(fields=["telefono_movil_norm"], name="idx_cliente_movil_norm"),
+            Index(fields=["email_norm"], name="idx_cliente_email_norm"),
+            Index(fields=["email_secundario_norm"], name="idx_cliente_email2_norm"),
+            Index(fields=["num_identificacion_norm"], name="idx_cliente_doc_norm"),
+
+            # Sufijo de teléfono (últimos N dígitos) → migración SQL:
+            #   reverse(telefono_movil_norm) text_pattern_ops
+
             # ⚠️ GIN que tu Django sí soporta (campo directo, sin opclasses)
             # Esto acelera búsquedas por igualdad o contains básico
             # GinIndex(fields=["nombre_apellido"], name="idx_cliente_nombre_gin"),
@@ -375,6 +455,7 @@ from django.utils.translation import gettext_lazy as _
 
 
 class Edificio(models.Model):
+    objects = TenantQuerySet.as_manager()
 
     # ============================
     # MULTI-TENANT
@@ -422,6 +503,10 @@ class Edificio(models.Model):
     anio_construccion = models.PositiveIntegerField(blank=True, null=True)
     numero_plantas = models.PositiveIntegerField(blank=True, null=True)
 
+    # Referencia catastral de la parcela: los 14 primeros caracteres de la
+    # ref_catastral (20) de cada inmueble del edificio
+    ref_catastral = models.CharField(max_length=14, unique=True, blank=True, null=True)
+
     # ============================
     # AUDITORÍA
     # ============================
@@ -465,8 +550,14 @@ class Edificio(models.Model):
 
         indexes = [
 
-            # 🔥 MULTI-TENANT — consultas por oficina/franquicia instantáneas
-            Index(fields=["franquicia", "oficina"], name="idx_edif_tenant"),
+            # 🔥 MULTI-TENANT — tenant + Meta.ordering + id
+            Index(
+                fields=["franquicia", "oficina", "-fecha_ultima_modificacion", "id"],
+                name="idx_edif_tenant_orden",
+            ),
+
+            # 🔥 PAGINACIÓN POR CURSOR → Meta.ordering + id
+            Index(fields=["-fecha_ultima_modificacion", "id"], name="idx_edif_cursor"),
 
             # 🔥 ÍNDICES CLÁSICOS MUY USADOS
             Index(fields=["codigo_postal"], name="idx_edif_cp"),
@@ -499,6 +590,7 @@ from django.db.models import Index, CheckConstraint
 
 
 class Inmueble(models.Model):
+    objects = TenantQuerySet.as_manager()
 
     # ============================
     # MULTI-TENANT
@@ -702,19 +794,22 @@ class Inmueble(models.Model):
 
         if self.edificio_id:
             edificio = getattr(self, "_edificio_cache", None) or Edificio.objects.get(pk=self.edificio_id)
+            self.calcular_derivados(edificio)
 
-            # Heredar lat/lng si faltan
-            if not self.latitud or not self.longitud:
-                self.latitud = edificio.latitud
-                self.longitud = edificio.longitud
+        super().save(*args, **kwargs)
 
-            # 🔥 dirección de búsqueda Google-like
-            self.direccion_busqueda = (
-                f"{edificio.calle} {edificio.numero_calle} "
-                f"{self.planta or ''} {self.puerta or ''}"
-            ).strip().lower()
+    def calcular_derivados(self, edificio):
+        """lat/lng heredadas y direccion_busqueda (las altas en lote pasan el edificio ya cargado)."""
+        # Heredar lat/lng si faltan
+        if not self.latitud or not self.longitud:
+            self.latitud = edificio.latitud
+            self.longitud = edificio.longitud
 
-        super().save(*args, **kwargs)
+        # 🔥 dirección de búsqueda Google-like
+        self.direccion_busqueda = (
+            f"{edificio.calle} {edificio.numero_calle} "
+            f"{self.planta or ''} {self.puerta or ''}"
+        ).strip().lower()
 
     # ============================
     # REPRESENTACIÓN
@@ -726,8 +821,23 @@ class Inmueble(models.Model):
         ordering = ["-fecha_ultima_modificacion", "edificio_id", "planta", "puerta"]
         indexes = [
 
-            # 🔥 MULTI-TENANT
-            Index(fields=["franquicia", "oficina"], name="idx_inm_tenant"),
+            # 🔥 MULTI-TENANT — tenant + Meta.ordering + id
+            Index(
+                fields=["franquicia", "oficina", "-fecha_ultima_modificacion", "edificio", "planta", "puerta", "id"],
+                name="idx_inm_tenant_orden",
+            ),
+
+            # 🔥 PAGINACIÓN POR CURSOR → Meta.ordering + id
+            Index(
+                fields=["-fecha_ultima_modificacion", "edificio", "planta", "puerta", "id"],
+                name="idx_inm_cursor",
+            ),
+
+            # 🔥 ANTIGÜEDAD DE CONTACTO → rango + orden (UltimoContactoMixin)
+            Index(
+                fields=["franquicia", "oficina", "fecha_ultimo_contacto", "id"],
+                name="idx_inm_contacto",
+            ),
 
             Index(fields=["edificio", "planta", "puerta"]),
             Index(fields=["estado_CRM"]),
@@ -769,6 +879,7 @@ from django.db.models import Index, CheckConstraint
 
 
 class Pedido(models.Model):
+    objects = TenantQuerySet.as_manager()
 
     # ============================
     # MULTI-TENANT
@@ -818,6 +929,8 @@ class Pedido(models.Model):
 
     fecha = models.DateField(auto_now_add=True, db_index=True)
     fecha_limite = models.DateField(blank=True, null=True, db_index=True)
+    # Máximo de fecha_inicio de sus actividades (api/contacto.py)
+    fecha_ultimo_contacto = models.DateField(null=True, blank=True, db_index=True)
 
     procedencia = models.CharField(
         max_length=50,
@@ -992,8 +1105,23 @@ class Pedido(models.Model):
         ordering = ["-fecha_ultima_modificacion", "-fecha", "-prioridad"]
         indexes = [
 
-            # Multi-tenant
-            Index(fields=["franquicia", "oficina"], name="idx_pedido_tenant"),
+            # Multi-tenant → tenant + Meta.ordering + id
+            Index(
+                fields=["franquicia", "oficina", "-fecha_ultima_modificacion", "-fecha", "-prioridad", "id"],
+                name="idx_pedido_tenant_orden",
+            ),
+
+            # Paginación por cursor → Meta.ordering + id
+            Index(
+                fields=["-fecha_ultima_modificacion", "-fecha", "-prioridad", "id"],
+                name="idx_pedido_cursor",
+            ),
+
+            # 🔥 ANTIGÜEDAD DE CONTACTO → rango + orden (UltimoContactoMixin)
+            Index(
+                fields=["franquicia", "oficina", "fecha_ultimo_contacto", "id"],
+                name="idx_pedido_contacto",
+            ),
 
             # Matching rápido
             Index(fields=["cliente", "fecha"]),
@@ -1011,6 +1139,9 @@ class Pedido(models.Model):
             # GinIndex(fields=["descripcion"], name="idx_pedido_desc_trgm", opclasses=["gin_trgm_ops"]),
             # GinIndex(fields=["tipo_inmueble"], name="idx_pedido_tipo_trgm", opclasses=["gin_trgm_ops"]),
             # GinIndex(fields=["subtipo_inmueble"], name="idx_pedido_subtipo_trgm", opclasses=["gin_trgm_ops"]),
+
+            # 📝 FULL-TEXT → columna generada `busqueda_vector` (spanish_unaccent)
+            # + GIN idx_pedido_fts, ambos en la migración 0010
         ]
 
 
@@ -1028,8 +1159,13 @@ from django.db.models import Q, F
 from django.contrib.postgres.indexes import GinIndex
 from django.db.models import Index, CheckConstraint
 
+# Duración máxima de una actividad: acota por abajo fecha_inicio en las
+# consultas de solape del calendario, para que podar particiones sea posible
+DURACION_MAXIMA_ACTIVIDAD = timedelta(days=31)
+
 
 class Actividad(models.Model):
+    objects = TenantQuerySet.as_manager()
 
     # ============================
     # MULTI-TENANT — crítico
@@ -1160,12 +1296,20 @@ class Actividad(models.Model):
     def clean(self):
         if self.fecha_inicio and self.fecha_fin and self.fecha_inicio >= self.fecha_fin:
             raise ValidationError(_("La fecha de inicio debe ser anterior a la fecha de fin."))
+        if self.fecha_inicio and self.fecha_fin and self.fecha_fin - self.fecha_inicio > DURACION_MAXIMA_ACTIVIDAD:
+            raise ValidationError(_("Una actividad no puede durar más de %(dias)s días.") % {"dias": DURACION_MAXIMA_ACTIVIDAD.days})
 
     def save(self, *args, **kwargs):
+        self.corregir_fechas()
+        super().save(*args, **kwargs)
+
+    def corregir_fechas(self):
         # Falla segura: nunca permitas fin <= inicio
         if self.fecha_inicio and self.fecha_fin and self.fecha_inicio >= self.fecha_fin:
             self.fecha_fin = self.fecha_inicio + timedelta(minutes=15)
-        super().save(*args, **kwargs)
+        # ...ni más larga que DURACION_MAXIMA_ACTIVIDAD (poda del calendario)
+        if self.fecha_inicio and self.fecha_fin and self.fecha_fin - self.fecha_inicio > DURACION_MAXIMA_ACTIVIDAD:
+            self.fecha_fin = self.fecha_inicio + DURACION_MAXIMA_ACTIVIDAD
 
     # ============================
     # REPRESENTACIÓN
@@ -1176,12 +1320,17 @@ class Actividad(models.Model):
     # ============================
     # META: ÍNDICES ULTRA-OPTIMIZADOS
     # ============================
+    # La tabla está particionada por mes de fecha_inicio (api/particiones.py,
+    # migración 0020): cada índice de aquí existe por partición.
     class Meta:
         ordering = ["-fecha_inicio", "-fecha_ultima_modificacion"]
         indexes = [
 
-            # 🔥 MULTI-TENANT MUST-HAVE
-            Index(fields=["franquicia", "oficina"], name="idx_act_tenant"),
+            # 🔥 MULTI-TENANT MUST-HAVE → tenant + Meta.ordering + id
+            Index(
+                fields=["franquicia", "oficina", "-fecha_inicio", "-fecha_ultima_modificacion", "id"],
+                name="idx_act_tenant_orden",
+            ),
 
             # 🔥 CALENDARIO: búsqueda por vista semanal/mensual
             Index(fields=["oficina", "fecha_inicio"], name="idx_act_oficina_fecha"),
@@ -1192,6 +1341,10 @@ class Actividad(models.Model):
             # 🔥 FECHAS para scroll infinito
             Index(fields=["fecha_inicio"], name="idx_act_fechainicio"),
             Index(fields=["fecha_fin"], name="idx_act_fechafin"),
+            Index(
+                fields=["-fecha_inicio", "-fecha_ultima_modificacion", "id"],
+                name="idx_act_cursor",
+            ),
 
             # 🔥 Relaciones con fecha para informes
             Index(fields=["cliente", "fecha_inicio"], name="idx_act_cliente_fecha"),
@@ -1203,6 +1356,9 @@ class Actividad(models.Model):
             # ============================
             # GinIndex( fields=["descripcion_empleado"], name="idx_act_desc_emp_trgm", opclasses=["gin_trgm_ops"]),
             # GinIndex( fields=["descripcion_publica"], name="idx_act_desc_pub_trgm", opclasses=["gin_trgm_ops"]),
+
+            # 📝 FULL-TEXT → columna generada `busqueda_vector` (spanish_unaccent)
+            # + GIN idx_act_fts, ambos en la migración 0010
         ]
 
         constraints = [
@@ -1210,4 +1366,107 @@ class Actividad(models.Model):
                 check=Q(fecha_inicio__lt=F("fecha_fin")),
                 name="actividad_fecha_inicio_menor_que_fin",
             ),
+            CheckConstraint(
+                check=Q(fecha_fin__lte=F("fecha_inicio") + DURACION_MAXIMA_ACTIVIDAD),
+                name="actividad_duracion_maxima",
+            ),
+        ]
+
+
+# ===========================================
+# ===== DOCUMENTO DE BÚSQUEDA (desnormalizado)
+# ===========================================
+#
+# Una fila por (tipo, objeto_id) con el texto normalizado, su tsvector y
+# los campos que muestra global_search. Se mantiene por señales
+# (api/signals.py) y se reconstruye con `manage.py rebuild_search_documents`.
+
+from django.contrib.postgres.search import SearchVectorField
+
+
+class SearchDocument(models.Model):
+
+    class Tipo(models.TextChoices):
+        CLIENTE = 'cliente', _('Cliente')
+        INMUEBLE = 'inmueble', _('Inmueble')
+        EDIFICIO = 'edificio', _('Edificio')
+        PEDIDO = 'pedido', _('Pedido')
+        ACTIVIDAD = 'actividad', _('Actividad')
+
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    objeto_id = models.BigIntegerField()
+
+    # ============================
+    # MULTI-TENANT
+    # ============================
+    franquicia = models.ForeignKey(
+        Franquicia,
+        on_delete=models.CASCADE,
+        related_name="documentos_busqueda",
+    )
+    oficina = models.ForeignKey(
+        Oficina,
+        on_delete=models.CASCADE,
+        related_name="documentos_busqueda",
+    )
+
+    # ============================
+    # BÚSQUEDA
+    # ============================
+    # Texto en minúsculas y sin acentos
+    texto = models.TextField(default="", blank=True)
+    # Lo rellena el trigger `searchdocument_vector_trigger` (migración 0009)
+    vector = SearchVectorField(null=True, editable=False)
+
+    # ============================
+    # VISUALIZACIÓN (respuesta de global_search sin tocar la tabla origen)
+    # ============================
+    datos = models.JSONField(default=dict, blank=True)
+    fecha = models.DateTimeField(null=True, blank=True)
+
+    fecha_ultima_modificacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.tipo} #{self.objeto_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tipo", "objeto_id"], name="searchdoc_tipo_objeto_unico"),
+        ]
+        indexes = [
+            Index(fields=["franquicia", "oficina", "tipo"], name="idx_searchdoc_tenant"),
+            GinIndex(fields=["vector"], name="idx_searchdoc_vector"),
+
+            # TRGM sobre `texto` → migración SQL (idx_searchdoc_texto_trgm)
+        ]
+
+
+# ===========================================
+# ===== ELIMINACIONES (tombstones para /sync/)
+# ===========================================
+#
+# Una fila por objeto borrado para que la sincronización incremental pueda
+# avisar a los clientes offline. La escriben las señales post_delete y se
+# purgan con `manage.py purge_sync_tombstones`.
+
+class Eliminacion(models.Model):
+    objects = TenantQuerySet.as_manager()
+
+    tipo = models.CharField(max_length=20, choices=SearchDocument.Tipo.choices)
+    objeto_id = models.BigIntegerField()
+
+    # Ids sin FK: al borrar una franquicia en cascada, las señales escriben
+    # tombstones que apuntarían a una fila que se borra en la misma transacción
+    franquicia_id = models.BigIntegerField()
+    oficina_id = models.BigIntegerField()
+
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.tipo} #{self.objeto_id} ({self.fecha:%Y-%m-%d %H:%M})"
+
+    class Meta:
+        indexes = [
+            # 🔥 /sync/: tenant + rango de fechas, recorrido por (fecha, id)
+            Index(fields=["franquicia_id", "fecha", "id"], name="idx_eliminacion_sync"),
         ]
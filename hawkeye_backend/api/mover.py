@@ -0,0 +1,257 @@
+# ============================================================
+# HAWKEYE — MOVER UNA FRANQUICIA DE BASE DE DATOS (move_franquicia)
+# ============================================================
+#
+# En línea: la franquicia sigue trabajando contra su base de origen
+# mientras se copia, y solo deja de escribir unos segundos en el corte.
+#
+#  1. Réplica de las tablas globales y secuencias separadas (api/routers.py).
+#  2. Copia completa de sus filas, tabla a tabla en orden de FKs, sobre una
+#     foto REPEATABLE READ del origen (ninguna FK queda colgando).
+#  3. Pasadas de puesta al día: filas cambiadas desde la foto anterior
+#     (menos HAWKEYE_SYNC_MARGEN, auto_now se calcula en Python) y borrados
+#     según las Eliminacion, hasta que quedan pocas.
+#  4. Corte: en_movimiento=True (TenantMixin responde 503 a las escrituras),
+#     espera de HAWKEYE_BASES_TTL para que todos los procesos lo vean,
+#     última pasada con los M2M y base_datos=destino.
+#  5. Más tarde, limpiar_origen() borra las filas que quedaron en el origen.
+#
+# Cada lote se escribe con borrar + insertar por id, así que repetir una
+# pasada no duplica nada y una fila con el mismo id de otra franquicia
+# (secuencias sin separar) aborta la copia en vez de pisarla.
+
+import time
+from datetime import timedelta
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.db import connection, connections, models, transaction
+
+from . import routers
+from .models import Cliente, Edificio, Inmueble, Pedido, Actividad, SearchDocument, Eliminacion
+
+# (modelo, campo que marca el último cambio), en orden de FKs
+ORDEN = [
+    (Edificio, "fecha_ultima_modificacion"),
+    (Cliente, "fecha_ultima_modificacion"),
+    (Inmueble, "fecha_ultima_modificacion"),
+    (Pedido, "fecha_ultima_modificacion"),
+    (Actividad, "fecha_ultima_modificacion"),
+    (SearchDocument, "fecha_ultima_modificacion"),
+    (Eliminacion, "fecha"),
+]
+
+LOTE = 2000
+qn = connection.ops.quote_name
+MEMORIA_COPY = 64 * 1024 * 1024
+
+
+class IdsEnConflicto(Exception):
+    pass
+
+
+def _fichero():
+    return SpooledTemporaryFile(max_size=MEMORIA_COPY, mode="w+b")
+
+
+def _columnas(model):
+    # Entre comillas: api_inmueble tiene columnas con mayúsculas (emisiones_CO2, estado_CRM)
+    return ", ".join(qn(f.column) for f in model._meta.concrete_fields)
+
+
+# ==========================================================
+# 📤 COPIA
+# ==========================================================
+def _copiar(origen, destino, model, campo, franquicia_id, desde=None, lote=LOTE):
+    """Copia las filas de la franquicia (cambiadas después de `desde`, si se indica). Devuelve cuántas."""
+    tabla, columnas = model._meta.db_table, _columnas(model)
+    filtro, params = "franquicia_id = %s", [franquicia_id]
+    if desde is not None:
+        filtro += f" AND {campo} > %s"
+        params.append(desde)
+
+    total, ultimo = 0, 0
+    while True:
+        origen.execute(
+            f"SELECT id FROM {tabla} WHERE {filtro} AND id > %s ORDER BY id LIMIT %s",
+            params + [ultimo, lote],
+        )
+        ids = [fila[0] for fila in origen.fetchall()]
+        if not ids:
+            return total
+
+        with _fichero() as datos:
+            # COPY no admite parámetros: se interpolan con mogrify
+            consulta = origen.mogrify(f"SELECT {columnas} FROM {tabla} WHERE id = ANY(%s)", [ids]).decode()
+            origen.copy_expert(f"COPY ({consulta}) TO STDOUT", datos)
+            datos.seek(0)
+
+            with transaction.atomic(using=destino), connections[destino].cursor() as cursor:
+                # INCLUDING DEFAULTS: version_tx (solo BD, no se copia) es NOT NULL
+                cursor.execute(f"CREATE TEMP TABLE copia (LIKE {tabla} INCLUDING DEFAULTS) ON COMMIT DROP")
+                cursor.copy_expert(f"COPY copia ({columnas}) FROM STDIN", datos)
+                cursor.execute(
+                    f"SELECT count(*) FROM {tabla} t JOIN copia c USING (id) WHERE t.franquicia_id <> %s",
+                    [franquicia_id],
+                )
+                if cursor.fetchone()[0]:
+                    raise IdsEnConflicto(f"{tabla}: ids ya usados por otra franquicia en {destino}")
+                cursor.execute(f"DELETE FROM {tabla} WHERE id IN (SELECT id FROM copia)")
+                cursor.execute(f"INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM copia")
+
+        total += len(ids)
+        ultimo = ids[-1]
+
+
+def _copiar_m2m(origen, destino, model, franquicia_id):
+    """Sustituye en el destino todas las filas de las tablas intermedias de `model` para la franquicia."""
+    tabla = model._meta.db_table
+    for campo in model._meta.many_to_many:
+        intermedia = campo.remote_field.through._meta.db_table
+        fuente, objetivo = qn(campo.m2m_column_name()), qn(campo.m2m_reverse_name())
+        propias = f"{fuente} IN (SELECT id FROM {tabla} WHERE franquicia_id = {int(franquicia_id)})"
+
+        with _fichero() as datos:
+            origen.copy_expert(f"COPY (SELECT {fuente}, {objetivo} FROM {intermedia} WHERE {propias}) TO STDOUT", datos)
+            datos.seek(0)
+            with transaction.atomic(using=destino), connections[destino].cursor() as cursor:
+                cursor.execute(f"DELETE FROM {intermedia} WHERE {propias}")
+                cursor.copy_expert(f"COPY {intermedia} ({fuente}, {objetivo}) FROM STDIN", datos)
+
+
+# ==========================================================
+# 🗑️ BORRADOS
+# ==========================================================
+def _borrar(cursor, model, ids):
+    """Borra `ids` de `model` aplicando el on_delete de Django a lo que apunta a ellos."""
+    for rel in model._meta.get_fields(include_hidden=True):
+        if not (rel.auto_created and not rel.concrete and rel.one_to_many):
+            continue
+        tabla, columna = rel.related_model._meta.db_table, qn(rel.field.column)
+        if rel.on_delete is models.SET_NULL:
+            cursor.execute(f"UPDATE {tabla} SET {columna} = NULL WHERE {columna} = ANY(%s)", [ids])
+        else:
+            # CASCADE y filas de tablas intermedias
+            cursor.execute(f"DELETE FROM {tabla} WHERE {columna} = ANY(%s)", [ids])
+    cursor.execute(f"DELETE FROM {model._meta.db_table} WHERE id = ANY(%s)", [ids])
+
+
+def _aplicar_borrados(origen, destino, franquicia_id, desde):
+    """Repite en el destino los borrados que registran las Eliminacion del origen. Devuelve cuántos."""
+    origen.execute(
+        "SELECT tipo, array_agg(objeto_id) FROM api_eliminacion WHERE franquicia_id = %s AND fecha > %s GROUP BY tipo",
+        [franquicia_id, desde],
+    )
+    por_tipo = dict(origen.fetchall())
+
+    total = 0
+    with transaction.atomic(using=destino), connections[destino].cursor() as cursor:
+        # Dependientes primero
+        for model, _ in reversed(ORDEN):
+            ids = por_tipo.get(model._meta.model_name)
+            if not ids:
+                continue
+            _borrar(cursor, model, ids)
+            cursor.execute(
+                "DELETE FROM api_searchdocument WHERE tipo = %s AND objeto_id = ANY(%s)",
+                [model._meta.model_name, ids],
+            )
+            total += len(ids)
+    return total
+
+
+# ==========================================================
+# 🔁 PASADAS
+# ==========================================================
+def pasada(origen, destino, franquicia_id, desde=None, m2m=False, log=None):
+    """
+    Una pasada sobre una foto consistente del origen: filas cambiadas desde
+    `desde` (todas si es None), borrados y, con `m2m`, tablas intermedias.
+    Devuelve (instante de la foto, filas copiadas, filas borradas).
+    """
+    copiadas = borradas = 0
+    with transaction.atomic(using=origen), connections[origen].cursor() as cursor:
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute("SELECT now()")
+        foto = cursor.fetchone()[0]
+
+        for model, campo in ORDEN:
+            n = _copiar(cursor, destino, model, campo, franquicia_id, desde)
+            copiadas += n
+            if log and n:
+                log(f"  {model.__name__}: {n}")
+        if desde is not None:
+            borradas = _aplicar_borrados(cursor, destino, franquicia_id, desde)
+        if m2m:
+            for model, _ in ORDEN:
+                _copiar_m2m(cursor, destino, model, franquicia_id)
+
+    return foto, copiadas, borradas
+
+
+def _marcar(franquicia, **campos):
+    from .models import Franquicia
+
+    Franquicia.objects.using(routers.DEFAULT).filter(pk=franquicia.pk).update(**campos)
+    routers.replicar(Franquicia, [franquicia.pk])
+    routers.olvidar_franquicias()
+
+
+def mover(franquicia, destino, pasadas=5, umbral=500, log=None):
+    """Mueve `franquicia` a `destino` en línea (ver cabecera). Devuelve la base de origen."""
+    log = log or (lambda mensaje: None)
+    routers.olvidar_franquicias()
+    origen = routers.alias_franquicia(franquicia.pk)
+    if destino not in settings.DATABASES:
+        raise ValueError(f"{destino} no está en settings.DATABASES")
+    if destino == origen:
+        raise ValueError(f"{franquicia.codigo} ya está en {destino}")
+
+    margen = timedelta(seconds=settings.HAWKEYE_SYNC_MARGEN)
+    routers.separar_secuencias()
+    routers.replicar_globales(destino)
+
+    log(f"Copia completa {origen} → {destino}")
+    foto, copiadas, _ = pasada(origen, destino, franquicia.pk, m2m=True, log=log)
+    log(f"  {copiadas} filas")
+
+    for numero in range(1, pasadas + 1):
+        foto_nueva, copiadas, borradas = pasada(origen, destino, franquicia.pk, foto - margen, log=log)
+        foto = foto_nueva
+        log(f"Puesta al día {numero}: {copiadas} filas, {borradas} borradas")
+        if copiadas + borradas <= umbral:
+            break
+
+    log("Corte: escrituras en pausa")
+    _marcar(franquicia, en_movimiento=True)
+    try:
+        time.sleep(settings.HAWKEYE_BASES_TTL + settings.HAWKEYE_SYNC_MARGEN)
+        _, copiadas, borradas = pasada(origen, destino, franquicia.pk, foto - margen, m2m=True, log=log)
+        log(f"Última pasada: {copiadas} filas, {borradas} borradas")
+        _marcar(franquicia, base_datos=destino, en_movimiento=False)
+    except BaseException:
+        _marcar(franquicia, en_movimiento=False)
+        raise
+
+    return origen
+
+
+def limpiar_origen(franquicia, origen):
+    """Borra de `origen` las filas de la franquicia, que ya vive en otra base. Devuelve filas por tabla."""
+    routers.olvidar_franquicias()
+    if routers.alias_franquicia(franquicia.pk) == origen:
+        raise ValueError(f"{franquicia.codigo} sigue en {origen}: no se borra nada")
+
+    borradas = {}
+    with transaction.atomic(using=origen), connections[origen].cursor() as cursor:
+        for model, _ in reversed(ORDEN):
+            tabla = model._meta.db_table
+            for campo in model._meta.many_to_many:
+                cursor.execute(
+                    f"DELETE FROM {campo.remote_field.through._meta.db_table} "
+                    f"WHERE {qn(campo.m2m_column_name())} IN (SELECT id FROM {tabla} WHERE franquicia_id = %s)",
+                    [franquicia.pk],
+                )
+            cursor.execute(f"DELETE FROM {tabla} WHERE franquicia_id = %s", [franquicia.pk])
+            borradas[tabla] = cursor.rowcount
+    return borradas
@@ -0,0 +1,30 @@
+# ============================================================
+# HAWKEYE — NORMALIZACIÓN DE IDENTIFICADORES
+# ============================================================
+#
+# Las columnas *_norm de Cliente guardan estos valores para que las
+# búsquedas exactas usen índices B-tree en vez de icontains.
+
+import re
+
+RE_NO_DIGITOS = re.compile(r"\D")
+RE_SEPARADORES_DOC = re.compile(r"[\s\-.]")
+
+
+def normalizar_telefono(valor):
+    """'+34 600 11 22 33' / '0034600112233' / '600-11-22-33' → '600112233'."""
+    digitos = RE_NO_DIGITOS.sub("", valor or "")
+    if digitos.startswith("00"):
+        digitos = digitos[2:]
+    if len(digitos) == 11 and digitos.startswith("34"):
+        digitos = digitos[2:]
+    return digitos
+
+
+def normalizar_email(valor):
+    return (valor or "").strip().lower()
+
+
+def normalizar_documento(valor):
+    """'12.345.678-z' → '12345678Z'."""
+    return RE_SEPARADORES_DOC.sub("", valor or "").upper()
@@ -0,0 +1,49 @@
+# ============================================================
+# HAWKEYE — PAGINACIÓN POR CURSOR (keyset)
+# ============================================================
+#
+# Cada ViewSet pagina siguiendo el Meta.ordering de su modelo + "id" como
+# desempate, así el cursor coincide con los índices "*_cursor" de models.py
+# y la página N cuesta lo mismo que la primera (sin OFFSET).
+#
+# Todos los listados devuelven {next, previous, results}, como mucho
+# max_page_size filas por petición. El frontend recorre `next` con getTodo()
+# (OgFrontendPreVite/src/api.js) donde necesita la lista entera.
+
+from rest_framework.pagination import CursorPagination
+
+
+class MetaOrderingCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        # El ViewSet puede pedir otro orden indexado (p. ej. UltimoContactoMixin)
+        propio = getattr(view, "orden_paginacion", None)
+        if propio is not None and propio(request):
+            return tuple(propio(request))
+
+        ordering = list(queryset.model._meta.ordering) or ["-id"]
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering.append("id")
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Búsquedas (?search= / ?texto=) ya vienen recortadas y ordenadas
+        # por relevancia: se devuelven tal cual, sin paginar.
+        if getattr(queryset, "query", None) is not None and queryset.query.is_sliced:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class TimelineCursorPagination(CursorPagination):
+    """
+    Timeline de actividades de una entidad: más recientes primero. El orden
+    (fecha_inicio, id) lo sirven idx_act_cliente_fecha / _inmueble_ / _pedido_.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-fecha_inicio", "-id")
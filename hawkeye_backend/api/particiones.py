@@ -0,0 +1,244 @@
+# ============================================================
+# HAWKEYE — PARTICIONADO MENSUAL DE api_actividad
+# ============================================================
+#
+# api_actividad es una tabla particionada por rango de fecha_inicio: una
+# partición por mes (api_actividad_AAAA_MM, límites en UTC) y
+# api_actividad_default para lo que caiga fuera. Cada partición tiene sus
+# propios índices, así que los meses antiguos dejan de engordar los índices
+# del mes en curso y se pueden desanclar (DETACH) para archivarlos.
+#
+# - Clave primaria (id, fecha_inicio): Postgres exige la clave de partición
+#   en toda restricción única. `id` sigue saliendo de una única secuencia.
+# - Por lo mismo, ninguna FK puede apuntar a api_actividad(id): las tablas
+#   intermedias de los M2M (clientes/inmuebles/edificios/pedidos ↔
+#   actividades) pierden la suya. Django ya borra esas filas al borrar una
+#   actividad (Collector), que es lo que garantizaba la FK.
+# - Las consultas que acotan fecha_inicio (calendario, timeline con
+#   from/to o cursor) solo tocan los meses implicados.
+# - create_activity_partitions crea los meses futuros con antelación; si el
+#   default ya tiene filas de ese mes, se mueven a la partición nueva.
+# - La conversión (migración 0020) copia la tabla entera en una transacción
+#   y la bloquea mientras dura: ejecutarla en una ventana de mantenimiento.
+
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+TABLA = "api_actividad"
+DEFAULT = f"{TABLA}_default"
+PATRON_PARTICION = re.compile(rf"^{TABLA}_(\d{{4}})_(\d{{2}})$")
+
+# Meses más antiguos que esto no tienen partición propia (van al default)
+ANTIGUEDAD_MAXIMA_MESES = 120
+
+
+# ==========================================================
+# 📅 MESES
+# ==========================================================
+def mes_de(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes, n):
+    indice = mes.year * 12 + mes.month - 1 + n
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes):
+    return f"{TABLA}_{mes:%Y_%m}"
+
+
+def _limites(mes):
+    """[inicio, fin) del mes en UTC."""
+    siguiente = sumar_meses(mes, 1)
+    return (
+        datetime(mes.year, mes.month, 1, tzinfo=dt_timezone.utc),
+        datetime(siguiente.year, siguiente.month, 1, tzinfo=dt_timezone.utc),
+    )
+
+
+# ==========================================================
+# 🔎 ESTADO
+# ==========================================================
+def es_particionada(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [TABLA])
+    return cursor.fetchone()[0] == "p"
+
+
+def particiones(cursor):
+    """Meses con partición propia, ordenados."""
+    cursor.execute(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = %s::regclass",
+        [TABLA],
+    )
+    meses = []
+    for (nombre,) in cursor.fetchall():
+        encontrado = PATRON_PARTICION.match(nombre)
+        if encontrado:
+            meses.append(date(int(encontrado[1]), int(encontrado[2]), 1))
+    return sorted(meses)
+
+
+def _columnas(cursor, tabla):
+    """Columnas que se pueden escribir (sin las generadas, p. ej. busqueda_vector)."""
+    cursor.execute(
+        """
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum
+        """,
+        [tabla],
+    )
+    return ", ".join(f'"{nombre}"' for (nombre,) in cursor.fetchall())
+
+
+# ==========================================================
+# ➕ CREAR / DESANCLAR
+# ==========================================================
+def crear_particion(cursor, mes):
+    """Crea la partición de `mes` si falta. Devuelve las filas sacadas del default (None si ya existía)."""
+    nombre = nombre_particion(mes)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [nombre])
+    if cursor.fetchone()[0]:
+        return None
+
+    inicio, fin = _limites(mes)
+    cursor.execute(f"SELECT count(*) FROM {DEFAULT} WHERE fecha_inicio >= %s AND fecha_inicio < %s", [inicio, fin])
+    movidas = cursor.fetchone()[0]
+
+    # Con filas del mes en el default, Postgres no deja crear la partición:
+    # se apartan, se crea y se reinsertan (por el padre, que las enruta)
+    if movidas:
+        columnas = _columnas(cursor, TABLA)
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE actividad_movidas ON COMMIT DROP AS
+            SELECT {columnas} FROM {DEFAULT} WHERE fecha_inicio >= %s AND fecha_inicio < %s
+            """,
+            [inicio, fin],
+        )
+        cursor.execute(f"DELETE FROM {DEFAULT} WHERE fecha_inicio >= %s AND fecha_inicio < %s", [inicio, fin])
+
+    cursor.execute(f"CREATE TABLE {nombre} PARTITION OF {TABLA} FOR VALUES FROM (%s) TO (%s)", [inicio, fin])
+
+    if movidas:
+        cursor.execute(f"INSERT INTO {TABLA} ({columnas}) SELECT {columnas} FROM actividad_movidas")
+        cursor.execute("DROP TABLE actividad_movidas")
+    return movidas
+
+
+def crear_particiones(cursor, desde, hasta):
+    """Particiones de los meses [desde, hasta]. Devuelve {mes: filas movidas} de las creadas."""
+    creadas, mes = {}, mes_de(desde)
+    while mes <= hasta:
+        movidas = crear_particion(cursor, mes)
+        if movidas is not None:
+            creadas[mes] = movidas
+        mes = sumar_meses(mes, 1)
+    return creadas
+
+
+def crear_futuras(cursor, meses=None):
+    """Del mes actual a `meses` por delante (HAWKEYE_ACTIVIDAD_PARTICIONES_FUTURAS)."""
+    if meses is None:
+        meses = settings.HAWKEYE_ACTIVIDAD_PARTICIONES_FUTURAS
+    actual = mes_de(timezone.now().astimezone(dt_timezone.utc))
+    return crear_particiones(cursor, actual, sumar_meses(actual, meses))
+
+
+def desanclar(cursor, mes):
+    """DETACH del mes: queda como tabla suelta (mismos datos e índices) para archivar o borrar."""
+    cursor.execute(f"ALTER TABLE {TABLA} DETACH PARTITION {nombre_particion(mes)}")
+
+
+# ==========================================================
+# 🔁 CONVERSIÓN (migración 0020)
+# ==========================================================
+def _reconstruir(cursor, particionada):
+    """
+    Copia api_actividad a una tabla nueva (particionada o normal) y la
+    sustituye, conservando columnas, CHECKs, índices y FKs con sus nombres.
+    Las FKs que apuntan a api_actividad se eliminan (ver cabecera).
+    """
+    nueva = f"{TABLA}_nueva"
+    columnas = _columnas(cursor, TABLA)
+
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary",
+        [TABLA],
+    )
+    # En una tabla particionada la definición sale como "ON ONLY"
+    indices = [definicion.replace(" ON ONLY ", " ON ", 1) for (definicion,) in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABLA],
+    )
+    fks = cursor.fetchall()
+
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'",
+        [TABLA],
+    )
+    for tabla, nombre in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {tabla} DROP CONSTRAINT {nombre}")
+
+    # Sin INCLUDING DEFAULTS/IDENTITY: el id pasa a una secuencia propia
+    # (las tablas particionadas no admiten identity antes de Postgres 17)
+    particion = " PARTITION BY RANGE (fecha_inicio)" if particionada else ""
+    cursor.execute(f"CREATE TABLE {nueva} (LIKE {TABLA} INCLUDING GENERATED INCLUDING CONSTRAINTS){particion}")
+    cursor.execute(f"CREATE SEQUENCE {nueva}_id_seq")
+    cursor.execute(f"ALTER TABLE {nueva} ALTER COLUMN id SET DEFAULT nextval('{nueva}_id_seq')")
+
+    if particionada:
+        cursor.execute(f"SELECT min(fecha_inicio) FROM {TABLA}")
+        primera = cursor.fetchone()[0]
+        actual = mes_de(timezone.now().astimezone(dt_timezone.utc))
+        desde = actual
+        if primera is not None:
+            desde = max(sumar_meses(actual, -ANTIGUEDAD_MAXIMA_MESES), mes_de(primera.astimezone(dt_timezone.utc)))
+        hasta = sumar_meses(actual, settings.HAWKEYE_ACTIVIDAD_PARTICIONES_FUTURAS)
+        mes = desde
+        while mes <= hasta:
+            inicio, fin = _limites(mes)
+            cursor.execute(
+                f"CREATE TABLE {nombre_particion(mes)} PARTITION OF {nueva} FOR VALUES FROM (%s) TO (%s)",
+                [inicio, fin],
+            )
+            mes = sumar_meses(mes, 1)
+        cursor.execute(f"CREATE TABLE {DEFAULT} PARTITION OF {nueva} DEFAULT")
+
+    cursor.execute(f"INSERT INTO {nueva} ({columnas}) SELECT {columnas} FROM {TABLA}")
+    cursor.execute(f"SELECT setval('{nueva}_id_seq', COALESCE(max(id), 0) + 1, false) FROM {nueva}")
+
+    cursor.execute(f"DROP TABLE {TABLA}")
+    cursor.execute(f"ALTER TABLE {nueva} RENAME TO {TABLA}")
+    cursor.execute(f"ALTER SEQUENCE {nueva}_id_seq RENAME TO {TABLA}_id_seq")
+    cursor.execute(f"ALTER SEQUENCE {TABLA}_id_seq OWNED BY {TABLA}.id")
+
+    clave = "id, fecha_inicio" if particionada else "id"
+    cursor.execute(f"ALTER TABLE {TABLA} ADD CONSTRAINT {TABLA}_pkey PRIMARY KEY ({clave})")
+    for definicion in indices:
+        cursor.execute(definicion)
+    for nombre, definicion in fks:
+        cursor.execute(f"ALTER TABLE {TABLA} ADD CONSTRAINT {nombre} {definicion}")
+
+
+def particionar(cursor):
+    if not es_particionada(cursor):
+        _reconstruir(cursor, particionada=True)
+
+
+def desparticionar(cursor, referencias=()):
+    """Vuelve a tabla normal y restaura las FKs `referencias` [(tabla, columna)] hacia api_actividad(id)."""
+    if es_particionada(cursor):
+        _reconstruir(cursor, particionada=False)
+        for tabla, columna in referencias:
+            cursor.execute(
+                f"""
+                ALTER TABLE {tabla} ADD CONSTRAINT {tabla}_{columna}_fk_{TABLA}
+                FOREIGN KEY ({columna}) REFERENCES {TABLA} (id) DEFERRABLE INITIALLY DEFERRED
+                """
+            )
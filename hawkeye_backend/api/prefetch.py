@@ -0,0 +1,104 @@
+# ============================================================
+# HAWKEYE — PLANES DE CONSULTA DERIVADOS DEL SERIALIZER
+# ============================================================
+#
+# Recorre el árbol de un serializer y devuelve los select_related /
+# prefetch_related que necesita para serializar N filas con un número fijo
+# de consultas:
+#   - FK / OneToOne anidadas o leídas con source="rel.campo" → JOIN
+#   - inversas / M2M → Prefetch(..., queryset con su propio plan)
+#   - PrimaryKeyRelatedField sobre FK → nada (DRF usa <campo>_id)
+# Los SerializerMethodField declaran lo que tocan en `relaciones_metodo`.
+
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import relations, serializers
+
+
+def _plan(serializer, model):
+    select, prefetch = [], []
+
+    for nombre, campo in serializer.fields.items():
+        if campo.write_only:
+            continue
+
+        if isinstance(campo, serializers.SerializerMethodField):
+            lookups = getattr(serializer, "relaciones_metodo", {}).get(nombre, ())
+            select.extend(l for l in lookups if l not in select)
+            continue
+
+        if campo.source == "*":
+            continue
+
+        raiz = campo.source.split(".")[0]
+        try:
+            field = model._meta.get_field(raiz)
+        except FieldDoesNotExist:
+            continue
+        if not field.is_relation:
+            continue
+
+        if isinstance(campo, serializers.ListSerializer):
+            hijo = campo.child
+        elif isinstance(campo, relations.ManyRelatedField):
+            hijo = campo.child_relation
+        else:
+            hijo = campo
+
+        anidado = isinstance(hijo, serializers.BaseSerializer)
+        directo = field.many_to_one or field.one_to_one
+
+        if directo:
+            solo_pk = isinstance(hijo, relations.PrimaryKeyRelatedField) and "." not in campo.source
+            if solo_pk:
+                continue
+            if raiz not in select:
+                select.append(raiz)
+            if anidado:
+                sub_select, sub_prefetch = _plan(hijo, field.related_model)
+                select.extend(f"{raiz}__{s}" for s in sub_select)
+                prefetch.extend(_prefijar(raiz, p) for p in sub_prefetch)
+            continue
+
+        # Inversa o M2M
+        if anidado:
+            sub_select, sub_prefetch = _plan(hijo, field.related_model)
+            queryset = field.related_model._default_manager.all()
+            if sub_select:
+                queryset = queryset.select_related(*sub_select)
+            if sub_prefetch:
+                queryset = queryset.prefetch_related(*sub_prefetch)
+            prefetch.append(Prefetch(raiz, queryset=queryset))
+        else:
+            prefetch.append(raiz)
+
+    return select, prefetch
+
+
+def _prefijar(raiz, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f"{raiz}__{lookup.prefetch_through}", queryset=lookup.queryset)
+    return f"{raiz}__{lookup}"
+
+
+@lru_cache(maxsize=None)
+def _plan_cacheado(serializer_class):
+    return _plan(serializer_class(), serializer_class.Meta.model)
+
+
+def plan_consultas(serializer_class):
+    """(select_related, prefetch_related) para serializar `serializer_class` sin N+1."""
+    select, prefetch = _plan_cacheado(serializer_class)
+    return list(select), list(prefetch)
+
+
+def aplicar_plan(queryset, serializer_class):
+    select, prefetch = plan_consultas(serializer_class)
+    # select_related() sin argumentos seguiría todas las FKs
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
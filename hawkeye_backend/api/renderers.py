@@ -0,0 +1,37 @@
+# ============================================================
+# HAWKEYE — RENDERER JSON CON orjson
+# ============================================================
+#
+# Reproduce la salida de rest_framework.renderers.JSONRenderer con la
+# configuración por defecto (compacto, UTF-8 sin escapar, U+2028/U+2029
+# escapados); la paridad se comprueba con `manage.py check_fast_list` y
+# en api/tests.py.
+# Si orjson no está instalado, o se pide indentación, delega en DRF.
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Fechas y horas por el encoder de DRF: orjson las escribiría con
+            # "+00:00" y microsegundos en vez de "Z" y milisegundos
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            # Tipos que orjson no acepta como claves o enteros > 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que DRF: separadores de línea JS escapados
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
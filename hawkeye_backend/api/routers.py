@@ -0,0 +1,203 @@
+# ============================================================
+# HAWKEYE — REPARTO DE FRANQUICIAS ENTRE BASES DE DATOS
+# ============================================================
+#
+# Cada franquicia vive en un alias de settings.DATABASES:
+#   Franquicia.base_datos (lo escribe move_franquicia)
+#   → settings.HAWKEYE_BASES_FRANQUICIA[codigo]
+#   → "default"
+#
+# - Tablas de tenant (TABLAS_TENANT y las intermedias de sus M2M): en la
+#   base de su franquicia. Dentro de una petición la base sale del usuario
+#   autenticado (TenantJWTAuthentication la fija, TenantDatabaseMiddleware
+#   la limpia); fuera, de la instancia o de usar_base().
+#   TenantQuerySet.para_usuario() además hace .using().
+# - Tablas globales (Franquicia, Oficina, User, auth, sesiones...): se leen y
+#   escriben siempre en "default". Sus filas se replican en cada base de
+#   tenant (señales + replicar_globales) para que las FKs y los JOIN de
+#   select_related sigan siendo locales. Los borrados no se replican:
+#   usuarios y oficinas se desactivan, no se borran.
+# - Todas las bases tienen el esquema completo: `migrate --database=<alias>`.
+# - Los ids no chocan entre bases: cada alias numera desde su bloque
+#   (separar_secuencias), así move_franquicia copia filas sin renumerar.
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT = "default"
+
+TABLAS_TENANT = {"cliente", "edificio", "inmueble", "pedido", "actividad", "searchdocument", "eliminacion"}
+
+# Ids de cada alias: [i * BLOQUE_IDS, (i + 1) * BLOQUE_IDS), i = posición en bases()
+BLOQUE_IDS = 10 ** 12
+
+_base = ContextVar("hawkeye_base", default=None)
+_franquicias = {"caduca": 0.0, "mapa": {}}
+
+
+# ==========================================================
+# 🗺️ FRANQUICIA → ALIAS
+# ==========================================================
+def _mapa():
+    """{franquicia_id: (alias, en_movimiento)}; se relee cada HAWKEYE_BASES_TTL segundos."""
+    ahora = time.monotonic()
+    if ahora >= _franquicias["caduca"]:
+        from .models import Franquicia
+
+        fijas = settings.HAWKEYE_BASES_FRANQUICIA
+        filas = Franquicia.objects.using(DEFAULT).values_list("pk", "codigo", "base_datos", "en_movimiento")
+        _franquicias["mapa"] = {
+            pk: (base_datos or fijas.get(codigo, DEFAULT), en_movimiento)
+            for pk, codigo, base_datos, en_movimiento in filas
+        }
+        _franquicias["caduca"] = ahora + settings.HAWKEYE_BASES_TTL
+    return _franquicias["mapa"]
+
+
+def olvidar_franquicias():
+    _franquicias["caduca"] = 0.0
+
+
+def alias_franquicia(franquicia_id):
+    if franquicia_id is None:
+        return DEFAULT
+    return _mapa().get(franquicia_id, (DEFAULT, False))[0]
+
+
+def en_movimiento(franquicia_id):
+    return franquicia_id is not None and _mapa().get(franquicia_id, (DEFAULT, False))[1]
+
+
+def bases():
+    """Todos los alias, "default" primero (el orden fija el bloque de ids)."""
+    return [DEFAULT] + [alias for alias in settings.DATABASES if alias != DEFAULT]
+
+
+def bases_tenant():
+    """Alias que pueden tener filas de tenant: default + los asignados a alguna franquicia."""
+    asignadas = set(settings.HAWKEYE_BASES_FRANQUICIA.values()) | {alias for alias, _ in _mapa().values()}
+    return [alias for alias in bases() if alias == DEFAULT or alias in asignadas]
+
+
+# ==========================================================
+# 🎯 BASE ACTUAL
+# ==========================================================
+def alias_actual():
+    return _base.get() or DEFAULT
+
+
+def conexion():
+    """Conexión de la base actual, para SQL a mano sobre tablas de tenant."""
+    return connections[alias_actual()]
+
+
+def fijar_usuario(user):
+    _base.set(alias_franquicia(user.franquicia_id))
+
+
+def limpiar():
+    _base.set(None)
+
+
+@contextmanager
+def usar_base(alias):
+    token = _base.set(alias)
+    try:
+        yield alias
+    finally:
+        _base.reset(token)
+
+
+def base_de(instance):
+    """Base de una instancia de tenant: la que la cargó o, si es nueva, la de su franquicia."""
+    return instance._state.db or alias_franquicia(getattr(instance, "franquicia_id", None))
+
+
+def es_tenant(model):
+    # Tablas intermedias automáticas de los M2M: viven con el modelo que declara
+    # el campo (Cliente.actividades → api_cliente_actividades, en la base del tenant)
+    model = model._meta.auto_created or model
+    return model._meta.app_label == "api" and model._meta.model_name in TABLAS_TENANT
+
+
+# ==========================================================
+# 🔀 ROUTER
+# ==========================================================
+class TenantRouter:
+    def db_for_read(self, model, **hints):
+        if not es_tenant(model):
+            return DEFAULT
+        # .set() / .add() de un M2M llegan con la tabla intermedia como
+        # `model` y el objeto de origen como instancia
+        instance = hints.get("instance")
+        if instance is not None and es_tenant(type(instance)):
+            return base_de(instance)
+        return alias_actual()
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Tenant ↔ global: las globales están replicadas en todas las bases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
+
+
+# ==========================================================
+# 🔁 RÉPLICA DE TABLAS GLOBALES
+# ==========================================================
+def _modelos_globales():
+    from .models import Franquicia, Oficina, User
+
+    # En orden de FKs
+    return [Franquicia, Oficina, User]
+
+
+def replicar(model, pks, destinos=None):
+    """Copia (upsert) las filas `pks` de `model` desde default a las bases de tenant."""
+    filas = list(model.objects.using(DEFAULT).filter(pk__in=pks).values())
+    if not filas:
+        return
+    campos = [f.attname for f in model._meta.concrete_fields if not f.primary_key]
+    for alias in destinos or bases_tenant():
+        if alias == DEFAULT:
+            continue
+        model.objects.using(alias).bulk_create(
+            [model(**fila) for fila in filas],
+            update_conflicts=True,
+            unique_fields=[model._meta.pk.name],
+            update_fields=campos,
+        )
+
+
+def replicar_globales(alias, batch=2000):
+    """Réplica completa de Franquicia, Oficina y User en `alias`. Devuelve filas por modelo."""
+    copiadas = {}
+    for model in _modelos_globales():
+        pks = list(model.objects.using(DEFAULT).values_list("pk", flat=True))
+        for i in range(0, len(pks), batch):
+            replicar(model, pks[i:i + batch], [alias])
+        copiadas[model.__name__] = len(pks)
+    return copiadas
+
+
+def separar_secuencias():
+    """Lleva las secuencias de tenant de cada alias al menos al inicio de su bloque de ids."""
+    from django.apps import apps
+
+    tablas = [m._meta.db_table for m in apps.get_app_config("api").get_models() if es_tenant(m)]
+    for indice, alias in enumerate(bases()):
+        if indice == 0:
+            continue
+        with connections[alias].cursor() as cursor:
+            for tabla in tablas:
+                cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [tabla])
+                secuencia = cursor.fetchone()[0]
+                cursor.execute(f"SELECT last_value FROM {secuencia}")
+                if cursor.fetchone()[0] < indice * BLOQUE_IDS:
+                    cursor.execute("SELECT setval(%s, %s, false)", [secuencia, indice * BLOQUE_IDS])
@@ -0,0 +1,887 @@
+# ============================================================
+# HAWKEYE — MOTORES DE BÚSQUEDA GLOBAL
+# ============================================================
+#
+# Cada motor recibe (q, franquicia_id, oficina_id) y devuelve el
+# diccionario de resultados que expone `global_search`:
+#
+#   {"clientes": [...], "inmuebles": [...], "edificios": [...],
+#    "pedidos": [...], "actividades": [...]}
+#
+# El motor se elige con settings.HAWKEYE_SEARCH_ENGINE y se puede
+# forzar por petición con ?engine=<nombre>:
+#
+#   orm   → 5 consultas ORM (comportamiento original)
+#   union → 1 consulta UNION ALL con los mismos predicados
+#   trgm  → 1 consulta con operadores trigram indexables + KNN
+#   documentos → 1 consulta sobre la tabla SearchDocument
+#   fts   → trgm + full-text en español (ts_rank_cd / ts_headline) para
+#           Pedido y Actividad
+#
+# Antes del motor, `buscar` enruta los identificadores (teléfono, email,
+# DNI/NIE, ref. catastral, CP) a búsquedas exactas por índice.
+
+import json
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.db import connections, transaction
+from django.db.models import F, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Concat, Reverse
+
+from .documents import normalizar
+from .metrics import rutas_busqueda
+from .models import Cliente, Inmueble, Edificio, Pedido, Actividad
+from .normalization import normalizar_telefono, normalizar_email, normalizar_documento
+from .routers import alias_franquicia, usar_base
+
+
+LIMITE_POR_ENTIDAD = 5
+
+
+def resultados_vacios():
+    return {
+        "clientes": [],
+        "inmuebles": [],
+        "edificios": [],
+        "pedidos": [],
+        "actividades": [],
+    }
+
+
+def escapar_like(valor):
+    """Escapa los comodines de LIKE igual que hace Django en icontains."""
+    return (
+        valor.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
+def filtro_tenant_q(franquicia_id, oficina_id=None):
+    # 🔥 Filtro multi-tenant obligatorio
+    filtro = Q(franquicia_id=franquicia_id)
+    if oficina_id:
+        filtro &= Q(oficina_id=oficina_id)
+    return filtro
+
+
+# ==========================================================
+# 🧾 FORMATO DE RESULTADOS (instancias ORM)
+# ==========================================================
+def resultado_cliente(c):
+    return {
+        "id": c.id,
+        "tipo": "cliente",
+        "nombre": c.nombre_apellidos_completo,
+        "email": c.email,
+        "telefono": c.telefono_movil,
+    }
+
+
+def resultado_inmueble(i):
+    return {
+        "id": i.id,
+        "tipo": "inmueble",
+        "direccion": i.direccion_busqueda,
+        "ref_catastral": i.ref_catastral,
+    }
+
+
+def resultado_edificio(e):
+    return {
+        "id": e.id,
+        "tipo": "edificio",
+        "direccion": f"{e.calle} {e.numero_calle}",
+        "cp": e.codigo_postal,
+    }
+
+
+def resultado_pedido(p):
+    return {
+        "id": p.id,
+        "tipo": "pedido",
+        "descripcion": p.descripcion,
+        "cliente": str(p.cliente),
+    }
+
+
+def resultado_actividad(a):
+    return {
+        "id": a.id,
+        "tipo": "actividad",
+        "descripcion": a.descripcion_publica or a.descripcion_empleado,
+        "fecha": a.fecha_inicio,
+    }
+
+
+# ==========================================================
+# 🐢 MOTOR ORM — 5 consultas (comportamiento original)
+# ==========================================================
+def buscar_orm(q, franquicia_id, oficina_id=None):
+    filtro_tenant = filtro_tenant_q(franquicia_id, oficina_id)
+
+    resultados = resultados_vacios()
+
+    # 1️⃣ CLIENTES
+    clientes = (
+        Cliente.objects.annotate(
+            sim=TrigramSimilarity("nombre_apellidos_completo", q)
+            + TrigramSimilarity("nombre_apellido", q)
+            + TrigramSimilarity("email", q)
+        )
+        .filter(filtro_tenant)
+        .filter(
+            Q(nombre_apellidos_completo__icontains=q)
+            | Q(nombre_apellido__icontains=q)
+            | Q(email__icontains=q)
+            | Q(telefono_movil__icontains=q)
+            | Q(num_identificacion__icontains=q)
+            | Q(sim__gt=0.2)  # 🔥 fuzzy search
+        )
+        .order_by("-sim")[:LIMITE_POR_ENTIDAD]
+    )
+
+    resultados["clientes"] = [resultado_cliente(c) for c in clientes]
+
+    # 2️⃣ INMUEBLES
+    inmuebles = (
+        Inmueble.objects.annotate(
+            sim=TrigramSimilarity("direccion_busqueda", q)
+            + TrigramSimilarity("ref_catastral", q)
+        )
+        .filter(filtro_tenant)
+        .filter(
+            Q(direccion_busqueda__icontains=q)
+            | Q(ref_catastral__icontains=q)
+            | Q(sim__gt=0.1)
+        )
+        .order_by("-sim")[:LIMITE_POR_ENTIDAD]
+    )
+
+    resultados["inmuebles"] = [resultado_inmueble(i) for i in inmuebles]
+
+    # 3️⃣ EDIFICIOS
+    edificios = (
+        Edificio.objects.annotate(
+            sim=TrigramSimilarity("calle", q)
+            + TrigramSimilarity("numero_calle", q)
+        )
+        .filter(filtro_tenant)
+        .filter(
+            Q(calle__icontains=q)
+            | Q(numero_calle__icontains=q)
+            | Q(sim__gt=0.1)
+        )
+        .order_by("-sim")[:LIMITE_POR_ENTIDAD]
+    )
+
+    resultados["edificios"] = [resultado_edificio(e) for e in edificios]
+
+    # 4️⃣ PEDIDOS
+    pedidos = (
+        Pedido.objects.annotate(
+            sim=TrigramSimilarity("descripcion", q)
+            + TrigramSimilarity("motivacion", q)
+            + TrigramSimilarity("tipo_inmueble", q)
+        )
+        .filter(filtro_tenant)
+        .filter(
+            Q(descripcion__icontains=q)
+            | Q(motivacion__icontains=q)
+            | Q(tipo_inmueble__icontains=q)
+            | Q(sim__gt=0.1)
+        )
+        .order_by("-sim")[:LIMITE_POR_ENTIDAD]
+    )
+
+    resultados["pedidos"] = [resultado_pedido(p) for p in pedidos]
+
+    # 5️⃣ ACTIVIDADES
+    actividades = (
+        Actividad.objects.annotate(
+            sim=TrigramSimilarity("descripcion_publica", q)
+            + TrigramSimilarity("descripcion_empleado", q)
+        )
+        .filter(filtro_tenant)
+        .filter(
+            Q(descripcion_publica__icontains=q)
+            | Q(descripcion_empleado__icontains=q)
+            | Q(sim__gt=0.1)
+        )
+        .order_by("-sim")[:LIMITE_POR_ENTIDAD]
+    )
+
+    resultados["actividades"] = [resultado_actividad(a) for a in actividades]
+
+    return resultados
+
+
+# ==========================================================
+# 🧱 PIEZAS SQL COMUNES
+# ==========================================================
+# Todas las ramas devuelven la misma forma:
+#   (grupo, id, campo_a, campo_b, campo_c, fecha)
+# y leen q / tenant del CTE `p`, así los parámetros viajan una sola vez.
+# El alias de la tabla principal es siempre `t`.
+
+ENTIDADES_SQL = {
+    "clientes": {
+        "from": "api_cliente t",
+        "select": "t.nombre_apellidos_completo::text, t.email::text, t.telefono_movil::text, NULL::timestamptz",
+    },
+    "inmuebles": {
+        "from": "api_inmueble t",
+        "select": "t.direccion_busqueda::text, t.ref_catastral::text, NULL::text, NULL::timestamptz",
+    },
+    "edificios": {
+        "from": "api_edificio t",
+        "select": "(t.calle || ' ' || t.numero_calle)::text, t.codigo_postal::text, NULL::text, NULL::timestamptz",
+    },
+    "pedidos": {
+        "from": "api_pedido t JOIN api_cliente cl ON cl.id = t.cliente_id",
+        "select": "t.descripcion::text, (cl.nombre || ' ' || cl.apellido1)::text, NULL::text, NULL::timestamptz",
+    },
+    "actividades": {
+        "from": "api_actividad t",
+        "select": "COALESCE(NULLIF(t.descripcion_publica, ''), t.descripcion_empleado)::text, NULL::text, NULL::text, t.fecha_inicio",
+    },
+}
+
+SQL_PARAMS = """
+WITH p AS (
+    SELECT %s::text AS q,
+           %s::text AS patron,
+           %s::bigint AS franquicia_id,
+           %s::bigint AS oficina_id
+)
+"""
+
+
+def _rama(grupo, where, orden):
+    entidad = ENTIDADES_SQL[grupo]
+    return f"""(
+    SELECT '{grupo}' AS grupo, t.id, {entidad["select"]}
+    FROM {entidad["from"]}, p
+    WHERE t.franquicia_id = p.franquicia_id
+      AND (p.oficina_id IS NULL OR t.oficina_id = p.oficina_id)
+      AND ({where})
+    ORDER BY {orden}
+    LIMIT {LIMITE_POR_ENTIDAD}
+)"""
+
+
+def _params_sql(q, franquicia_id, oficina_id):
+    return [q, f"%{escapar_like(q)}%", franquicia_id, oficina_id]
+
+
+def _fila_a_resultado(grupo, pk, campo_a, campo_b, campo_c, fecha):
+    if grupo == "clientes":
+        return {"id": pk, "tipo": "cliente", "nombre": campo_a, "email": campo_b, "telefono": campo_c}
+    if grupo == "inmuebles":
+        return {"id": pk, "tipo": "inmueble", "direccion": campo_a, "ref_catastral": campo_b}
+    if grupo == "edificios":
+        return {"id": pk, "tipo": "edificio", "direccion": campo_a, "cp": campo_b}
+    if grupo == "pedidos":
+        resultado = {"id": pk, "tipo": "pedido", "descripcion": campo_a, "cliente": campo_b}
+    else:
+        resultado = {"id": pk, "tipo": "actividad", "descripcion": campo_a, "fecha": fecha}
+    # Fragmento resaltado (ts_headline), solo en el motor fts
+    if campo_c is not None:
+        resultado["snippet"] = campo_c
+    return resultado
+
+
+def _agrupar(filas):
+    resultados = resultados_vacios()
+    for grupo, *resto in filas:
+        resultados[grupo].append(_fila_a_resultado(grupo, *resto))
+    return resultados
+
+
+# ==========================================================
+# ⚡ MOTOR UNION — 1 sola consulta (UNION ALL, top 5 por entidad)
+# ==========================================================
+# Mismos predicados y orden que el motor ORM, en una única ida y vuelta.
+
+RAMAS_UNION = {
+    "clientes": (
+        """t.nombre_apellidos_completo ILIKE p.patron
+         OR t.nombre_apellido ILIKE p.patron
+         OR t.email ILIKE p.patron
+         OR t.telefono_movil ILIKE p.patron
+         OR t.num_identificacion ILIKE p.patron
+         OR (similarity(t.nombre_apellidos_completo, p.q)
+             + similarity(t.nombre_apellido, p.q)
+             + similarity(t.email, p.q)) > 0.2""",
+        """similarity(t.nombre_apellidos_completo, p.q)
+           + similarity(t.nombre_apellido, p.q)
+           + similarity(t.email, p.q) DESC""",
+    ),
+    "inmuebles": (
+        """t.direccion_busqueda ILIKE p.patron
+         OR t.ref_catastral ILIKE p.patron
+         OR (similarity(t.direccion_busqueda, p.q)
+             + similarity(t.ref_catastral, p.q)) > 0.1""",
+        """similarity(t.direccion_busqueda, p.q)
+           + similarity(t.ref_catastral, p.q) DESC""",
+    ),
+    "edificios": (
+        """t.calle ILIKE p.patron
+         OR t.numero_calle ILIKE p.patron
+         OR (similarity(t.calle, p.q)
+             + similarity(t.numero_calle, p.q)) > 0.1""",
+        """similarity(t.calle, p.q)
+           + similarity(t.numero_calle, p.q) DESC""",
+    ),
+    "pedidos": (
+        """t.descripcion ILIKE p.patron
+         OR t.motivacion ILIKE p.patron
+         OR t.tipo_inmueble ILIKE p.patron
+         OR (similarity(t.descripcion, p.q)
+             + similarity(t.motivacion, p.q)
+             + similarity(t.tipo_inmueble, p.q)) > 0.1""",
+        """similarity(t.descripcion, p.q)
+           + similarity(t.motivacion, p.q)
+           + similarity(t.tipo_inmueble, p.q) DESC""",
+    ),
+    "actividades": (
+        """t.descripcion_publica ILIKE p.patron
+         OR t.descripcion_empleado ILIKE p.patron
+         OR (similarity(t.descripcion_publica, p.q)
+             + similarity(t.descripcion_empleado, p.q)) > 0.1""",
+        """similarity(t.descripcion_publica, p.q)
+           + similarity(t.descripcion_empleado, p.q) DESC""",
+    ),
+}
+
+SQL_UNION = SQL_PARAMS + "\nUNION ALL\n".join(
+    _rama(grupo, where, orden) for grupo, (where, orden) in RAMAS_UNION.items()
+)
+
+
+def buscar_union(q, franquicia_id, oficina_id=None):
+    with connections[alias_franquicia(franquicia_id)].cursor() as cursor:
+        cursor.execute(SQL_UNION, _params_sql(q, franquicia_id, oficina_id))
+        return _agrupar(cursor.fetchall())
+
+
+# ==========================================================
+# 🎯 MOTOR TRGM — operadores % / <% + orden KNN (<-> / <<->)
+# ==========================================================
+# A diferencia de `sim > 0.1` sobre una suma de similitudes, los
+# operadores % y <% sí pueden resolverse con los índices trigram, y el
+# ORDER BY por distancia permite que el GiST devuelva directamente el
+# top 5 sin calcular la similitud de todo el tenant.
+#
+# ⚠️ Cada `clave` DEBE ser idéntica a la expresión indexada en
+#    0008_trgm_gist_indexes, o Postgres no usará el índice.
+#
+#   operador "%"  → similarity_threshold,      orden clave <-> q
+#   operador "<%" → word_similarity_threshold, orden q <<-> clave
+
+RAMAS_TRGM = {
+    "clientes": {
+        "clave": "(t.nombre_apellidos_completo || ' ' || COALESCE(t.email, ''))",
+        "operador": "<%",
+    },
+    "inmuebles": {
+        "clave": "(t.direccion_busqueda || ' ' || COALESCE(t.ref_catastral, ''))",
+        "operador": "<%",
+    },
+    "edificios": {
+        "clave": "(t.calle || ' ' || t.numero_calle)",
+        "operador": "%",
+    },
+    "pedidos": {
+        "clave": "(COALESCE(t.descripcion, '') || ' ' || COALESCE(t.motivacion, '') || ' ' || COALESCE(t.tipo_inmueble, ''))",
+        "operador": "<%",
+    },
+    "actividades": {
+        "clave": "(COALESCE(t.descripcion_publica, '') || ' ' || COALESCE(t.descripcion_empleado, ''))",
+        "operador": "<%",
+    },
+}
+
+# Umbral por entidad (se puede sobrescribir con settings.HAWKEYE_TRGM_UMBRALES)
+UMBRALES_TRGM = {
+    "clientes": 0.5,
+    "inmuebles": 0.5,
+    "edificios": 0.3,
+    "pedidos": 0.6,
+    "actividades": 0.6,
+}
+
+
+def get_umbrales_trgm():
+    return {**UMBRALES_TRGM, **getattr(settings, "HAWKEYE_TRGM_UMBRALES", {})}
+
+
+def _rama_trgm(grupo, oficina_id):
+    entidad = ENTIDADES_SQL[grupo]
+    clave = RAMAS_TRGM[grupo]["clave"]
+
+    if RAMAS_TRGM[grupo]["operador"] == "%":
+        where = f"{clave} %% %(q)s AND similarity({clave}, %(q)s) >= %(umbral_{grupo})s"
+        orden = f"{clave} <-> %(q)s"
+    else:
+        where = f"%(q)s <%% {clave} AND word_similarity(%(q)s, {clave}) >= %(umbral_{grupo})s"
+        orden = f"%(q)s <<-> {clave}"
+
+    tenant = "t.franquicia_id = %(franquicia_id)s"
+    if oficina_id:
+        tenant += " AND t.oficina_id = %(oficina_id)s"
+
+    return f"""(
+    SELECT '{grupo}' AS grupo, t.id, {entidad["select"]}
+    FROM {entidad["from"]}
+    WHERE {tenant}
+      AND {where}
+    ORDER BY {orden}
+    LIMIT {LIMITE_POR_ENTIDAD}
+)"""
+
+
+def sql_trgm(oficina_id, grupos=None):
+    """SQL del motor trgm (todas las entidades o solo `grupos`)."""
+    grupos = grupos or list(RAMAS_TRGM)
+    return "\nUNION ALL\n".join(_rama_trgm(grupo, oficina_id) for grupo in grupos)
+
+
+def params_trgm(q, franquicia_id, oficina_id):
+    umbrales = get_umbrales_trgm()
+    params = {"q": q, "franquicia_id": franquicia_id, "oficina_id": oficina_id}
+    params.update({f"umbral_{grupo}": umbral for grupo, umbral in umbrales.items()})
+    return params
+
+
+def preparar_umbrales_trgm(cursor):
+    """
+    Fija los GUC de pg_trgm para la transacción actual. Se usa el umbral
+    más bajo de cada operador para que el índice no descarte candidatos;
+    cada rama vuelve a filtrar con su propio umbral.
+    """
+    umbrales = get_umbrales_trgm()
+    por_operador = {"%": [], "<%": []}
+    for grupo, rama in RAMAS_TRGM.items():
+        por_operador[rama["operador"]].append(umbrales[grupo])
+
+    cursor.execute(
+        "SELECT set_config('pg_trgm.similarity_threshold', %s, true), "
+        "set_config('pg_trgm.word_similarity_threshold', %s, true)",
+        [str(min(por_operador["%"] or [0.3])), str(min(por_operador["<%"] or [0.6]))],
+    )
+
+
+def buscar_trgm(q, franquicia_id, oficina_id=None):
+    alias = alias_franquicia(franquicia_id)
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        preparar_umbrales_trgm(cursor)
+        cursor.execute(sql_trgm(oficina_id), params_trgm(q, franquicia_id, oficina_id))
+        return _agrupar(cursor.fetchall())
+
+
+# ==========================================================
+# 📇 MOTOR DOCUMENTOS — 1 tabla desnormalizada (SearchDocument)
+# ==========================================================
+# Lee solo api_searchdocument: tsvector (GIN) para palabras completas o
+# prefijos y trigram (GIN) sobre `texto` para errores tipográficos. La
+# respuesta sale de `datos`, sin tocar las tablas origen.
+
+GRUPO_POR_TIPO = {
+    "cliente": "clientes",
+    "inmueble": "inmuebles",
+    "edificio": "edificios",
+    "pedido": "pedidos",
+    "actividad": "actividades",
+}
+
+
+def tsquery_prefijos(q):
+    """'maria gar' → 'maria:* & gar:*' (solo tokens alfanuméricos)."""
+    return " & ".join(f"{token}:*" for token in re.findall(r"\w+", normalizar(q)))
+
+
+def buscar_documentos(q, franquicia_id, oficina_id=None):
+    tsquery = tsquery_prefijos(q)
+    params = {
+        "q": normalizar(q),
+        "tsquery": tsquery,
+        "franquicia_id": franquicia_id,
+        "oficina_id": oficina_id,
+    }
+
+    coincide = "%(q)s <%% d.texto"
+    rango = "word_similarity(%(q)s, d.texto)"
+    if tsquery:
+        coincide = f"(d.vector @@ to_tsquery('simple', %(tsquery)s) OR {coincide})"
+        rango = f"ts_rank(d.vector, to_tsquery('simple', %(tsquery)s)) + {rango}"
+
+    tenant = "d.franquicia_id = %(franquicia_id)s"
+    if oficina_id:
+        tenant += " AND d.oficina_id = %(oficina_id)s"
+
+    sql = f"""
+        SELECT tipo, objeto_id, datos, fecha FROM (
+            SELECT d.tipo, d.objeto_id, d.datos, d.fecha,
+                   row_number() OVER (PARTITION BY d.tipo ORDER BY {rango} DESC) AS rn
+            FROM api_searchdocument d
+            WHERE {tenant}
+              AND {coincide}
+        ) x
+        WHERE rn <= {LIMITE_POR_ENTIDAD}
+    """
+
+    with connections[alias_franquicia(franquicia_id)].cursor() as cursor:
+        cursor.execute(sql, params)
+        filas = cursor.fetchall()
+
+    resultados = resultados_vacios()
+    for tipo, objeto_id, datos, fecha in filas:
+        if isinstance(datos, str):
+            datos = json.loads(datos)
+        resultado = {"id": objeto_id, "tipo": tipo, **datos}
+        if tipo == "actividad":
+            resultado["fecha"] = fecha
+        resultados[GRUPO_POR_TIPO[tipo]].append(resultado)
+    return resultados
+
+
+# ==========================================================
+# 📝 FULL-TEXT EN ESPAÑOL — Pedido / Actividad
+# ==========================================================
+# `busqueda_vector` es una columna generada (migración 0010) que el
+# modelo no declara; se referencia aquí con RawSQL.
+
+CONFIG_FTS = "spanish_unaccent"
+MARCA_INICIO = "<mark>"
+MARCA_FIN = "</mark>"
+
+# Campos con texto libre por modelo (peso A, peso B)
+CAMPOS_FTS = {
+    Pedido: ("descripcion", "motivacion"),
+    Actividad: ("descripcion_publica", "descripcion_empleado"),
+}
+
+
+def vector_fts(modelo):
+    return RawSQL(f'"{modelo._meta.db_table}"."busqueda_vector"', [], output_field=SearchVectorField())
+
+
+def buscar_texto(queryset, q):
+    """
+    Filtra `queryset` (Pedido o Actividad) por full-text, ordenado por
+    ts_rank_cd y anotado con `rank` y `snippet` (ts_headline).
+    """
+    query = SearchQuery(q, config=CONFIG_FTS, search_type="websearch")
+    a, b = CAMPOS_FTS[queryset.model]
+    texto = Concat(
+        Coalesce(a, Value("")), Value(" "), Coalesce(b, Value("")),
+        output_field=TextField(),
+    )
+    return (
+        queryset.alias(busqueda_vector=vector_fts(queryset.model))
+        .filter(busqueda_vector=query)
+        .annotate(
+            rank=SearchRank(F("busqueda_vector"), query, cover_density=True),
+            snippet=SearchHeadline(texto, query, config=CONFIG_FTS, start_sel=MARCA_INICIO, stop_sel=MARCA_FIN),
+        )
+        .order_by("-rank")
+    )
+
+
+# Motor fts: trgm para Cliente/Inmueble/Edificio + full-text para Pedido/Actividad
+SELECT_FTS = {
+    "pedidos": (
+        "t.descripcion::text, (cl.nombre || ' ' || cl.apellido1)::text, {headline}, NULL::timestamptz",
+        "COALESCE(t.descripcion, '') || ' ' || COALESCE(t.motivacion, '')",
+    ),
+    "actividades": (
+        "COALESCE(NULLIF(t.descripcion_publica, ''), t.descripcion_empleado)::text, NULL::text, {headline}, t.fecha_inicio",
+        "COALESCE(t.descripcion_publica, '') || ' ' || COALESCE(t.descripcion_empleado, '')",
+    ),
+}
+
+
+def _rama_fts(grupo, oficina_id):
+    select, texto = SELECT_FTS[grupo]
+    tsquery = f"websearch_to_tsquery('{CONFIG_FTS}', %(q)s)"
+    headline = (
+        f"ts_headline('{CONFIG_FTS}', {texto}, {tsquery}, "
+        f"'StartSel={MARCA_INICIO}, StopSel={MARCA_FIN}')"
+    )
+
+    tenant = "t.franquicia_id = %(franquicia_id)s"
+    if oficina_id:
+        tenant += " AND t.oficina_id = %(oficina_id)s"
+
+    return f"""(
+    SELECT '{grupo}' AS grupo, t.id, {select.format(headline=headline)}
+    FROM {ENTIDADES_SQL[grupo]["from"]}
+    WHERE {tenant}
+      AND t.busqueda_vector @@ {tsquery}
+    ORDER BY ts_rank_cd(t.busqueda_vector, {tsquery}) DESC
+    LIMIT {LIMITE_POR_ENTIDAD}
+)"""
+
+
+def buscar_fts(q, franquicia_id, oficina_id=None):
+    sql = "\nUNION ALL\n".join(
+        [sql_trgm(oficina_id, ["clientes", "inmuebles", "edificios"])]
+        + [_rama_fts(grupo, oficina_id) for grupo in SELECT_FTS]
+    )
+    alias = alias_franquicia(franquicia_id)
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        preparar_umbrales_trgm(cursor)
+        cursor.execute(sql, params_trgm(q, franquicia_id, oficina_id))
+        return _agrupar(cursor.fetchall())
+
+
+# ==========================================================
+# 🔀 REGISTRO DE MOTORES
+# ==========================================================
+MOTORES = {
+    "orm": buscar_orm,
+    "union": buscar_union,
+    "trgm": buscar_trgm,
+    "documentos": buscar_documentos,
+    "fts": buscar_fts,
+}
+
+
+def get_motor(nombre=None):
+    """Devuelve el motor pedido, o el configurado en settings si no existe."""
+    if nombre in MOTORES:
+        return MOTORES[nombre]
+    return MOTORES.get(getattr(settings, "HAWKEYE_SEARCH_ENGINE", "orm"), buscar_orm)
+
+
+# ==========================================================
+# 🧭 ROUTER — identificadores exactos antes que fuzzy
+# ==========================================================
+# La mayoría de búsquedas son identificadores (teléfono, email, DNI/NIE,
+# ref. catastral, CP). Esas van directas a los índices únicos / B-tree
+# (en Cliente, sobre las columnas *_norm); solo el texto libre (o un
+# identificador sin coincidencias) pasa al motor fuzzy configurado.
+
+RE_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+RE_DOCUMENTO = re.compile(
+    r"^(\d{8}[a-z]"                      # DNI
+    r"|[xyz]\d{7}[a-z]"                  # NIE
+    r"|[abcdefghjnpqrsuvw]\d{7}[0-9a-j])$"  # CIF
+)
+RE_REF_CATASTRAL = re.compile(r"^(?=.*\d)(?=.*[a-z])[0-9a-z]{14}(\d{4}[a-z]{2})?$")
+RE_CODIGO_POSTAL = re.compile(r"^\d{5}$")
+RE_TELEFONO = re.compile(r"^(\+|00)?\d{9,13}$")
+RE_SUFIJO_TELEFONO = re.compile(r"^\d{6,8}$")
+RE_SEPARADORES = re.compile(r"[\s\-.()/]")
+
+
+def compactar(q):
+    """Quita espacios y separadores típicos de identificadores."""
+    return RE_SEPARADORES.sub("", q)
+
+
+def clasificar(q):
+    """
+    Devuelve la ruta para `q`: email, documento, ref_catastral,
+    codigo_postal, telefono, sufijo_telefono o texto.
+    """
+    if RE_EMAIL.match(q):
+        return "email"
+
+    compacto = compactar(q)
+    if RE_DOCUMENTO.match(compacto):
+        return "documento"
+    if RE_REF_CATASTRAL.match(compacto):
+        return "ref_catastral"
+    if RE_CODIGO_POSTAL.match(compacto):
+        return "codigo_postal"
+    if RE_TELEFONO.match(compacto):
+        return "telefono"
+    if RE_SUFIJO_TELEFONO.match(compacto):
+        return "sufijo_telefono"
+    return "texto"
+
+
+def filtro_cliente_identificador(ruta, q):
+    """
+    Q exacto sobre las columnas *_norm de Cliente para la ruta dada, o
+    None si la ruta no es de cliente.
+    """
+    if ruta == "email":
+        email = normalizar_email(q)
+        return Q(email_norm=email) | Q(email_secundario_norm=email)
+    if ruta == "documento":
+        return Q(num_identificacion_norm=normalizar_documento(q))
+    if ruta == "telefono":
+        tel = normalizar_telefono(q)
+        return Q(telefono_movil_norm=tel) | Q(telefono_norm=tel)
+    if ruta == "sufijo_telefono":
+        return filtro_sufijo_telefono(q)
+    return None
+
+
+def filtro_sufijo_telefono(q):
+    """
+    Últimos N dígitos: reverse(col) LIKE 'dígitos_al_revés%', resuelto con
+    idx_cliente_movil_sufijo / idx_cliente_tel_sufijo (text_pattern_ops).
+    """
+    sufijo = normalizar_telefono(q)[::-1]
+    return Q(movil_rev__startswith=sufijo) | Q(tel_rev__startswith=sufijo)
+
+
+def clientes_por_identificador(ruta, q, tenant=Q(), queryset=None):
+    filtro = filtro_cliente_identificador(ruta, q)
+    queryset = (Cliente.objects.all() if queryset is None else queryset).filter(tenant)
+    if ruta == "sufijo_telefono":
+        queryset = queryset.alias(movil_rev=Reverse("telefono_movil_norm"), tel_rev=Reverse("telefono_norm"))
+    return queryset.filter(filtro)
+
+
+def _ruta_cliente(ruta):
+    def ruta_cliente(q, tenant):
+        clientes = clientes_por_identificador(ruta, q, tenant)[:LIMITE_POR_ENTIDAD]
+        return {"clientes": [resultado_cliente(c) for c in clientes]}
+    return ruta_cliente
+
+
+def _ruta_ref_catastral(q, tenant):
+    ref = compactar(q).upper()
+    if len(ref) == 20:
+        inmuebles = Inmueble.objects.filter(tenant, ref_catastral=ref)
+    else:
+        # Referencia de parcela (14): todos los inmuebles de la finca
+        inmuebles = Inmueble.objects.filter(tenant, ref_catastral__startswith=ref)
+    return {"inmuebles": [resultado_inmueble(i) for i in inmuebles[:LIMITE_POR_ENTIDAD]]}
+
+
+def _ruta_codigo_postal(q, tenant):
+    edificios = Edificio.objects.filter(tenant, codigo_postal=compactar(q))[:LIMITE_POR_ENTIDAD]
+    return {"edificios": [resultado_edificio(e) for e in edificios]}
+
+
+RUTAS_EXACTAS = {
+    "email": _ruta_cliente("email"),
+    "documento": _ruta_cliente("documento"),
+    "ref_catastral": _ruta_ref_catastral,
+    "codigo_postal": _ruta_codigo_postal,
+    "telefono": _ruta_cliente("telefono"),
+    "sufijo_telefono": _ruta_cliente("sufijo_telefono"),
+}
+
+
+def buscar(q, franquicia_id, oficina_id=None, motor=None):
+    """
+    Punto de entrada de global_search: enruta identificadores a búsquedas
+    exactas y el resto al motor fuzzy (`motor` o el de settings).
+    Registra la latencia por ruta en metrics.rutas_busqueda.
+    """
+    ruta = clasificar(q) if getattr(settings, "HAWKEYE_SEARCH_ROUTER", True) else "texto"
+
+    # Rutas exactas y motor ORM consultan por el router: base de la franquicia
+    with usar_base(alias_franquicia(franquicia_id)), rutas_busqueda.medir(ruta) as medicion:
+        if ruta in RUTAS_EXACTAS:
+            encontrados = RUTAS_EXACTAS[ruta](q, filtro_tenant_q(franquicia_id, oficina_id))
+            if any(encontrados.values()):
+                return {**resultados_vacios(), **encontrados}
+            # Parecía un identificador pero no existe → fuzzy
+            medicion["clave"] = f"{ruta}→texto"
+
+        return get_motor(motor)(q, franquicia_id, oficina_id)
+
+
+# ==========================================================
+# ⌨️ AUTOCOMPLETAR — /api/autocomplete/?tipo=...&q=...
+# ==========================================================
+# Solo id + label. Primero prefijo sobre índices btree text_pattern_ops
+# (franquicia_id, columna) — migración 0012 — ordenado con el operador de
+# la propia opclass (~<~) para que el índice también resuelva el ORDER BY.
+# Si el prefijo no encuentra nada, trigram con los GiST de RAMAS_TRGM.
+
+LIMITE_AUTOCOMPLETAR = 10
+MIN_TRGM_AUTOCOMPLETAR = 3
+
+AUTOCOMPLETAR = {
+    "cliente": {
+        "from": "api_cliente t",
+        "prefijo": "t.nombre_apellido",  # ya se guarda en minúsculas
+        "label": "t.nombre_apellidos_completo",
+        "grupo": "clientes",
+    },
+    "inmueble": {
+        "from": "api_inmueble t",
+        "prefijo": "t.direccion_busqueda",  # ya se guarda en minúsculas
+        "label": "t.direccion_busqueda",
+        "grupo": "inmuebles",
+    },
+    "edificio": {
+        "from": "api_edificio t",
+        "prefijo": "lower(t.calle)",
+        "label": "t.calle || ' ' || t.numero_calle",
+        "grupo": "edificios",
+    },
+}
+
+
+def _sql_autocompletar(tipo, oficina_id, modo):
+    conf = AUTOCOMPLETAR[tipo]
+
+    if modo == "prefijo":
+        where = f"{conf['prefijo']} LIKE %(patron)s"
+        orden = f"{conf['prefijo']} USING ~<~"
+    else:
+        clave = RAMAS_TRGM[conf["grupo"]]["clave"]
+        if RAMAS_TRGM[conf["grupo"]]["operador"] == "%":
+            where, orden = f"{clave} %% %(q)s", f"{clave} <-> %(q)s"
+        else:
+            where, orden = f"%(q)s <%% {clave}", f"%(q)s <<-> {clave}"
+
+    tenant = "t.franquicia_id = %(franquicia_id)s"
+    if oficina_id:
+        tenant += " AND t.oficina_id = %(oficina_id)s"
+
+    return f"""
+    SELECT t.id, ({conf["label"]})::text
+    FROM {conf["from"]}
+    WHERE {tenant}
+      AND {where}
+    ORDER BY {orden}
+    LIMIT {LIMITE_AUTOCOMPLETAR}
+    """
+
+
+def autocompletar(tipo, q, franquicia_id, oficina_id=None):
+    """Hasta LIMITE_AUTOCOMPLETAR sugerencias [{id, label}] de `tipo`."""
+    q = q.strip().lower()
+    if not q or not franquicia_id:
+        return []
+
+    params = {
+        "q": q,
+        "patron": escapar_like(q) + "%",
+        "franquicia_id": franquicia_id,
+        "oficina_id": oficina_id,
+    }
+
+    modos = ["prefijo"]
+    if len(q) >= MIN_TRGM_AUTOCOMPLETAR:
+        modos.append("trgm")
+
+    with connections[alias_franquicia(franquicia_id)].cursor() as cursor:
+        for modo in modos:
+            with rutas_busqueda.medir(f"autocomplete:{tipo}:{modo}"):
+                cursor.execute(_sql_autocompletar(tipo, oficina_id, modo), params)
+                filas = cursor.fetchall()
+            if filas:
+                return [{"id": id_, "label": label} for id_, label in filas]
+
+    return []
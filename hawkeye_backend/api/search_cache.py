@@ -0,0 +1,100 @@
+# ============================================================
+# HAWKEYE — CACHÉ DE RESULTADOS DE BÚSQUEDA
+# ============================================================
+#
+# Clave = (espacio, tenant, consulta tal cual la recibe el motor,
+# versiones de las entidades implicadas). Cada save/delete de una entidad
+# cambia, tras el COMMIT, su versión en los tres ámbitos que la ven
+# (global, franquicia, oficina), así que las entradas viejas dejan de
+# leerse sin tener que borrarlas.
+# El TTL solo es una red de seguridad.
+#
+# Backend: settings.CACHES[settings.HAWKEYE_SEARCH_CACHE] (por defecto un
+# FileBasedCache, compartido entre los workers de la misma máquina).
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import cache_busqueda
+
+ENTIDADES = ("cliente", "inmueble", "edificio", "pedido", "actividad")
+TODOS = "*"
+
+
+def _cache():
+    return caches[getattr(settings, "HAWKEYE_SEARCH_CACHE", "default")]
+
+
+def _ttl():
+    return getattr(settings, "HAWKEYE_SEARCH_CACHE_TTL", 600)
+
+
+def _clave_version(entidad, franquicia_id, oficina_id):
+    return f"hawkeye:ver:{entidad}:{franquicia_id}:{oficina_id}"
+
+
+def ambito(franquicia_id, oficina_id):
+    """Ámbito de datos que ve un usuario: global, franquicia u oficina."""
+    if not franquicia_id:
+        return TODOS, TODOS
+    return franquicia_id, oficina_id or TODOS
+
+
+# ==========================================================
+# 🔢 VERSIONES
+# ==========================================================
+def invalidar(entidad, franquicia_id, oficina_id):
+    """Llamado desde signals en cada save/delete de `entidad`."""
+    ahora = time.time_ns()
+    _cache().set_many(
+        {
+            _clave_version(entidad, TODOS, TODOS): ahora,
+            _clave_version(entidad, franquicia_id, TODOS): ahora,
+            _clave_version(entidad, franquicia_id, oficina_id): ahora,
+        },
+        timeout=None,
+    )
+
+
+def versiones(entidades, franquicia_id, oficina_id):
+    cache = _cache()
+    f, o = ambito(franquicia_id, oficina_id)
+    claves = [_clave_version(entidad, f, o) for entidad in entidades]
+    actuales = cache.get_many(claves)
+
+    # Versión desconocida (primera vez o expulsada): se crea una nueva para
+    # no reutilizar entradas calculadas con datos anteriores.
+    faltan = {clave: time.time_ns() for clave in claves if clave not in actuales}
+    if faltan:
+        cache.set_many(faltan, timeout=None)
+        actuales.update(faltan)
+
+    return [str(actuales[clave]) for clave in claves]
+
+
+# ==========================================================
+# 📦 LECTURA / ESCRITURA
+# ==========================================================
+def clave_resultado(espacio, franquicia_id, oficina_id, q, entidades=ENTIDADES):
+    f, o = ambito(franquicia_id, oficina_id)
+    vers = ".".join(versiones(entidades, franquicia_id, oficina_id))
+    # `q` exacta: los motores distinguen acentos (icontains / ILIKE), así que
+    # "garcía" y "garcia" no pueden compartir entrada
+    huella = hashlib.sha1(f"{q}|{vers}".encode()).hexdigest()
+    return f"hawkeye:busq:{espacio}:{f}:{o}:{huella}"
+
+
+def obtener_o_calcular(espacio, franquicia_id, oficina_id, q, calcular, entidades=ENTIDADES):
+    """Devuelve el resultado cacheado o lo calcula con `calcular()` y lo guarda."""
+    cache = _cache()
+    clave = clave_resultado(espacio, franquicia_id, oficina_id, q, entidades)
+
+    resultado = cache.get(clave)
+    cache_busqueda.registrar(espacio, resultado is not None)
+    if resultado is None:
+        resultado = calcular()
+        cache.set(clave, resultado, _ttl())
+    return resultado
@@ -10,20 +10,53 @@ from .models import (
     Oficina        # 🔥 necesario
 )
 
+from .mixins import parametros_campos
+
 User = get_user_model()   # 🔥 Usamos tu CustomUser real
 
 
+# ==========================================================
+# 🎛️ CAMPOS DINÁMICOS — ?fields= / ?omit= / ?expand=
+# ==========================================================
+
+class DynamicFieldsMixin:
+    """
+    Recorta la respuesta según la petición (solo en el serializer raíz y en GET):
+      ?fields=id,nombre   → solo esos campos
+      ?omit=actividades   → todos menos esos
+      ?expand=cliente     → sustituye el id por el objeto, según `expandable_fields`
+    Los serializers anidados se construyen sin contexto, así que no se ven afectados.
+    """
+
+    # nombre del campo → nombre del serializer (en este módulo) que lo expande
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        params = parametros_campos(self.context.get("request"))
+
+        for nombre in params["expand"] & set(self.expandable_fields):
+            serializer_class = globals()[self.expandable_fields[nombre]]
+            self.fields[nombre] = serializer_class(read_only=True)
+
+        if params["fields"]:
+            for nombre in set(self.fields) - params["fields"] - params["expand"]:
+                self.fields.pop(nombre)
+        for nombre in params["omit"]:
+            self.fields.pop(nombre, None)
+
+
 # ==========================================================
 # 🏢 FRANQUICIA & OFICINA
 # ==========================================================
 
-class FranquiciaSerializer(serializers.ModelSerializer):
+class FranquiciaSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Franquicia
         fields = '__all__'
 
 
-class OficinaSerializer(serializers.ModelSerializer):
+class OficinaSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     franquicia = FranquiciaSerializer(read_only=True)
     franquicia_id = serializers.PrimaryKeyRelatedField(
         queryset=Franquicia.objects.all(),
@@ -37,12 +70,12 @@ class OficinaSerializer(serializers.ModelSerializer):
         fields = '__all__'
         
 
-class FranquiciaMiniSerializer(serializers.ModelSerializer):
+class FranquiciaMiniSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Franquicia
         fields = ["id", "nombre", "codigo"]
 
-class OficinaMiniSerializer(serializers.ModelSerializer):
+class OficinaMiniSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Oficina
         fields = ["id", "nombre", "codigo"]
@@ -52,19 +85,19 @@ class OficinaMiniSerializer(serializers.ModelSerializer):
 # 🧩 USUARIOS Y ACTIVIDADES
 # ==========================================================
 
-class UsuarioMiniSerializer(serializers.ModelSerializer):
+class UsuarioMiniSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
 
-class ActividadSerializer(serializers.ModelSerializer):
+class ActividadSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     usuario_responsable = UsuarioMiniSerializer(source="creado_por", read_only=True)
 
     usuario_responsable_id = serializers.PrimaryKeyRelatedField(
@@ -77,6 +110,10 @@ class ActividadSerializer(serializers.ModelSerializer):
     franquicia = FranquiciaMiniSerializer(read_only=True)
     oficina = OficinaMiniSerializer(read_only=True)
 
+    # 🔎 Solo presentes al buscar con ?texto= (full-text)
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
     class Meta:
         model = Actividad
         fields = '__all__'
@@ -92,7 +129,7 @@ class ActividadSerializer(serializers.ModelSerializer):
 # 🏢 EDIFICIO
 # ==========================================================
 
-class EdificioSerializer(serializers.ModelSerializer):
+class EdificioSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     creado_por = UserSerializer(read_only=True)
     ultima_modificacion_por = UserSerializer(read_only=True)
     actividades = ActividadSerializer(many=True, read_only=True)
@@ -113,7 +150,7 @@ class EdificioSerializer(serializers.ModelSerializer):
 # 🏠 INMUEBLE
 # ==========================================================
 
-class InmuebleSerializer(serializers.ModelSerializer):
+class InmuebleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     creado_por = UserSerializer(read_only=True)
     ultima_modificacion_por = UserSerializer(read_only=True)
     actividades = ActividadSerializer(many=True, read_only=True)
@@ -145,6 +182,9 @@ class InmuebleSerializer(serializers.ModelSerializer):
     precio_venta = serializers.DecimalField(required=False, allow_null=True, max_digits=12, decimal_places=2)
     comision = serializers.DecimalField(required=False, allow_null=True, max_digits=6, decimal_places=2)
 
+    # Relaciones que leen get_edificio / get_propietario (api/prefetch.py)
+    relaciones_metodo = {"edificio": ("edificio",), "propietario": ("propietario",)}
+
     class Meta:
         model = Inmueble
         fields = '__all__'
@@ -213,7 +253,7 @@ class InmuebleSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class PedidoSerializer(serializers.ModelSerializer):
+class PedidoSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # ===============================
     # USUARIOS (solo lectura)
     # ===============================
@@ -254,6 +294,15 @@ class PedidoSerializer(serializers.ModelSerializer):
         help_text="Alias del front. Se mapea a precio_max."
     )
 
+    # ===============================
+    # 🔎 FULL-TEXT (solo con ?texto=)
+    # ===============================
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    # Relación que lee get_cliente (api/prefetch.py)
+    relaciones_metodo = {"cliente": ("cliente",)}
+
     class Meta:
         model = Pedido
         fields = '__all__'
@@ -263,6 +312,7 @@ class PedidoSerializer(serializers.ModelSerializer):
             "creado_por",
             "ultima_modificacion_por",
             "fecha_ultima_modificacion",
+            "fecha_ultimo_contacto",
         )
 
     # ===============================
@@ -293,57 +343,41 @@ class PedidoSerializer(serializers.ModelSerializer):
         return attrs
 
     # ===============================
-    # OVERRIDE CREATE
-    # Mapea alias → campos reales
+    # ALIAS → CAMPOS REALES
+    # (create, update y altas/ediciones en lote)
     # ===============================
-    def create(self, validated_data):
-
+    MAPEO_TIPO_PEDIDO = {
+        "Compra": "comprar",
+        "compra": "comprar",
+        "Comprar": "comprar",
+        "Alquiler": "alquiler",
+        "alquiler": "alquiler",
+        "Traspaso": "traspaso",
+        "traspaso": "traspaso",
+    }
+
+    def aplicar_alias(self, validated_data, instance=None):
         # Alias tipo_pedido → tipo_operacion
         tipo_pedido = validated_data.pop("tipo_pedido", None)
-
         if tipo_pedido:
-            mapping = {
-                "Compra": "comprar",
-                "compra": "comprar",
-                "Comprar": "comprar",
-                "Alquiler": "alquiler",
-                "alquiler": "alquiler",
-                "Traspaso": "traspaso",
-                "traspaso": "traspaso",
-            }
-            validated_data["tipo_operacion"] = mapping.get(tipo_pedido, "comprar")
+            defecto = instance.tipo_operacion if instance else "comprar"
+            validated_data["tipo_operacion"] = self.MAPEO_TIPO_PEDIDO.get(tipo_pedido, defecto)
 
         # Alias presupuesto → precio_max
         presupuesto = validated_data.pop("presupuesto", None)
         if presupuesto is not None:
             validated_data["precio_max"] = presupuesto
 
-        return super().create(validated_data)
+        return validated_data
 
     # ===============================
-    # OVERRIDE UPDATE
-    # Mantiene la coherencia con castings
+    # OVERRIDE CREATE / UPDATE
     # ===============================
-    def update(self, instance, validated_data):
-
-        tipo_pedido = validated_data.pop("tipo_pedido", None)
-        if tipo_pedido:
-            mapping = {
-                "Compra": "comprar",
-                "compra": "comprar",
-                "Comprar": "comprar",
-                "Alquiler": "alquiler",
-                "alquiler": "alquiler",
-                "Traspaso": "traspaso",
-                "traspaso": "traspaso",
-            }
-            validated_data["tipo_operacion"] = mapping.get(tipo_pedido, instance.tipo_operacion)
-
-        presupuesto = validated_data.pop("presupuesto", None)
-        if presupuesto is not None:
-            validated_data["precio_max"] = presupuesto
+    def create(self, validated_data):
+        return super().create(self.aplicar_alias(validated_data))
 
-        return super().update(instance, validated_data)
+    def update(self, instance, validated_data):
+        return super().update(instance, self.aplicar_alias(validated_data, instance))
 
 
 
@@ -351,7 +385,7 @@ class PedidoSerializer(serializers.ModelSerializer):
 # 👤 CLIENTE
 # ==========================================================
 
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     creado_por = UserSerializer(read_only=True)
     ultima_modificacion_por = UserSerializer(read_only=True)
     actividades = ActividadSerializer(many=True, read_only=True)
@@ -371,10 +405,11 @@ class ClienteSerializer(serializers.ModelSerializer):
             "creado_por",
             "ultima_modificacion_por",
             "fecha_ultima_modificacion",
+            "fecha_ultimo_contacto",
         )
 
 
-class ClienteSimpleSerializer(serializers.ModelSerializer):
+class ClienteSimpleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Cliente
         fields = [
@@ -387,6 +422,168 @@ class ClienteSimpleSerializer(serializers.ModelSerializer):
             'email'
         ]
 
+# ==========================================================
+# 📋 LISTADOS — serializers compactos (acción `list`)
+# ==========================================================
+# Sin relaciones anidadas: ids, columnas propias y campos de estado (las
+# columnas que pintan los listados del frontend). Lo relacionado se pide con
+# ?expand= (p. ej. /pedidos/?expand=cliente). Los serializers completos de
+# arriba se usan en retrieve / create / update.
+
+class ClienteListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"franquicia": "FranquiciaMiniSerializer", "oficina": "OficinaMiniSerializer"}
+
+    class Meta:
+        model = Cliente
+        fields = [
+            "id",
+            "nombre",
+            "apellido1",
+            "apellido2",
+            "nombre_apellidos_completo",
+            "trato",
+            "sexo",
+            "tipo_documento",
+            "num_identificacion",
+            "direccion",
+            "info_adicional",
+            "telefono",
+            "telefono_movil",
+            "email",
+            "dias_ultimo_contacto",
+            "fecha_ultima_modificacion",
+            "franquicia",
+            "oficina",
+        ]
+
+
+class EdificioListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"franquicia": "FranquiciaMiniSerializer", "oficina": "OficinaMiniSerializer"}
+
+    class Meta:
+        model = Edificio
+        fields = [
+            "id",
+            "calle",
+            "numero_calle",
+            "codigo_postal",
+            "provincia",
+            "tipo_finca",
+            "anio_construccion",
+            "latitud",
+            "longitud",
+            "fecha_ultima_modificacion",
+            "franquicia",
+            "oficina",
+        ]
+
+
+class InmuebleListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"edificio": "EdificioListSerializer", "propietario": "ClienteListSerializer"}
+
+    propietario_nombre = serializers.CharField(
+        source="propietario.nombre_apellidos_completo", read_only=True, default=None
+    )
+
+    class Meta:
+        model = Inmueble
+        fields = [
+            "id",
+            "direccion_busqueda",
+            "edificio",
+            "planta",
+            "puerta",
+            "ref_catastral",
+            "propietario",
+            "propietario_nombre",
+            "ocupado_por",
+            "estado_CRM",
+            "motivacion",
+            "prioridad_noticia",
+            "precio_pedido_cliente",
+            "precio_venta",
+            "fecha_ultima_venta_alquiler",
+            "habitaciones",
+            "banos",
+            "estancias",
+            "balcon",
+            "jardin",
+            "fecha_ultimo_contacto",
+            "dias_ultimo_contacto",
+            "fecha_ultima_modificacion",
+            "latitud",
+            "longitud",
+            "franquicia",
+            "oficina",
+        ]
+
+
+class PedidoListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"cliente": "ClienteListSerializer"}
+
+    cliente_nombre = serializers.CharField(source="cliente.nombre_apellidos_completo", read_only=True)
+
+    # 🔎 Solo presentes al buscar con ?texto=
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Pedido
+        fields = [
+            "id",
+            "cliente",
+            "cliente_nombre",
+            "tipo_operacion",
+            "tipo_inmueble",
+            "estado_pedido",
+            "estado_negociacion",
+            "prioridad",
+            "precio_min",
+            "precio_max",
+            "fecha",
+            "fecha_limite",
+            "fecha_ultima_modificacion",
+            "franquicia",
+            "oficina",
+            "rank",
+            "snippet",
+        ]
+
+
+class ActividadListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "cliente": "ClienteListSerializer",
+        "inmueble": "InmuebleListSerializer",
+        "pedido": "PedidoListSerializer",
+    }
+
+    usuario_responsable = UsuarioMiniSerializer(source="creado_por", read_only=True)
+
+    # 🔎 Solo presentes al buscar con ?texto=
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Actividad
+        fields = [
+            "id",
+            "tipo",
+            "estado",
+            "fecha_inicio",
+            "fecha_fin",
+            "descripcion_publica",
+            "descripcion_empleado",
+            "cliente",
+            "inmueble",
+            "pedido",
+            "usuario_responsable",
+            "franquicia",
+            "oficina",
+            "rank",
+            "snippet",
+        ]
+
+
 # ==========================================================
 # 🔐 REGISTRO DE USUARIOS
 # ==========================================================
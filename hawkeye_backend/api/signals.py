@@ -0,0 +1,148 @@
+# ============================================================
+# HAWKEYE — SEÑALES
+# ============================================================
+
+from django.db import connections, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import documents, routers, search_cache
+from .models import Cliente, Inmueble, Edificio, Pedido, Actividad, Eliminacion, Franquicia, Oficina, User
+
+
+# Guardados que no cambian nada de lo que se busca o se muestra
+CAMPOS_SIN_DOCUMENTO = {"fecha_ultimo_contacto", "dias_ultimo_contacto"}
+
+
+# ==========================================================
+# 🔎 SearchDocument — sincronización incremental
+# ==========================================================
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Inmueble)
+@receiver(post_save, sender=Edificio)
+@receiver(post_save, sender=Pedido)
+@receiver(post_save, sender=Actividad)
+def sincronizar_documento(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields and set(update_fields) <= CAMPOS_SIN_DOCUMENTO:
+        return
+
+    documents.sincronizar(instance)
+
+    # El nombre del cliente se muestra en los documentos de sus pedidos
+    if sender is Cliente:
+        _renombrar_cliente_en_pedidos([instance])
+
+
+def _renombrar_cliente_en_pedidos(clientes):
+    if not clientes:
+        return
+    with connections[routers.base_de(clientes[0])].cursor() as cursor:
+        for cliente in clientes:
+            cursor.execute(
+                """
+                UPDATE api_searchdocument
+                SET datos = jsonb_set(datos, '{cliente}', to_jsonb(%s::text))
+                WHERE tipo = 'pedido'
+                  AND objeto_id IN (SELECT id FROM api_pedido WHERE cliente_id = %s)
+                """,
+                [str(cliente), cliente.pk],
+            )
+
+
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Inmueble)
+@receiver(post_delete, sender=Edificio)
+@receiver(post_delete, sender=Pedido)
+@receiver(post_delete, sender=Actividad)
+def eliminar_documento(sender, instance, **kwargs):
+    documents.eliminar(instance)
+
+
+# ==========================================================
+# 🪦 Tombstones para la sincronización incremental (/sync/)
+# ==========================================================
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Inmueble)
+@receiver(post_delete, sender=Edificio)
+@receiver(post_delete, sender=Pedido)
+@receiver(post_delete, sender=Actividad)
+def registrar_eliminacion(sender, instance, **kwargs):
+    Eliminacion.objects.using(routers.base_de(instance)).create(
+        tipo=sender._meta.model_name,
+        objeto_id=instance.pk,
+        franquicia_id=instance.franquicia_id,
+        oficina_id=instance.oficina_id,
+    )
+
+
+# ==========================================================
+# 🧊 Caché de búsqueda — invalidación por versión
+# ==========================================================
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Inmueble)
+@receiver(post_save, sender=Edificio)
+@receiver(post_save, sender=Pedido)
+@receiver(post_save, sender=Actividad)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Inmueble)
+@receiver(post_delete, sender=Edificio)
+@receiver(post_delete, sender=Pedido)
+@receiver(post_delete, sender=Actividad)
+def invalidar_cache_busqueda(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidar_al_confirmar(sender, {(instance.franquicia_id, instance.oficina_id)}, using)
+
+
+def _invalidar_al_confirmar(sender, tenants, using):
+    """
+    Cambia la versión tras el COMMIT: si se hiciera dentro de la transacción,
+    una búsqueda concurrente podría cachear bajo la versión nueva los datos
+    de antes del cambio (sin transacción abierta, on_commit ejecuta ya).
+    """
+    entidades = [sender._meta.model_name]
+    # El nombre del cliente aparece en los resultados de sus pedidos
+    if sender is Cliente:
+        entidades.append("pedido")
+
+    def invalidar():
+        for franquicia_id, oficina_id in tenants:
+            for entidad in entidades:
+                search_cache.invalidar(entidad, franquicia_id, oficina_id)
+
+    transaction.on_commit(invalidar, using=using)
+
+
+# ==========================================================
+# 📦 Lotes — bulk_create / bulk_update no envían post_save
+# ==========================================================
+def lote_guardado(sender, instances, creados=False):
+    """Mismo efecto que los receivers de post_save, una vez por lote (api/bulk.py)."""
+    if not instances:
+        return
+
+    documents.sincronizar_lote(instances)
+    if sender is Cliente and not creados:
+        # Un cliente recién creado aún no tiene pedidos
+        _renombrar_cliente_en_pedidos(instances)
+
+    _invalidar_al_confirmar(
+        sender, {(i.franquicia_id, i.oficina_id) for i in instances}, routers.base_de(instances[0])
+    )
+
+
+# ==========================================================
+# 🌐 Tablas globales — réplica en las bases de tenant
+# ==========================================================
+@receiver(post_save, sender=Franquicia)
+@receiver(post_save, sender=Oficina)
+@receiver(post_save, sender=User)
+def replicar_global(sender, instance, using, raw=False, **kwargs):
+    # Solo lo escrito en default; la propia réplica no vuelve a replicarse
+    if raw or using != routers.DEFAULT:
+        return
+    if sender is Franquicia:
+        routers.olvidar_franquicias()
+    routers.replicar(sender, [instance.pk])
@@ -0,0 +1,176 @@
+# ============================================================
+# HAWKEYE — SINCRONIZACIÓN INCREMENTAL (/sync/?since=<token>)
+# ============================================================
+#
+# Cada ventana de sincronización cubre las filas con desde <= version_tx <
+# hasta. Se recorre por fases (clientes, inmuebles, edificios, pedidos,
+# actividades, eliminaciones), cada una por keyset (version_tx, id), y el
+# token guarda la posición exacta: si la página se llena a mitad de fase,
+# la siguiente petición continúa ahí mismo con el mismo `hasta`. Al
+# terminar la última fase el token abre la ventana siguiente con desde = hasta.
+#
+# - version_tx es el txid de la transacción que escribió la fila (trigger,
+#   migración 0022) y `hasta` es pg_snapshot_xmin(): toda transacción por
+#   debajo ya terminó, así que ninguna fila puede aparecer más tarde con un
+#   version_tx dentro de una ventana ya entregada. Una fecha (auto_now, que
+#   se calcula en Python antes del COMMIT) no da esa garantía.
+# - Los txid son de cada base: si la franquicia cambia de base
+#   (move_franquicia) el token deja de valer y toca volcado completo.
+# - Sin token, o con uno más antiguo que la retención de tombstones, la
+#   ventana es un volcado completo ("completo": true): el cliente debe
+#   descartar lo que no reciba.
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from . import routers
+
+from .fast_serializers import listado_rapido
+from .models import Cliente, Edificio, Inmueble, Pedido, Actividad, Eliminacion
+from .prefetch import aplicar_plan
+from .serializers import (
+    ActividadListSerializer,
+    ClienteListSerializer,
+    EdificioListSerializer,
+    InmuebleListSerializer,
+    PedidoListSerializer,
+)
+
+SALT = "hawkeye.sync"
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# (clave de la respuesta, modelo, serializer de listado)
+ENTIDADES = [
+    ("clientes", Cliente, ClienteListSerializer),
+    ("inmuebles", Inmueble, InmuebleListSerializer),
+    ("edificios", Edificio, EdificioListSerializer),
+    ("pedidos", Pedido, PedidoListSerializer),
+    ("actividades", Actividad, ActividadListSerializer),
+]
+CLAVE_POR_TIPO = {model._meta.model_name: clave for clave, model, _ in ENTIDADES}
+FASE_ELIMINACIONES = len(ENTIDADES)
+
+
+class TokenInvalido(Exception):
+    pass
+
+
+# ==========================================================
+# 🎟️ TOKEN
+# ==========================================================
+# Microsegundos enteros desde EPOCA: exactos, a diferencia de timestamp()
+def _us(fecha):
+    return None if fecha is None else (fecha - EPOCA) // timedelta(microseconds=1)
+
+
+def _fecha(us):
+    return None if us is None else EPOCA + timedelta(microseconds=us)
+
+
+def _token(base, instante, desde, hasta=None, fase=0, cursor=None):
+    version, pk = cursor or (None, None)
+    return signing.dumps([base, _us(instante), desde, hasta, fase, version, pk], salt=SALT, compress=True)
+
+
+def _leer_token(token):
+    try:
+        base, instante, desde, hasta, fase, version, pk = signing.loads(token, salt=SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise TokenInvalido(token)
+    cursor = (version, pk) if pk is not None else None
+    return base, _fecha(instante), desde, hasta, fase, cursor
+
+
+def _marca(alias):
+    """Primer txid que puede seguir en curso en `alias`: todo lo anterior ya está confirmado o abortado."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        return cursor.fetchone()[0]
+
+
+def _con_version(queryset):
+    # version_tx es solo de BD (no está en los modelos)
+    return queryset.annotate(version_tx=RawSQL(f'"{queryset.model._meta.db_table}"."version_tx"', ()))
+
+
+# ==========================================================
+# 📦 FASES
+# ==========================================================
+def _pagina(queryset, cursor, limite, *extra):
+    """Hasta `limite` filas (version_tx, pk, *extra) en orden keyset, y si quedan más."""
+    if cursor:
+        version, pk = cursor
+        queryset = queryset.filter(Q(version_tx__gt=version) | Q(version_tx=version, pk__gt=pk))
+    filas = list(queryset.order_by("version_tx", "pk").values_list("version_tx", "pk", *extra)[:limite + 1])
+    return filas[:limite], len(filas) > limite
+
+
+def _serializar(model, serializer_class, pks, request):
+    queryset = _con_version(model.objects.filter(pk__in=pks)).order_by("version_tx", "pk")
+    serializer = serializer_class(context={"request": request})
+    rapido = listado_rapido(serializer, queryset)
+    if rapido is not None:
+        return rapido.representar(rapido.queryset(queryset))
+    return serializer_class(aplicar_plan(queryset, serializer_class), many=True, context={"request": request}).data
+
+
+def sincronizar(request, token=None, limite=None):
+    user = request.user
+    limite = min(limite or settings.HAWKEYE_SYNC_LIMITE, settings.HAWKEYE_SYNC_LIMITE_MAX)
+    ahora = timezone.now()
+    alias = routers.alias_franquicia(user.franquicia_id)
+
+    if token:
+        base, instante, desde, hasta, fase, cursor = _leer_token(token)
+        if base != alias:
+            # La franquicia cambió de base: sus txid no se comparan con los de aquí
+            desde, hasta, fase, cursor = None, None, 0, None
+    else:
+        instante, desde, hasta, fase, cursor = None, None, None, 0, None
+
+    if hasta is None:
+        # Ventana nueva: `instante` pasa a ser el de su corte
+        if desde is not None and instante < ahora - timedelta(days=settings.HAWKEYE_SYNC_RETENCION_DIAS):
+            desde = None  # los tombstones ya no cubren el hueco: volcado completo
+        hasta, instante = _marca(alias), ahora
+
+    cambios, eliminados, restantes = {}, {}, limite
+
+    while fase <= FASE_ELIMINACIONES and restantes > 0:
+        if fase < FASE_ELIMINACIONES:
+            clave, model, serializer_class = ENTIDADES[fase]
+            queryset = _con_version(model.objects.para_usuario(user)).filter(version_tx__lt=hasta)
+            if desde is not None:
+                queryset = queryset.filter(version_tx__gte=desde)
+            filas, hay_mas = _pagina(queryset, cursor, restantes)
+            if filas:
+                cambios[clave] = _serializar(model, serializer_class, [fila[1] for fila in filas], request)
+        elif desde is not None:
+            queryset = _con_version(Eliminacion.objects.para_usuario(user)).filter(version_tx__gte=desde, version_tx__lt=hasta)
+            filas, hay_mas = _pagina(queryset, cursor, restantes, "tipo", "objeto_id")
+            for _, _, tipo, objeto_id in filas:
+                eliminados.setdefault(CLAVE_POR_TIPO[tipo], []).append(objeto_id)
+        else:
+            filas, hay_mas = [], False  # volcado completo: no hay nada que borrar
+
+        restantes -= len(filas)
+        if hay_mas:
+            cursor = filas[-1][:2]
+        else:
+            fase, cursor = fase + 1, None
+
+    terminado = fase > FASE_ELIMINACIONES
+    return {
+        "token": _token(alias, instante, hasta) if terminado else _token(alias, instante, desde, hasta, fase, cursor),
+        "hay_mas": not terminado,
+        "completo": desde is None,
+        "hasta": instante,
+        "cambios": cambios,
+        "eliminados": eliminados,
+    }
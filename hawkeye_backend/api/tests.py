@@ -1,3 +1,1004 @@
-from django.test import TestCase
+import json
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipIf, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from . import bulk, importacion, mover, renderers, routers
+from .mixins import FastListMixin
+from .models import Franquicia, Oficina, User, Role, Cliente, Edificio, Inmueble, Pedido, Actividad, Eliminacion
+from .normalization import normalizar_documento, normalizar_email, normalizar_telefono
+from .search import LIMITE_POR_ENTIDAD, RAMAS_TRGM, RUTAS_EXACTAS, buscar, clasificar, sql_trgm, params_trgm, preparar_umbrales_trgm
+from .urls import router
+from .views import ActividadViewSet, InmuebleViewSet, PedidoViewSet, sync
+
+
+# ==========================================================
+# 🧪 DATOS DE PRUEBA
+# ==========================================================
+CALLES = ["mayor", "alcala", "gran via", "serrano", "princesa", "atocha", "toledo", "goya"]
+NOMBRES = ["maria", "jose", "lucia", "antonio", "carmen", "manuel", "laura", "david"]
+APELLIDOS = ["garcia", "lopez", "martinez", "sanchez", "perez", "gomez", "ruiz", "diaz"]
+
+
+def crear_tenant(codigo, base_datos=""):
+    franquicia = Franquicia.objects.create(nombre=f"Franquicia {codigo}", codigo=codigo, base_datos=base_datos)
+    oficina = Oficina.objects.create(franquicia=franquicia, nombre=f"Oficina {codigo}", codigo=f"{codigo}-1")
+    return franquicia, oficina
+
+
+def crear_usuario(franquicia, oficina, username="agente"):
+    return User.objects.create_user(
+        username=username, password="x", role=Role.OFICINA_ADMIN, franquicia=franquicia, oficina=oficina
+    )
+
+
+def poblar(franquicia, oficina, n, usuario=None):
+    """`n` filas de cada entidad con texto variado (bulk_create: sin señales)."""
+    tenant = {"franquicia": franquicia, "oficina": oficina, "creado_por": usuario}
+    ahora = timezone.now()
+
+    edificios = Edificio.objects.bulk_create([
+        Edificio(**tenant, calle=f"calle {CALLES[i % 8]} {i}", numero_calle=str(i % 200), codigo_postal=f"{28000 + i % 60:05d}")
+        for i in range(n)
+    ])
+
+    clientes = []
+    for i in range(n):
+        cliente = Cliente(
+            **tenant,
+            nombre=NOMBRES[i % 8],
+            apellido1=APELLIDOS[(i // 8) % 8],
+            apellido2=f"{APELLIDOS[i % 7]}{i}",
+            email=f"{NOMBRES[i % 8]}.{i}@example.com",
+            telefono_movil=f"6{i:08d}",
+        )
+        cliente.calcular_derivados()
+        clientes.append(cliente)
+    clientes = Cliente.objects.bulk_create(clientes)
+
+    inmuebles = []
+    for i, edificio in enumerate(edificios):
+        inmueble = Inmueble(**tenant, edificio=edificio, planta=str(i % 9), puerta="ABCD"[i % 4], propietario=clientes[i])
+        inmueble.calcular_derivados(edificio)
+        inmuebles.append(inmueble)
+    inmuebles = Inmueble.objects.bulk_create(inmuebles)
+
+    pedidos = Pedido.objects.bulk_create([
+        Pedido(
+            **tenant,
+            cliente=clientes[i],
+            descripcion=f"busca piso en {CALLES[i % 8]} con {i % 4 + 1} habitaciones",
+            motivacion=f"{APELLIDOS[i % 8]} se muda por trabajo",
+            tipo_inmueble="piso",
+        )
+        for i in range(n)
+    ])
+
+    actividades = Actividad.objects.bulk_create([
+        Actividad(
+            **tenant,
+            fecha_inicio=ahora - timedelta(days=i % 90),
+            fecha_fin=ahora - timedelta(days=i % 90) + timedelta(hours=1),
+            descripcion_publica=f"visita con {NOMBRES[i % 8]} {APELLIDOS[i % 8]}",
+            descripcion_empleado=f"llamar a {APELLIDOS[(i + 3) % 8]} sobre {CALLES[i % 8]}",
+            cliente=clientes[i],
+        )
+        for i in range(n)
+    ])
+
+    # Cada entidad con dos actividades en su M2M (los detalles las anidan)
+    for model, objetos in ((Cliente, clientes), (Edificio, edificios), (Inmueble, inmuebles), (Pedido, pedidos)):
+        through = model.actividades.through
+        origen = f"{model._meta.model_name}_id"
+        through.objects.bulk_create([
+            through(**{origen: objeto.pk, "actividad_id": actividades[j % n].pk})
+            for i, objeto in enumerate(objetos)
+            for j in (i, i + 1)
+        ])
+
+    with connection.cursor() as cursor:
+        for model in (Edificio, Cliente, Inmueble, Pedido, Actividad):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+# ==========================================================
+# 🎯 MOTOR TRGM — EXPLAIN por rama
+# ==========================================================
+def nodos(plan):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+
+class ExplainTrgmTests(TestCase):
+    """
+    Ninguna rama del motor trgm puede leer su tabla con Seq Scan. Las ramas
+    GiST (KNN) deben usar además el índice trigram de 0008_trgm_gist_indexes:
+    si una `clave` de RAMAS_TRGM deja de coincidir con la expresión indexada,
+    falla aquí. Las GIN solo sirven como Bitmap Index Scan y, con el tenant
+    entero en la misma franquicia, el planner puede preferir el B-tree de
+    franquicia y aplicar `<%` como Filter: ahí solo se exige que no haya
+    Seq Scan.
+    """
+
+    CONSULTAS = ["garcia", "mayor 12", "maria lopez"]
+
+    # Con pocas filas el planner prefiere Seq Scan aunque el índice sirva
+    # (mismo motivo que explain_search --force-index)
+    FILAS = 1500
+
+    TABLAS = {
+        "clientes": "api_cliente",
+        "inmuebles": "api_inmueble",
+        "edificios": "api_edificio",
+        "pedidos": "api_pedido",
+        "actividades": "api_actividad",
+    }
+
+    # Ramas con índice GIN en 0008 (texto largo, sin KNN)
+    GIN = {"pedidos", "actividades"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.franquicia, cls.oficina = crear_tenant("EXPLAIN")
+        poblar(cls.franquicia, cls.oficina, cls.FILAS)
+
+    def _plan(self, grupo, q, oficina_id):
+        with transaction.atomic(), connection.cursor() as cursor:
+            preparar_umbrales_trgm(cursor)
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(
+                "EXPLAIN (FORMAT JSON) " + sql_trgm(oficina_id, [grupo]),
+                params_trgm(q, self.franquicia.id, oficina_id),
+            )
+            resultado = cursor.fetchone()[0]
+        if isinstance(resultado, str):
+            resultado = json.loads(resultado)
+        return resultado[0]["Plan"]
+
+    def _indices(self, plan):
+        """{índice: (tabla, definición)} de los índices que usa el plan."""
+        nombres = sorted({n["Index Name"] for n in nodos(plan) if "Index Name" in n})
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.relname, t.relname, pg_get_indexdef(c.oid)
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_class t ON t.oid = i.indrelid
+                WHERE c.relname = ANY(%s)
+                """,
+                [nombres],
+            )
+            return {nombre: (tabla, definicion) for nombre, tabla, definicion in cursor.fetchall()}
+
+    def test_ramas_usan_indice_trigram(self):
+        for grupo in RAMAS_TRGM:
+            # api_actividad está particionada: vale cualquier partición
+            tabla = self.TABLAS[grupo]
+            for oficina_id in (None, self.oficina.id):
+                for q in self.CONSULTAS:
+                    with self.subTest(grupo=grupo, q=q, oficina=oficina_id):
+                        plan = self._plan(grupo, q, oficina_id)
+
+                        escaneos = [
+                            n for n in nodos(plan)
+                            if n.get("Node Type") == "Seq Scan" and n.get("Relation Name", "").startswith(tabla)
+                        ]
+                        self.assertEqual(escaneos, [], f"Seq Scan sobre {tabla}")
+                        if grupo in self.GIN:
+                            continue
+
+                        trigram = [
+                            nombre for nombre, (tabla_indice, definicion) in self._indices(plan).items()
+                            if tabla_indice.startswith(tabla) and "_trgm_ops" in definicion
+                        ]
+                        self.assertTrue(trigram, f"{grupo}: el plan no usa ningún índice trigram de {tabla}")
+
+    def test_ramas_gist_no_ordenan(self):
+        # Con GiST el ORDER BY por distancia (<-> / <<->) lo resuelve el
+        # índice (KNN) y el top 5 sale sin Sort; GIN no sabe ordenar
+        for grupo in RAMAS_TRGM:
+            with self.subTest(grupo=grupo):
+                plan = self._plan(grupo, "mayor 12", self.oficina.id)
+                definiciones = [definicion for _, definicion in self._indices(plan).values()]
+                if not any("USING gist" in definicion for definicion in definiciones):
+                    continue
+                self.assertNotIn("Sort", [n.get("Node Type") for n in nodos(plan)])
+
+
+# ==========================================================
+# 🧮 PRESUPUESTO DE CONSULTAS — listados y detalle
+# ==========================================================
+class PresupuestoConsultasTests(TestCase):
+    """
+    Guardia de N+1 sobre las rutas del router: el listado debe costar lo
+    mismo con 5 que con 50 filas y quedarse dentro del presupuesto (consulta
+    principal + prefetches del plan de api/prefetch.py); el detalle, igual
+    con una entidad que con otra.
+    """
+
+    PRESUPUESTO_LISTADO = 6
+    # El detalle de Cliente anida ~15 relaciones: presupuesto propio
+    PRESUPUESTO_DETALLE = 24
+    FILAS = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.franquicia, cls.oficina = crear_tenant("PRESUPUESTO")
+        cls.usuario = crear_usuario(cls.franquicia, cls.oficina)
+        poblar(cls.franquicia, cls.oficina, cls.FILAS, usuario=cls.usuario)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def _consultas(self, url, params=None):
+        # La primera petición carga el mapa franquicia → base (api/routers.py),
+        # que luego se reutiliza: solo se cuenta la segunda
+        self.client.get(url, params)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, f"{url}: {response.content[:200]!r}")
+        return len(ctx.captured_queries), response
+
+    def test_listados(self):
+        for prefijo, viewset, basename in router.registry:
+            with self.subTest(ruta=prefijo):
+                pocas, response = self._consultas(f"/api/{prefijo}/", {"page_size": 5})
+                muchas, _ = self._consultas(f"/api/{prefijo}/", {"page_size": 50})
+
+                self.assertEqual(pocas, muchas, f"{prefijo}: las consultas crecen con el tamaño de página")
+                self.assertLessEqual(muchas, self.PRESUPUESTO_LISTADO)
+                self.assertTrue(response.data["results"])
+
+    def test_listados_expandidos(self):
+        # ?expand= añade JOINs, no consultas por fila
+        for prefijo, expand in (("inmuebles", "edificio,propietario"), ("pedidos", "cliente"), ("actividades", "cliente,inmueble,pedido")):
+            with self.subTest(ruta=prefijo):
+                pocas, _ = self._consultas(f"/api/{prefijo}/", {"page_size": 5, "expand": expand})
+                muchas, _ = self._consultas(f"/api/{prefijo}/", {"page_size": 50, "expand": expand})
+                self.assertEqual(pocas, muchas)
+                self.assertLessEqual(muchas, self.PRESUPUESTO_LISTADO)
+
+    def test_detalles(self):
+        for prefijo, viewset, basename in router.registry:
+            with self.subTest(ruta=prefijo):
+                objetos = viewset.queryset.model._default_manager.order_by("pk")[:2]
+                consultas = [self._consultas(f"/api/{prefijo}/{obj.pk}/")[0] for obj in objetos]
+
+                # Franquicia / oficina / usuario: solo hay uno de cada
+                self.assertEqual(len(set(consultas)), 1, f"{prefijo}: el detalle depende de la entidad {consultas}")
+                self.assertLessEqual(max(consultas), self.PRESUPUESTO_DETALLE)
+
+
+# ==========================================================
+# ⚡ LISTADO RÁPIDO + orjson — misma salida que DRF
+# ==========================================================
+@skipIf(renderers.orjson is None, "orjson no instalado")
+class ORJSONRendererTests(SimpleTestCase):
+    """Tipos en los que orjson y el JSONEncoder de DRF escriben distinto por defecto."""
+
+    def assertMismaSalida(self, data):
+        self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_fechas_y_horas(self):
+        madrid = dt_timezone(timedelta(hours=2))
+        self.assertMismaSalida({
+            "utc": datetime(2024, 5, 3, 10, 15, 5, 123456, tzinfo=dt_timezone.utc),
+            "utc_sin_micro": datetime(2024, 5, 3, 10, 15, 5, tzinfo=dt_timezone.utc),
+            "offset": datetime(2024, 5, 3, 10, 15, 5, 987654, tzinfo=madrid),
+            "naive": datetime(2024, 5, 3, 10, 15, 5, 500),
+            "fecha": date(2024, 2, 29),
+            "hora": time(9, 30, 0, 250000),
+            "lista": [timezone.now(), None],
+        })
+
+    def test_otros_tipos(self):
+        self.assertMismaSalida({
+            "decimal": Decimal("123456.70"),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "texto": "ñandú «comillas» \u2028 línea \u2029 párrafo",
+            "anidado": [{"a": 1, "b": 2.5, "c": True}],
+        })
+
+
+class ParidadListadoRapidoTests(TestCase):
+    """
+    El listado rápido (values() + ORJSONRenderer) debe dar los mismos bytes
+    que ModelSerializer + JSONRenderer en cada ruta con FastListMixin; es la
+    misma comprobación que `manage.py check_fast_list`.
+    """
+
+    VARIANTES = ["", "page_size=5", "omit=id", "fields=id,fecha_ultima_modificacion", "expand=cliente,propietario,edificio"]
+    FILAS = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.franquicia, cls.oficina = crear_tenant("PARIDAD")
+        cls.usuario = crear_usuario(cls.franquicia, cls.oficina)
+        poblar(cls.franquicia, cls.oficina, cls.FILAS, usuario=cls.usuario)
+        # Decimales, texto no ASCII y separadores de línea JS
+        Inmueble.objects.filter(franquicia=cls.franquicia).update(
+            precio_pedido_cliente=Decimal("245000.50"), motivacion="herencia — vende\u2028ya"
+        )
+
+    def _cuerpo(self, viewset, prefijo, query, renderer):
+        request = APIRequestFactory().get(f"/api/{prefijo}/?{query}")
+        force_authenticate(request, user=self.usuario)
+        response = viewset.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, 200, f"{prefijo}?{query}")
+        return renderer.render(response.data)
+
+    def test_listados_identicos(self):
+        for prefijo, viewset, basename in router.registry:
+            if not issubclass(viewset, FastListMixin):
+                continue
+            for query in self.VARIANTES:
+                with self.subTest(ruta=prefijo, query=query):
+                    with override_settings(HAWKEYE_FAST_LIST=False):
+                        normal = self._cuerpo(viewset, prefijo, query, JSONRenderer())
+                    with override_settings(HAWKEYE_FAST_LIST=True):
+                        rapido = self._cuerpo(viewset, prefijo, query, renderers.ORJSONRenderer())
+                    self.assertEqual(rapido, normal)
+
+
+# ==========================================================
+# 📄 PAGINACIÓN — cursor por defecto en todos los listados
+# ==========================================================
+class PaginacionTests(TestCase):
+    FILAS = 60  # más que PAGE_SIZE
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.franquicia, cls.oficina = crear_tenant("PAGINAS")
+        cls.usuario = crear_usuario(cls.franquicia, cls.oficina)
+        poblar(cls.franquicia, cls.oficina, cls.FILAS, usuario=cls.usuario)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_listado_sin_parametros_paginado(self):
+        vistos, url = [], "/api/clientes/"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), settings.REST_FRAMEWORK["PAGE_SIZE"])
+            vistos += [fila["id"] for fila in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(len(vistos), self.FILAS)
+        self.assertEqual(len(set(vistos)), self.FILAS)
+
+    def test_busqueda_recortada_sin_paginar(self):
+        # ?search= ya viene recortada y ordenada: lista plana, como antes
+        response = self.client.get("/api/clientes/", {"search": "garcia"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+
+
+# ==========================================================
+# ⚡ MOTOR UNION — paridad con el motor ORM
+# ==========================================================
+class ParidadMotorUnionTests(TestCase):
+    """
+    motor=union promete los mismos predicados y orden que motor=orm en una
+    sola consulta: mismos ids y mismos campos para la misma búsqueda y el
+    mismo tenant. Con tantas filas como LIMITE_POR_ENTIDAD el top 5 no
+    corta empates (ninguno de los dos motores desempata), así que se
+    comparan ordenados por id.
+    """
+
+    CONSULTAS = ["garcia", "mayor 12", "maria lopez", "piso", "visita con lucia", "zzzz"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.franquicia, cls.oficina = crear_tenant("UNION")
+        poblar(cls.franquicia, cls.oficina, LIMITE_POR_ENTIDAD)
+        # Otro tenant con los mismos textos: no puede colarse en ninguno
+        otra, otra_oficina = crear_tenant("UNION-OTRA")
+        poblar(otra, otra_oficina, LIMITE_POR_ENTIDAD)
+
+    def _buscar(self, motor, q, oficina_id):
+        resultados = buscar(q, self.franquicia.id, oficina_id, motor=motor)
+        return {grupo: sorted(filas, key=lambda fila: fila["id"]) for grupo, filas in resultados.items()}
+
+    @override_settings(HAWKEYE_SEARCH_ROUTER=False)
+    def test_mismos_resultados(self):
+        for oficina_id in (None, self.oficina.id):
+            for q in self.CONSULTAS:
+                with self.subTest(q=q, oficina=oficina_id):
+                    self.assertEqual(self._buscar("union", q, oficina_id), self._buscar("orm", q, oficina_id))
+
+    def test_tenant(self):
+        ids = {
+            grupo: {fila["id"] for fila in filas}
+            for grupo, filas in self._buscar("union", "garcia", None).items()
+        }
+        self.assertTrue(ids["clientes"])
+        self.assertFalse(ids["clientes"] - set(Cliente.objects.filter(franquicia=self.franquicia).values_list("pk", flat=True)))
+
+
+# ==========================================================
+# 🧭 ROUTER DE BÚSQUEDA — clasificar + rutas exactas
+# ==========================================================
+class ClasificarTests(SimpleTestCase):
+    # global_search pasa q ya en minúsculas y sin espacios en los extremos
+    CASOS = [
+        # Teléfono: 9-13 dígitos, con prefijo y separadores
+        ("612345678", "telefono"),
+        ("612 34 56 78", "telefono"),
+        ("+34612345678", "telefono"),
+        ("0034612345678", "telefono"),
+        ("91-123-45-67", "telefono"),
+        ("(91) 123 4567", "telefono"),
+        ("345678", "sufijo_telefono"),
+        ("12345678", "sufijo_telefono"),
+        # Email
+        ("maria@example.com", "email"),
+        ("maria.lopez@correo.es", "email"),
+        ("maria@", "texto"),
+        ("maria @example.com", "texto"),
+        # DNI / NIE / CIF
+        ("12345678z", "documento"),
+        ("12.345.678-z", "documento"),
+        ("x1234567l", "documento"),
+        ("y-1234567-x", "documento"),
+        ("b1234567j", "documento"),
+        # Referencia catastral: parcela (14) o inmueble (20)
+        ("9872023vh5797s", "ref_catastral"),
+        ("9872023vh5797s0001wx", "ref_catastral"),
+        ("9872023 vh5797s 0001 wx", "ref_catastral"),
+        ("98720230005797", "texto"),  # 14 dígitos sin letras: ni ref. ni teléfono
+        # Código postal
+        ("28001", "codigo_postal"),
+        ("28 001", "codigo_postal"),
+        # Texto libre
+        ("garcia", "texto"),
+        ("mayor 12", "texto"),
+        ("maria lopez", "texto"),
+        ("calle 28001", "texto"),
+        ("pedido 123456789", "texto"),
+    ]
+
+    def test_clasificar(self):
+        for q, ruta in self.CASOS:
+            with self.subTest(q=q):
+                self.assertEqual(clasificar(q), ruta)
+
+    def test_rutas_exactas(self):
+        # Todas las rutas salvo texto tienen búsqueda exacta
+        rutas = {ruta for _, ruta in self.CASOS} - {"texto"}
+        self.assertEqual(set(RUTAS_EXACTAS), rutas)
+
+
+class RutasExactasTests(TestCase):
+    """Cada identificador sale por su ruta exacta: solo su grupo, solo su fila."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.franquicia, cls.oficina = crear_tenant("RUTAS")
+        poblar(cls.franquicia, cls.oficina, 3)
+
+        # poblar: móvil 600000000 y email maria.0@example.com
+        cls.cliente = Cliente.objects.get(franquicia=cls.franquicia, telefono_movil="600000000")
+        cls.cliente.num_identificacion = "12345678Z"
+        cls.cliente.save()
+
+        cls.inmueble = Inmueble.objects.filter(franquicia=cls.franquicia).first()
+        Inmueble.objects.filter(pk=cls.inmueble.pk).update(ref_catastral="9872023VH5797S0001WX")
+
+        # poblar: códigos postales 28000, 28001, 28002
+        cls.edificio = Edificio.objects.get(franquicia=cls.franquicia, codigo_postal="28000")
+
+    def test_identificadores(self):
+        casos = [
+            ("600000000", "clientes", self.cliente),
+            ("+34 600 00 00 00", "clientes", self.cliente),
+            ("000000", "clientes", self.cliente),
+            ("maria.0@example.com", "clientes", self.cliente),
+            ("12.345.678-z", "clientes", self.cliente),
+            ("9872023vh5797s0001wx", "inmuebles", self.inmueble),
+            ("9872023vh5797s", "inmuebles", self.inmueble),
+            ("28000", "edificios", self.edificio),
+        ]
+        for q, grupo, objeto in casos:
+            with self.subTest(q=q):
+                resultados = buscar(q, self.franquicia.id)
+                self.assertEqual([fila["id"] for fila in resultados[grupo]], [objeto.pk])
+                self.assertFalse(any(filas for otro, filas in resultados.items() if otro != grupo))
+
+    def test_texto_libre_va_al_motor(self):
+        resultados = buscar("garcia", self.franquicia.id, motor="orm")
+        self.assertTrue(resultados["clientes"])
+        self.assertTrue(resultados["actividades"])
+
+
+# ==========================================================
+# 🏷️ GET CONDICIONAL — ETag de los listados
+# ==========================================================
+class ListadoCondicionalTests(TransactionTestCase):
+    """
+    El ETag del listado sale de version_tx, que es el txid de la transacción
+    que escribió la fila. Dentro de un TestCase todo comparte txid, así que
+    hace falta TransactionTestCase: cada escritura va en su propia transacción.
+    """
+
+    def setUp(self):
+        self.franquicia, self.oficina = crear_tenant("ETAG")
+        self.usuario = crear_usuario(self.franquicia, self.oficina)
+        poblar(self.franquicia, self.oficina, 3, usuario=self.usuario)
+
+    def _listar(self, viewset, etag=None):
+        cabeceras = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = APIRequestFactory().get("/api/listado/", **cabeceras)
+        force_authenticate(request, user=self.usuario)
+        return viewset.as_view({"get": "list"})(request)
+
+    def test_304_hasta_que_cambia_la_relacion(self):
+        response = self._listar(InmuebleViewSet)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self._listar(InmuebleViewSet, etag).status_code, 304)
+
+        # propietario_nombre viene del cliente: la fila del inmueble no cambia
+        propietario = Inmueble.objects.filter(franquicia=self.franquicia).first().propietario
+        propietario.nombre = "Renombrado"
+        propietario.save()
+
+        response = self._listar(InmuebleViewSet, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_borrar_e_insertar_cambia_etag(self):
+        etag = self._listar(PedidoViewSet)["ETag"]
+
+        # Mismo count y, con commits fuera de orden, el máximo podría no moverse
+        pedido = Pedido.objects.filter(franquicia=self.franquicia).first()
+        pedido.delete()
+        pedido.pk = None
+        pedido.save()
+
+        self.assertEqual(self._listar(PedidoViewSet, etag).status_code, 200)
+
+    def test_sin_version_no_hay_etag(self):
+        # usuario_responsable anida User, que no tiene version_tx
+        response = self._listar(ActividadViewSet)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+
+
+# ==========================================================
+# 🔄 SINCRONIZACIÓN — /api/sync/ (api/sync.py + 0022_version_tx)
+# ==========================================================
+class SincronizacionTests(TransactionTestCase):
+    """
+    TransactionTestCase: version_tx y el corte (pg_snapshot_xmin) son txid,
+    y dentro de un TestCase todo el test comparte transacción.
+    """
+
+    def setUp(self):
+        self.franquicia, self.oficina = crear_tenant("SYNC")
+        self.usuario = crear_usuario(self.franquicia, self.oficina)
+        poblar(self.franquicia, self.oficina, 2, usuario=self.usuario)
+
+    def _get(self, token=None):
+        request = APIRequestFactory().get("/api/sync/", {"since": token} if token else {})
+        force_authenticate(request, user=self.usuario)
+        return sync(request)
+
+    def _sincronizar(self, token=None):
+        """Repite hasta hay_mas = false → (token, {clave: ids cambiados}, {clave: ids borrados})."""
+        cambios, eliminados = {}, {}
+        while True:
+            response = self._get(token)
+            self.assertEqual(response.status_code, 200)
+            for clave, filas in response.data["cambios"].items():
+                cambios.setdefault(clave, set()).update(fila["id"] for fila in filas)
+            for clave, ids in response.data["eliminados"].items():
+                eliminados.setdefault(clave, set()).update(ids)
+            token = response.data["token"]
+            if not response.data["hay_mas"]:
+                return token, cambios, eliminados
+
+    def _cliente(self, nombre):
+        return Cliente.objects.create(franquicia=self.franquicia, oficina=self.oficina, nombre=nombre, apellido1="sync")
+
+    def test_volcado_y_nada_mas(self):
+        token, cambios, _ = self._sincronizar()
+        self.assertEqual(len(cambios["clientes"]), 2)
+
+        _, cambios, eliminados = self._sincronizar(token)
+        self.assertEqual((cambios, eliminados), ({}, {}))
+
+    def test_transaccion_abierta_en_el_corte(self):
+        escrito, seguir, creado = threading.Event(), threading.Event(), []
+
+        def escribir():
+            try:
+                with transaction.atomic():
+                    creado.append(self._cliente("tardio"))
+                    escrito.set()
+                    seguir.wait(10)
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=escribir)
+        hilo.start()
+        try:
+            self.assertTrue(escrito.wait(10))
+            # La fila aún no es visible y su txid queda por encima del corte
+            token, cambios, _ = self._sincronizar()
+        finally:
+            seguir.set()
+            hilo.join()
+
+        self.assertNotIn(creado[0].pk, cambios["clientes"])
+        _, cambios, _ = self._sincronizar(token)
+        self.assertEqual(cambios["clientes"], {creado[0].pk})
+
+    def test_token_manipulado(self):
+        token, _, _ = self._sincronizar()
+        # Otro carácter en el payload (base64 comprimido): la firma ya no cuadra
+        datos, resto = token.split(":", 1)
+        manipulado = f"{datos[:-1]}{'A' if datos[-1] != 'A' else 'B'}:{resto}"
+
+        response = self._get(manipulado)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._get(token).status_code, 200)
+
+    def test_borrados(self):
+        token, _, _ = self._sincronizar()
+        cliente = self._cliente("borrado")
+        token, cambios, _ = self._sincronizar(token)
+        self.assertEqual(cambios["clientes"], {cliente.pk})
+
+        pk = cliente.pk
+        cliente.delete()
+        _, cambios, eliminados = self._sincronizar(token)
+        self.assertEqual(eliminados, {"clientes": {pk}})
+        self.assertEqual(cambios, {})
+
+
+# ==========================================================
+# 🗄️ VARIAS BASES — router, réplica de globales, M2M, move_franquicia
+# ==========================================================
+OTRAS_BASES = [alias for alias in settings.DATABASES if alias != routers.DEFAULT]
+VARIAS_BASES = "Necesita varias bases: DJANGO_SETTINGS_MODULE=hawkeye_core.settings_multidb"
+
+
+def filas_franquicia(alias, franquicia_id):
+    """{tabla: pks} de la franquicia en `alias`, tablas de move_franquicia + intermedias de M2M."""
+    filas = {}
+    for model, _ in mover.ORDEN:
+        filas[model._meta.db_table] = sorted(
+            model.objects.using(alias).filter(franquicia_id=franquicia_id).values_list("pk", flat=True)
+        )
+        for campo in model._meta.many_to_many:
+            through = campo.remote_field.through
+            filas[through._meta.db_table] = sorted(
+                through.objects.using(alias)
+                .filter(**{f"{campo.m2m_field_name()}__franquicia_id": franquicia_id})
+                .values_list(campo.m2m_column_name(), campo.m2m_reverse_name())
+            )
+    return filas
+
+
+@skipUnless(OTRAS_BASES, VARIAS_BASES)
+class VariasBasesTests(TestCase):
+    """Una franquicia asignada a otra base: dónde se leen y escriben sus filas."""
+
+    databases = {routers.DEFAULT, *OTRAS_BASES}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.base = OTRAS_BASES[0]
+        routers.olvidar_franquicias()
+        cls.franquicia, cls.oficina = crear_tenant("VARIAS", base_datos=cls.base)
+        cls.usuario = crear_usuario(cls.franquicia, cls.oficina, username="varias")
+
+    def setUp(self):
+        routers.olvidar_franquicias()
+        self.addCleanup(routers.olvidar_franquicias)
+        self.tenant = {"franquicia": self.franquicia, "oficina": self.oficina}
+
+    def _cliente(self, **campos):
+        # Como en una petición: TenantJWTAuthentication fija la base del usuario
+        with routers.usar_base(routers.alias_franquicia(self.franquicia.pk)):
+            return Cliente.objects.create(**self.tenant, nombre="Ruta", apellido1="Base", **campos)
+
+    def _actividades(self, n):
+        ahora = timezone.now()
+        with routers.usar_base(self.base):
+            return [
+                Actividad.objects.create(
+                    **self.tenant, fecha_inicio=ahora, fecha_fin=ahora + timedelta(hours=1), descripcion_publica=f"visita {i}"
+                )
+                for i in range(n)
+            ]
+
+    def test_router(self):
+        self.assertEqual(routers.alias_franquicia(self.franquicia.pk), self.base)
+        cliente = self._cliente()
+        self.assertEqual(cliente._state.db, self.base)
+
+        for alias in routers.bases():
+            with self.subTest(base=alias):
+                esta = Cliente.objects.using(alias).filter(pk=cliente.pk).exists()
+                self.assertEqual(esta, alias == self.base)
+
+        # Fuera de una petición la base sale de para_usuario o de la instancia
+        self.assertTrue(Cliente.objects.para_usuario(self.usuario).filter(pk=cliente.pk).exists())
+        cliente.nombre = "Renombrado"
+        cliente.save()
+        self.assertEqual(Cliente.objects.using(self.base).get(pk=cliente.pk).nombre, "Renombrado")
+
+        # Globales: siempre default, aunque la petición sea de otra base
+        router = routers.TenantRouter()
+        with routers.usar_base(self.base):
+            for model in (Franquicia, Oficina, User):
+                self.assertEqual(router.db_for_read(model), routers.DEFAULT)
+                self.assertEqual(router.db_for_write(model, instance=cliente), routers.DEFAULT)
+
+    def test_replica_de_globales(self):
+        for model, pk in ((Franquicia, self.franquicia.pk), (Oficina, self.oficina.pk), (User, self.usuario.pk)):
+            with self.subTest(model=model.__name__):
+                self.assertTrue(model.objects.using(self.base).filter(pk=pk).exists())
+
+        # Los cambios también se replican
+        self.oficina.nombre = "Oficina renombrada"
+        self.oficina.save()
+        self.assertEqual(Oficina.objects.using(self.base).get(pk=self.oficina.pk).nombre, "Oficina renombrada")
+
+        # Con el usuario y la oficina replicados, las FKs y select_related son locales
+        cliente = self._cliente(creado_por=self.usuario)
+        leido = Cliente.objects.para_usuario(self.usuario).select_related("oficina", "creado_por").get(pk=cliente.pk)
+        self.assertEqual((leido.oficina.nombre, leido.creado_por.username), ("Oficina renombrada", "varias"))
+
+    def test_m2m_en_la_base_del_tenant(self):
+        through = Cliente.actividades.through
+        self.assertTrue(routers.es_tenant(through))
+
+        # .set() / .remove() sin base fijada: decide la instancia
+        cliente = self._cliente()
+        actividades = self._actividades(3)
+        cliente.actividades.set(actividades[:2])
+        cliente.actividades.remove(actividades[0])
+        cliente.actividades.add(actividades[2])
+
+        self.assertEqual(
+            sorted(through.objects.using(self.base).filter(cliente_id=cliente.pk).values_list("actividad_id", flat=True)),
+            sorted(a.pk for a in actividades[1:]),
+        )
+        self.assertFalse(through.objects.using(routers.DEFAULT).filter(cliente_id=cliente.pk).exists())
+
+        # Alta en lote (api/bulk.py) con el M2M en validated_data
+        with routers.usar_base(self.base):
+            creados = bulk.crear_lote(
+                Cliente,
+                [{"nombre": "Lote", "apellido1": str(i), "actividades": actividades} for i in range(2)],
+                {**self.tenant, "creado_por": self.usuario, "ultima_modificacion_por": self.usuario},
+            )
+        ids = [c.pk for c in creados]
+        self.assertEqual(through.objects.using(self.base).filter(cliente_id__in=ids).count(), 2 * len(actividades))
+        self.assertFalse(through.objects.using(routers.DEFAULT).filter(cliente_id__in=ids).exists())
+
+
+@skipUnless(OTRAS_BASES, VARIAS_BASES)
+@override_settings(HAWKEYE_BASES_TTL=0, HAWKEYE_SYNC_MARGEN=0)
+class MoverFranquiciaTests(TransactionTestCase):
+    """
+    move_franquicia de punta a punta. TransactionTestCase: cada pasada abre
+    su propia transacción REPEATABLE READ en el origen.
+    """
+
+    databases = {routers.DEFAULT, *OTRAS_BASES}
+    FILAS = 6
+
+    def setUp(self):
+        routers.olvidar_franquicias()
+        self.addCleanup(routers.olvidar_franquicias)
+        self.origen = OTRAS_BASES[0]
+        self.destino = OTRAS_BASES[1] if len(OTRAS_BASES) > 1 else routers.DEFAULT
+
+        self.franquicia, self.oficina = crear_tenant("MOVER", base_datos=self.origen)
+        self.usuario = crear_usuario(self.franquicia, self.oficina, username="mover")
+        with routers.usar_base(self.origen):
+            poblar(self.franquicia, self.oficina, self.FILAS, usuario=self.usuario)
+
+    def test_mover(self):
+        filas = filas_franquicia(self.origen, self.franquicia.pk)
+        self.assertTrue(filas["api_cliente"])
+        self.assertTrue(filas["api_cliente_actividades"])
+
+        origen = mover.mover(self.franquicia, self.destino, pasadas=1)
+        self.assertEqual(origen, self.origen)
+
+        routers.olvidar_franquicias()
+        self.assertEqual(routers.alias_franquicia(self.franquicia.pk), self.destino)
+        self.assertFalse(routers.en_movimiento(self.franquicia.pk))
+        self.assertEqual(filas_franquicia(self.destino, self.franquicia.pk), filas)
+
+        # Las globales viajan antes que las filas
+        self.assertTrue(User.objects.using(self.destino).filter(pk=self.usuario.pk).exists())
+
+        mover.limpiar_origen(self.franquicia, origen)
+        self.assertFalse(any(filas_franquicia(self.origen, self.franquicia.pk).values()))
+
+    def test_puesta_al_dia(self):
+        routers.separar_secuencias()
+        routers.replicar_globales(self.destino)
+        foto, copiadas, _ = mover.pasada(self.origen, self.destino, self.franquicia.pk, m2m=True)
+        self.assertGreater(copiadas, 0)
+
+        # Cambios y borrados en el origen mientras tanto
+        with routers.usar_base(self.origen):
+            cambiado, borrado = Cliente.objects.filter(franquicia=self.franquicia).order_by("pk")[:2]
+            cambiado.nombre = "Cambiado"
+            cambiado.save()
+            borrado.delete()
+        self.assertTrue(
+            Eliminacion.objects.using(self.origen).filter(tipo="cliente", objeto_id=borrado.pk).exists()
+        )
+
+        _, copiadas, borradas = mover.pasada(self.origen, self.destino, self.franquicia.pk, foto)
+        self.assertGreaterEqual(copiadas, 1)
+        self.assertGreaterEqual(borradas, 1)
+        self.assertEqual(Cliente.objects.using(self.destino).get(pk=cambiado.pk).nombre, "Cambiado")
+        self.assertFalse(Cliente.objects.using(self.destino).filter(pk=borrado.pk).exists())
+
+
+# ==========================================================
+# 📥 IMPORTACIÓN CON COPY — una fila por entidad
+# ==========================================================
+class ImportacionTests(TestCase):
+    """
+    importacion.importar de punta a punta (COPY + INSERT ... ON CONFLICT).
+    Una importación por test: tmp_importacion vive hasta el final de la
+    transacción, y aquí la transacción es la del test.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.franquicia, cls.oficina = crear_tenant("IMPORTAR")
+        cls.usuario = crear_usuario(cls.franquicia, cls.oficina, username="importador")
+
+    def _importar(self, entidad, columnas, *filas):
+        lineas = [",".join(fila) + "\n" for fila in filas]
+        tenant = {"franquicia": self.franquicia, "oficina": self.oficina}
+        return importacion.importar(entidad, importacion.Flujo(lineas), columnas, self.usuario, tenant)
+
+    def test_edificio(self):
+        resultado = self._importar(
+            "edificio", ["ref_catastral", "calle", "numero_calle", "codigo_postal"],
+            ["9872023VH5797S", "Calle Mayor", "12", "28013"],
+        )
+        self.assertEqual((resultado.leidas, resultado.insertadas), (1, 1))
+
+        edificio = Edificio.objects.get(ref_catastral="9872023VH5797S")
+        self.assertEqual((edificio.calle, edificio.numero_calle, edificio.codigo_postal), ("Calle Mayor", "12", "28013"))
+        self.assertEqual((edificio.franquicia_id, edificio.creado_por_id), (self.franquicia.pk, self.usuario.pk))
+
+    def test_inmueble(self):
+        # Columnas con mayúsculas (emisiones_CO2, estado_CRM): el SQL las cita
+        edificio = Edificio.objects.create(
+            franquicia=self.franquicia, oficina=self.oficina, calle="calle mayor", numero_calle="12",
+            ref_catastral="1234567VK4713A", latitud=40.4, longitud=-3.7,
+        )
+        resultado = self._importar(
+            "inmueble", ["ref_catastral", "planta", "puerta", "emisiones_CO2"],
+            ["1234567VK4713A0001AB", "2", "B", "12.50"],
+        )
+        self.assertEqual((resultado.leidas, resultado.insertadas), (1, 1))
+
+        inmueble = Inmueble.objects.get(ref_catastral="1234567VK4713A0001AB")
+        self.assertEqual(inmueble.edificio_id, edificio.pk)
+        self.assertEqual(inmueble.emisiones_CO2, Decimal("12.50"))
+        # Derivados calculados en SQL, iguales que Inmueble.calcular_derivados
+        esperado = Inmueble(planta="2", puerta="B")
+        esperado.calcular_derivados(edificio)
+        self.assertEqual(
+            (inmueble.direccion_busqueda, inmueble.latitud, inmueble.longitud),
+            (esperado.direccion_busqueda, esperado.latitud, esperado.longitud),
+        )
+
+    def test_cliente(self):
+        resultado = self._importar(
+            "cliente", ["num_identificacion", "nombre", "apellido1", "telefono_movil", "email"],
+            ["12.345.678-z", "Ana", "Lopez", "+34 600 11 22 33", " Ana.Lopez@Example.COM "],
+        )
+        self.assertEqual((resultado.leidas, resultado.insertadas), (1, 1))
+
+        cliente = Cliente.objects.get(num_identificacion="12.345.678-z")
+        esperado = Cliente(
+            num_identificacion=cliente.num_identificacion, nombre="Ana", apellido1="Lopez",
+            telefono_movil=cliente.telefono_movil, email=cliente.email,
+        )
+        esperado.calcular_derivados()
+        for campo in (
+            "nombre_apellido", "nombre_apellidos_completo", "telefono_movil_norm", "email_norm", "num_identificacion_norm",
+        ):
+            with self.subTest(campo=campo):
+                self.assertEqual(getattr(cliente, campo), getattr(esperado, campo))
+
+
+# ==========================================================
+# 🔢 NORMALIZACIÓN — Python y su copia SQL en importacion.py
+# ==========================================================
+TELEFONOS = [
+    ("600112233", "600112233"),
+    ("+34 600 11 22 33", "600112233"),
+    ("0034600112233", "600112233"),
+    ("600-11-22-33", "600112233"),
+    ("(91) 123 45 67", "911234567"),
+    ("34600112233", "600112233"),
+    ("3460011223", "3460011223"),      # 10 dígitos: el 34 no es prefijo
+    ("340600112233", "340600112233"),  # 12 dígitos: tampoco
+    ("0044 20 7946 0958", "442079460958"),
+    ("tel. 600 11 22 33 (tardes)", "600112233"),
+    ("", ""),
+    (None, ""),
+]
+EMAILS = [
+    ("ana@example.com", "ana@example.com"),
+    (" Ana.Lopez@Example.COM ", "ana.lopez@example.com"),
+    ("\tana@example.com\n", "ana@example.com"),
+    ("ana lopez@example.com", "ana lopez@example.com"),  # solo los extremos
+    ("", ""),
+    (None, ""),
+]
+DOCUMENTOS = [
+    ("12345678Z", "12345678Z"),
+    ("12.345.678-z", "12345678Z"),
+    ("12 345 678 z", "12345678Z"),
+    ("x-1234567-l", "X1234567L"),
+    ("b.1234567.j", "B1234567J"),
+    ("\t12345678z\n", "12345678Z"),
+    ("", ""),
+    (None, ""),
+]
+
+
+class NormalizacionTests(SimpleTestCase):
+    def test_telefono(self):
+        for valor, esperado in TELEFONOS:
+            with self.subTest(valor=valor):
+                self.assertEqual(normalizar_telefono(valor), esperado)
+
+    def test_email(self):
+        for valor, esperado in EMAILS:
+            with self.subTest(valor=valor):
+                self.assertEqual(normalizar_email(valor), esperado)
+
+    def test_documento(self):
+        for valor, esperado in DOCUMENTOS:
+            with self.subTest(valor=valor):
+                self.assertEqual(normalizar_documento(valor), esperado)
+
+
+class NormalizacionSQLTests(TestCase):
+    """La importación con COPY calcula las columnas *_norm en SQL: mismo resultado que en Python."""
+
+    def test_sql_igual_que_python(self):
+        casos = [
+            (importacion.RE_TELEFONO, normalizar_telefono, TELEFONOS),
+            (importacion.RE_EMAIL, normalizar_email, EMAILS),
+            (importacion.RE_DOCUMENTO, normalizar_documento, DOCUMENTOS),
+        ]
+        with connection.cursor() as cursor:
+            for expresion, funcion, valores in casos:
+                for valor, _ in valores:
+                    with self.subTest(funcion=funcion.__name__, valor=valor):
+                        cursor.execute(f"SELECT {expresion.format('%s::text')}", [valor])
+                        self.assertEqual(cursor.fetchone()[0], funcion(valor))
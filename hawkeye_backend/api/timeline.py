@@ -0,0 +1,114 @@
+# ============================================================
+# HAWKEYE — TIMELINE DE ACTIVIDADES POR ENTIDAD
+# ============================================================
+#
+# /api/actividades/<cliente|inmueble|pedido>/<id>/
+#   ?from=2024-01-01&to=2024-07-01   ventana [from, to) sobre fecha_inicio
+#   ?tipo=Visita,Reserva&estado=...  filtros (listas separadas por comas)
+#   ?modo=count                      solo {"count": n}
+#   ?modo=resumen                    totales por tipo / estado (cabecera de detalle)
+# Por defecto, página por cursor (TimelineCursorPagination).
+#
+# Poda de particiones (api_actividad va por mes de fecha_inicio): from/to y la
+# posición del cursor acotan fecha_inicio, así que solo se abren esos meses.
+# Sin acotar, el orden por -fecha_inicio permite a Postgres recorrer los
+# meses de más reciente a más antiguo y parar al llenar la página.
+
+from datetime import datetime, time
+
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import exceptions
+
+from .models import Actividad
+
+MODOS = ("lista", "count", "resumen")
+
+
+def _instante(valor, nombre):
+    """'2024-05-01' (medianoche local) o datetime ISO → datetime aware."""
+    # Bien formadas pero imposibles ('2024-02-30', '25:00') dan ValueError
+    try:
+        fecha = parse_datetime(valor)
+        dia = parse_date(valor) if fecha is None else None
+    except ValueError:
+        fecha = dia = None
+    if fecha is None:
+        if dia is None:
+            raise exceptions.ValidationError({nombre: "Usa una fecha (AAAA-MM-DD) o fecha-hora ISO 8601."})
+        fecha = datetime.combine(dia, time.min)
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+def rango_fechas(params, desde="from", hasta="to", requerido=False):
+    """(inicio, fin) de los parámetros `desde` / `hasta`; fin exclusivo."""
+    inicio = _instante(params[desde], desde) if params.get(desde) else None
+    fin = _instante(params[hasta], hasta) if params.get(hasta) else None
+    if requerido and (inicio is None or fin is None):
+        raise exceptions.ValidationError({"detail": f"Indica {desde} y {hasta}."})
+    if inicio and fin and inicio >= fin:
+        raise exceptions.ValidationError({hasta: f"Debe ser posterior a {desde}."})
+    return inicio, fin
+
+
+def _lista(params, nombre, opciones):
+    valores = [v.strip() for v in params.get(nombre, "").split(",") if v.strip()]
+    desconocidos = set(valores) - set(opciones)
+    if desconocidos:
+        raise exceptions.ValidationError({nombre: f"Valores no válidos: {', '.join(sorted(desconocidos))}"})
+    return valores
+
+
+def actividades_timeline(user, campo, objeto_id, params):
+    """Actividades de la entidad (`campo` = cliente/inmueble/pedido) en el tenant del usuario, filtradas."""
+    queryset = Actividad.objects.para_usuario(user).filter(**{f"{campo}_id": objeto_id})
+
+    inicio, fin = rango_fechas(params)
+    if inicio:
+        queryset = queryset.filter(fecha_inicio__gte=inicio)
+    if fin:
+        queryset = queryset.filter(fecha_inicio__lt=fin)
+
+    tipos = _lista(params, "tipo", Actividad.TipoActividad.values)
+    if tipos:
+        queryset = queryset.filter(tipo__in=tipos)
+    estados = _lista(params, "estado", Actividad.EstadoActividad.values)
+    if estados:
+        queryset = queryset.filter(estado__in=estados)
+
+    return queryset
+
+
+def modo(params):
+    valor = params.get("modo", "lista")
+    if valor not in MODOS:
+        raise exceptions.ValidationError({"modo": f"Usa uno de: {', '.join(MODOS)}"})
+    return valor
+
+
+def resumen(queryset):
+    """Totales por tipo y por estado, primera y última fecha: una sola consulta agrupada."""
+    grupos = (
+        queryset.order_by()
+        .values("tipo", "estado")
+        .annotate(n=Count("id"), primera=Min("fecha_inicio"), ultima=Max("fecha_inicio"))
+    )
+
+    total, por_tipo, por_estado, primera, ultima = 0, {}, {}, None, None
+    for grupo in grupos:
+        total += grupo["n"]
+        por_tipo[grupo["tipo"]] = por_tipo.get(grupo["tipo"], 0) + grupo["n"]
+        por_estado[grupo["estado"]] = por_estado.get(grupo["estado"], 0) + grupo["n"]
+        primera = min(primera or grupo["primera"], grupo["primera"])
+        ultima = max(ultima or grupo["ultima"], grupo["ultima"])
+
+    return {
+        "total": total,
+        "por_tipo": por_tipo,
+        "por_estado": por_estado,
+        "primera": primera,
+        "ultima": ultima,
+    }
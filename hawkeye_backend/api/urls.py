@@ -16,6 +16,10 @@ from .views import (
     actividades_por_inmueble,
     listar_usuarios,
     global_search,
+    search_stats,
+    autocomplete,
+    sync,
+    calendario,
 )
 
 router = DefaultRouter()
@@ -43,6 +47,10 @@ urlpatterns = [
     path('api/listar-usuarios/', listar_usuarios),
     path("global-search/", global_search, name="global-search"),
     path("search/", global_search, name="global_search"),
+    path("search/stats/", search_stats, name="search-stats"),
+    path("autocomplete/", autocomplete, name="autocomplete"),
+    path("sync/", sync, name="sync"),
+    path("calendario/", calendario, name="calendario"),
 
     # 📌 TODAS LAS RUTAS DEL ROUTER BAJO /api/
     path('api/', include(router.urls)),
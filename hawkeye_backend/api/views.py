@@ -1,10 +1,40 @@
 from rest_framework import viewsets, permissions, filters
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework import status, generics
-from .mixins import TenantMixin
+from .mixins import (
+    BulkMixin,
+    CachedSearchMixin,
+    ConditionalGetMixin,
+    ExportMixin,
+    FastListMixin,
+    ListDetailMixin,
+    TenantMixin,
+    UltimoContactoMixin,
+)
+from .calendario import actividades_calendario, conteos_por_dia, eventos
+from .contacto import registrar_contacto
+from .metrics import cache_busqueda, rutas_busqueda
+from .normalization import normalizar_telefono
+from . import timeline
+from .pagination import TimelineCursorPagination
+from .prefetch import aplicar_plan
+from .routers import alias_actual
+from .search import (
+    AUTOCOMPLETAR,
+    autocompletar,
+    buscar,
+    buscar_texto,
+    clasificar,
+    clientes_por_identificador,
+    filtro_cliente_identificador,
+    filtro_tenant_q,
+    get_motor,
+)
+from .search_cache import obtener_o_calcular
+from .sync import TokenInvalido, sincronizar
 
 # 🔥 USAR SIEMPRE EL CUSTOM USER
 from django.contrib.auth import get_user_model
@@ -12,6 +42,7 @@ User = get_user_model()
 
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
 from django.db.models import Q
 
 from .models import Cliente, Edificio, Inmueble, Pedido, Actividad, Franquicia, Oficina
@@ -24,18 +55,24 @@ from .serializers import (
     RegistroSerializer,
     FranquiciaSerializer,
     OficinaSerializer,
-    UserSerializer
+    UserSerializer,
+    ClienteSimpleSerializer,
+    ClienteListSerializer,
+    EdificioListSerializer,
+    InmuebleListSerializer,
+    PedidoListSerializer,
+    ActividadListSerializer,
 )
 
 
-class FranquiciaViewSet(viewsets.ModelViewSet):
+class FranquiciaViewSet(ListDetailMixin, viewsets.ModelViewSet):
     queryset = Franquicia.objects.all()
     serializer_class = FranquiciaSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class OficinaViewSet(viewsets.ModelViewSet):
-    queryset = Oficina.objects.select_related("franquicia").all()
+class OficinaViewSet(ListDetailMixin, viewsets.ModelViewSet):
+    queryset = Oficina.objects.all()  # select_related("franquicia") → ListDetailMixin
     serializer_class = OficinaSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -47,7 +84,7 @@ class OficinaViewSet(viewsets.ModelViewSet):
         return qs
 
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(ListDetailMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -57,28 +94,42 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 # ViewSets con búsqueda optimizada
 # ---------------------------
 
-class ClienteViewSet(TenantMixin, viewsets.ModelViewSet):
+class ClienteViewSet(
+    ConditionalGetMixin,
+    BulkMixin,
+    CachedSearchMixin,
+    ExportMixin,
+    FastListMixin,
+    ListDetailMixin,
+    UltimoContactoMixin,
+    TenantMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Cliente.objects.all()  # necesario para el router
     serializer_class = ClienteSerializer
+    list_serializer_class = ClienteListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    search_cache_entidades = ("cliente", "inmueble", "pedido", "actividad")
+    export_fields = (
+        "id", "nombre", "apellido1", "apellido2", "tipo_documento", "num_identificacion",
+        "telefono", "telefono_movil", "email", "email_secundario", "direccion",
+        "dias_ultimo_contacto", "creado_en", "fecha_ultima_modificacion",
+    )
 
     def get_queryset(self):
         search = self.request.query_params.get('search', '').strip().lower()
 
-        base_queryset = (
-            Cliente.objects.all()
-            .select_related('creado_por', 'ultima_modificacion_por')
-            .prefetch_related(
-                'actividades',
-                'propiedades',
-                'alquileres',
-                'copropiedades',
-                'coalquileres',
-                'pedidos',
-            )
-        )
+        # Tenant → TenantMixin; select_related / prefetch_related → ListDetailMixin
+        base_queryset = super().get_queryset()
 
         if search:
+            # Teléfono / email / DNI → igualdad sobre columnas normalizadas
+            ruta = clasificar(search)
+            if filtro_cliente_identificador(ruta, search) is not None:
+                return clientes_por_identificador(
+                    ruta, search, queryset=base_queryset
+                ).order_by('nombre_apellido')[:50]
+
             return base_queryset.filter(
                 Q(nombre_apellido__icontains=search)
                 | Q(nombre_apellidos_completo__icontains=search)
@@ -86,6 +137,24 @@ class ClienteViewSet(TenantMixin, viewsets.ModelViewSet):
 
         return base_queryset
 
+    # ==========================================================
+    # 📞 CALLER-ID — /api/clientes/por-telefono/?tel=...
+    # ==========================================================
+    @action(detail=False, methods=['get'], url_path='por-telefono')
+    def por_telefono(self, request):
+        tel = request.query_params.get('tel', '')
+        digitos = normalizar_telefono(tel)
+        if len(digitos) < 6:
+            return Response({"detail": "Indica al menos 6 dígitos en ?tel="}, status=400)
+
+        tenant = filtro_tenant_q(request.user.franquicia_id, request.user.oficina_id)
+        clientes = clientes_por_identificador('telefono', tel, tenant)[:10]
+        if not clientes:
+            # Número incompleto → últimos dígitos
+            clientes = clientes_por_identificador('sufijo_telefono', tel, tenant)[:10]
+
+        return Response(ClienteSimpleSerializer(clientes, many=True).data)
+
     def perform_create(self, serializer):
         user = self.request.user
 
@@ -104,15 +173,32 @@ class ClienteViewSet(TenantMixin, viewsets.ModelViewSet):
         )
 
 
-class InmuebleViewSet(TenantMixin, viewsets.ModelViewSet):
+class InmuebleViewSet(
+    ConditionalGetMixin,
+    BulkMixin,
+    CachedSearchMixin,
+    ExportMixin,
+    FastListMixin,
+    ListDetailMixin,
+    UltimoContactoMixin,
+    TenantMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Inmueble.objects.all()
     serializer_class = InmuebleSerializer
+    list_serializer_class = InmuebleListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    search_cache_entidades = ("inmueble", "edificio", "cliente", "actividad")
+    export_fields = (
+        "id", "direccion_busqueda", "edificio_id", "planta", "puerta", "ref_catastral",
+        "propietario_id", "propietario__nombre_apellidos_completo", "ocupado_por",
+        "precio_valoracion", "precio_venta", "fecha_ultimo_contacto", "fecha_ultima_modificacion",
+    )
 
     def get_queryset(self):
         search = self.request.query_params.get('search', '').strip().lower()
         if search:
-            return Inmueble.objects.filter(
+            return super().get_queryset().filter(
                 Q(direccion_busqueda__icontains=search) |
                 Q(ref_catastral__icontains=search)
             ).order_by('direccion_busqueda')[:50]
@@ -136,10 +222,26 @@ class InmuebleViewSet(TenantMixin, viewsets.ModelViewSet):
         )
 
 
-class PedidoViewSet(TenantMixin, viewsets.ModelViewSet):
+class PedidoViewSet(
+    ConditionalGetMixin,
+    BulkMixin,
+    FastListMixin,
+    ListDetailMixin,
+    UltimoContactoMixin,
+    TenantMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Pedido.objects.all()
     serializer_class = PedidoSerializer
+    list_serializer_class = PedidoListSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # 🔎 ?texto= → full-text en español (descripcion / motivacion)
+        texto = self.request.query_params.get('texto', '').strip()
+        if texto and self.action == 'list':
+            return buscar_texto(super().get_queryset(), texto)[:50]
+        return super().get_queryset()
     
     def perform_create(self, serializer):
         user = self.request.user
@@ -159,9 +261,17 @@ class PedidoViewSet(TenantMixin, viewsets.ModelViewSet):
         )
 
 
-class EdificioViewSet(TenantMixin, viewsets.ModelViewSet):
+class EdificioViewSet(
+    ConditionalGetMixin,
+    BulkMixin,
+    FastListMixin,
+    ListDetailMixin,
+    TenantMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Edificio.objects.all()
     serializer_class = EdificioSerializer
+    list_serializer_class = EdificioListSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ['calle', 'numero_calle', 'codigo_postal']
@@ -183,10 +293,30 @@ class EdificioViewSet(TenantMixin, viewsets.ModelViewSet):
             ultima_modificacion_por=user,
         )
 
-class ActividadViewSet(TenantMixin, viewsets.ModelViewSet):
+class ActividadViewSet(
+    ConditionalGetMixin,
+    BulkMixin,
+    ExportMixin,
+    FastListMixin,
+    ListDetailMixin,
+    TenantMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Actividad.objects.all()
     serializer_class = ActividadSerializer
+    list_serializer_class = ActividadListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_fields = (
+        "id", "fecha_inicio", "fecha_fin", "tipo", "estado", "descripcion_publica",
+        "cliente_id", "inmueble_id", "pedido_id", "creado_por__username", "fecha_ultima_modificacion",
+    )
+
+    def get_queryset(self):
+        # 🔎 ?texto= → full-text en español (descripcion_publica / descripcion_empleado)
+        texto = self.request.query_params.get('texto', '').strip()
+        if texto and self.action == 'list':
+            return buscar_texto(super().get_queryset(), texto)[:50]
+        return super().get_queryset()
 
     # ==========================================================
     # 📌 CREATE
@@ -194,14 +324,14 @@ class ActividadViewSet(TenantMixin, viewsets.ModelViewSet):
     def perform_create(self, serializer):
         user = self.request.user
 
-        actividad = serializer.save(
-            creado_por=user,
-            ultima_modificacion_por=user,
-            franquicia=user.franquicia,
-            oficina=user.oficina,
-        )
-
-        self._actualizar_relacionados(actividad)
+        with transaction.atomic(using=alias_actual()):
+            actividad = serializer.save(
+                creado_por=user,
+                ultima_modificacion_por=user,
+                franquicia=user.franquicia,
+                oficina=user.oficina,
+            )
+            self._actualizar_relacionados(actividad)
 
     # ==========================================================
     # 📌 UPDATE
@@ -209,37 +339,21 @@ class ActividadViewSet(TenantMixin, viewsets.ModelViewSet):
     def perform_update(self, serializer):
         user = self.request.user
 
-        actividad = serializer.save(
-            ultima_modificacion_por=user
-        )
-
-        self._actualizar_relacionados(actividad)
+        with transaction.atomic(using=alias_actual()):
+            actividad = serializer.save(
+                ultima_modificacion_por=user
+            )
+            self._actualizar_relacionados(actividad)
 
     # ==========================================================
     # 📌 FUNCIÓN COMÚN PARA ACTUALIZAR INMUEBLE, CLIENTE, PEDIDO
     # ==========================================================
     def _actualizar_relacionados(self, actividad):
         """
-        Actualiza fechas de contacto para inmueble, cliente y pedido.
-        Este método es llamado tanto en create como update.
+        Sube fecha_ultimo_contacto de inmueble, cliente y pedido: un UPDATE
+        con GREATEST por tabla, sin cargar los objetos (api/contacto.py).
         """
-
-        fecha_contacto = actividad.fecha_inicio
-
-        # -------- Inmueble asociado --------
-        if actividad.inmueble:
-            actividad.inmueble.fecha_ultimo_contacto = fecha_contacto
-            actividad.inmueble.save(update_fields=["fecha_ultimo_contacto"])
-
-        # -------- Cliente asociado --------
-        if actividad.cliente:
-            actividad.cliente.fecha_ultimo_contacto = fecha_contacto
-            actividad.cliente.save(update_fields=["fecha_ultimo_contacto"])
-
-        # -------- Pedido asociado --------
-        #if actividad.pedido:
-        #    actividad.pedido.fecha_ultimo_contacto = fecha_contacto
-        #    actividad.pedido.save(update_fields=["fecha_ultimo_contacto"])
+        registrar_contacto([actividad])
 
 
 
@@ -284,28 +398,39 @@ class LoginAPIView(APIView):
 # Filtros específicos
 # ---------------------------
 
+def _timeline(request, campo, objeto_id):
+    """Timeline paginado / count / resumen de las actividades de una entidad (api/timeline.py)."""
+    params = request.query_params
+    modo = timeline.modo(params)
+    actividades = timeline.actividades_timeline(request.user, campo, objeto_id, params)
+
+    if modo == "count":
+        return Response({"count": actividades.count()})
+    if modo == "resumen":
+        return Response(timeline.resumen(actividades))
+
+    paginador = TimelineCursorPagination()
+    pagina = paginador.paginate_queryset(aplicar_plan(actividades, ActividadSerializer), request)
+    serializer = ActividadSerializer(pagina, many=True, context={"request": request})
+    return paginador.get_paginated_response(serializer.data)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def actividades_por_pedido(request, pedido_id):
-    actividades = Actividad.objects.filter(pedido_id=pedido_id).order_by('-fecha_inicio')
-    serializer = ActividadSerializer(actividades, many=True)
-    return Response(serializer.data)
+    return _timeline(request, "pedido", pedido_id)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def actividades_por_cliente(request, cliente_id):
-    actividades = Actividad.objects.filter(cliente_id=cliente_id).order_by('-fecha_inicio')
-    serializer = ActividadSerializer(actividades, many=True)
-    return Response(serializer.data)
+    return _timeline(request, "cliente", cliente_id)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def actividades_por_inmueble(request, inmueble_id):
-    actividades = Actividad.objects.filter(inmueble_id=inmueble_id).order_by('-fecha_inicio')
-    serializer = ActividadSerializer(actividades, many=True)
-    return Response(serializer.data)
+    return _timeline(request, "inmueble", inmueble_id)
 
 
 # ---------------------------
@@ -327,18 +452,6 @@ def listar_usuarios(request):
     return Response(data, status=status.HTTP_200_OK)
 
 
-
-# api/views.py
-from django.db.models import Q, Value
-from django.db.models.functions import Concat
-from django.contrib.postgres.search import TrigramSimilarity
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-
-from .models import Cliente, Inmueble, Edificio, Pedido, Actividad
-
-
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def global_search(request):
@@ -348,159 +461,74 @@ def global_search(request):
     if not q:
         return Response({"results": []})
 
-    # 🔥 Filtro multi-tenant obligatorio
-    filtro_tenant = Q(franquicia=user.franquicia)
-    if user.oficina:
-        filtro_tenant &= Q(oficina=user.oficina)
-
-    resultados = {
-        "clientes": [],
-        "inmuebles": [],
-        "edificios": [],
-        "pedidos": [],
-        "actividades": [],
-    }
-
-    # ===============================
-    # 1️⃣ CLIENTES
-    # ===============================
-    clientes = (
-        Cliente.objects.annotate(
-            sim=TrigramSimilarity("nombre_apellidos_completo", q)
-            + TrigramSimilarity("nombre_apellido", q)
-            + TrigramSimilarity("email", q)
-        )
-        .filter(filtro_tenant)
-        .filter(
-            Q(nombre_apellidos_completo__icontains=q)
-            | Q(nombre_apellido__icontains=q)
-            | Q(email__icontains=q)
-            | Q(telefono_movil__icontains=q)
-            | Q(num_identificacion__icontains=q)
-            | Q(sim__gt=0.2)  # 🔥 fuzzy search
-        )
-        .order_by("-sim")[:5]
+    # 🔥 Filtro multi-tenant obligatorio (se aplica dentro del motor)
+    motor = request.GET.get("engine")
+    resultados = obtener_o_calcular(
+        f"global:{get_motor(motor).__name__}",
+        user.franquicia_id,
+        user.oficina_id,
+        q,
+        lambda: buscar(q, user.franquicia_id, user.oficina_id, motor=motor),
     )
 
-    resultados["clientes"] = [
-        {
-            "id": c.id,
-            "tipo": "cliente",
-            "nombre": c.nombre_apellidos_completo,
-            "email": c.email,
-            "telefono": c.telefono_movil,
-        }
-        for c in clientes
-    ]
+    return Response({"results": resultados})
 
-    # ===============================
-    # 2️⃣ INMUEBLES
-    # ===============================
-    inmuebles = (
-        Inmueble.objects.annotate(
-            sim=TrigramSimilarity("direccion_busqueda", q)
-            + TrigramSimilarity("ref_catastral", q)
-        )
-        .filter(filtro_tenant)
-        .filter(
-            Q(direccion_busqueda__icontains=q)
-            | Q(ref_catastral__icontains=q)
-            | Q(sim__gt=0.1)
-        )
-        .order_by("-sim")[:5]
-    )
 
-    resultados["inmuebles"] = [
-        {
-            "id": i.id,
-            "tipo": "inmueble",
-            "direccion": i.direccion_busqueda,
-            "ref_catastral": i.ref_catastral,
-        }
-        for i in inmuebles
-    ]
-
-    # ===============================
-    # 3️⃣ EDIFICIOS
-    # ===============================
-    edificios = (
-        Edificio.objects.annotate(
-            sim=TrigramSimilarity("calle", q)
-            + TrigramSimilarity("numero_calle", q)
-        )
-        .filter(filtro_tenant)
-        .filter(
-            Q(calle__icontains=q)
-            | Q(numero_calle__icontains=q)
-            | Q(sim__gt=0.1)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def autocomplete(request):
+    """Typeahead: /api/autocomplete/?tipo=cliente|inmueble|edificio&q=... → [{id, label}]."""
+    tipo = request.GET.get("tipo", "cliente")
+    if tipo not in AUTOCOMPLETAR:
+        return Response(
+            {"detail": f"tipo debe ser uno de: {', '.join(AUTOCOMPLETAR)}"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
-        .order_by("-sim")[:5]
-    )
 
-    resultados["edificios"] = [
-        {
-            "id": e.id,
-            "tipo": "edificio",
-            "direccion": f"{e.calle} {e.numero_calle}",
-            "cp": e.codigo_postal,
-        }
-        for e in edificios
-    ]
+    user = request.user
+    return Response(autocompletar(tipo, request.GET.get("q", ""), user.franquicia_id, user.oficina_id))
 
-    # ===============================
-    # 4️⃣ PEDIDOS
-    # ===============================
-    pedidos = (
-        Pedido.objects.annotate(
-            sim=TrigramSimilarity("descripcion", q)
-            + TrigramSimilarity("motivacion", q)
-            + TrigramSimilarity("tipo_inmueble", q)
-        )
-        .filter(filtro_tenant)
-        .filter(
-            Q(descripcion__icontains=q)
-            | Q(motivacion__icontains=q)
-            | Q(tipo_inmueble__icontains=q)
-            | Q(sim__gt=0.1)
-        )
-        .order_by("-sim")[:5]
-    )
 
-    resultados["pedidos"] = [
-        {
-            "id": p.id,
-            "tipo": "pedido",
-            "descripcion": p.descripcion,
-            "cliente": str(p.cliente),
-        }
-        for p in pedidos
-    ]
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def calendario(request):
+    """
+    Calendario: /api/calendario/?start=&end=[&usuario=|&oficina=][&modo=eventos|dias]
+    → actividades solapadas con [start, end) o conteos por día (api/calendario.py).
+    """
+    modo, actividades, inicio, fin = actividades_calendario(request.user, request.query_params)
+    if modo == "dias":
+        return Response({"dias": conteos_por_dia(actividades, inicio, fin)})
+    return Response({"eventos": eventos(actividades, inicio, fin)})
 
-    # ===============================
-    # 5️⃣ ACTIVIDADES
-    # ===============================
-    actividades = (
-        Actividad.objects.annotate(
-            sim=TrigramSimilarity("descripcion_publica", q)
-            + TrigramSimilarity("descripcion_empleado", q)
-        )
-        .filter(filtro_tenant)
-        .filter(
-            Q(descripcion_publica__icontains=q)
-            | Q(descripcion_empleado__icontains=q)
-            | Q(sim__gt=0.1)
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """
+    Sincronización incremental para clientes offline:
+    /api/sync/?since=<token>&limit=500 → cambios y borrados del tenant desde el token.
+    Se repite con el token devuelto mientras `hay_mas` sea true.
+    """
+    try:
+        limite = int(request.GET["limit"]) if "limit" in request.GET else None
+    except ValueError:
+        return Response({"detail": "limit debe ser un entero."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return Response(sincronizar(request, request.GET.get("since") or None, limite))
+    except TokenInvalido:
+        return Response(
+            {"detail": "Token de sincronización no válido: vuelve a sincronizar sin since."},
+            status=status.HTTP_400_BAD_REQUEST,
         )
-        .order_by("-sim")[:5]
-    )
 
-    resultados["actividades"] = [
-        {
-            "id": a.id,
-            "tipo": "actividad",
-            "descripcion": a.descripcion_publica or a.descripcion_empleado,
-            "fecha": a.fecha_inicio,
-        }
-        for a in actividades
-    ]
 
-    return Response({"results": resultados})
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search_stats(request):
+    """Latencia por ruta del router y aciertos de la caché de búsqueda (este proceso)."""
+    return Response({
+        "rutas": rutas_busqueda.snapshot(),
+        "cache": cache_busqueda.snapshot(),
+    })
@@ -45,11 +45,20 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT + base de datos de la franquicia del usuario → api/routers.py
+        'api.authentication.TenantJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Cursor (keyset) sobre Meta.ordering de cada modelo → api/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.MetaOrderingCursorPagination',
+    'PAGE_SIZE': 50,
+    # orjson si está instalado (misma salida que JSONRenderer) → api/renderers.py
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 from datetime import timedelta
@@ -70,6 +79,7 @@ AUTHENTICATION_BACKENDS = [
 
 
 MIDDLEWARE = [
+    'api.middleware.TenantDatabaseMiddleware',
     'api.middleware.DisableCSRFOnAPI',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -142,6 +152,14 @@ DATABASES = {
     }
 }
 
+# Franquicias repartidas entre bases de datos (api/routers.py): código de
+# franquicia → alias de DATABASES. Sin entrada (ni Franquicia.base_datos),
+# la franquicia vive en "default", igual que las tablas globales.
+DATABASE_ROUTERS = ['api.routers.TenantRouter']
+HAWKEYE_BASES_FRANQUICIA = {}
+# Segundos que cada proceso guarda el mapa franquicia → base
+HAWKEYE_BASES_TTL = 30
+
 
 
 # Password validation
@@ -185,3 +203,62 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+
+
+# ==========================================================
+# 🔎 BÚSQUEDA GLOBAL
+# ==========================================================
+# Motor por defecto de global_search ("orm" = 5 consultas, "union" = 1 consulta,
+# "trgm" = operadores trigram indexables + KNN, "documentos" = tabla SearchDocument,
+# "fts" = trgm + full-text en español para Pedido/Actividad).
+# Se puede forzar por petición con ?engine=<nombre>.
+HAWKEYE_SEARCH_ENGINE = "union"
+
+# Router: teléfono / email / DNI-NIE / ref. catastral / CP → búsqueda exacta
+# por índice antes de caer al motor fuzzy. Latencias en /search/stats/.
+HAWKEYE_SEARCH_ROUTER = True
+
+# Umbrales pg_trgm por entidad para el motor "trgm" (ver api/search.py)
+HAWKEYE_TRGM_UMBRALES = {
+    "clientes": 0.5,
+    "inmuebles": 0.5,
+    "edificios": 0.3,
+    "pedidos": 0.6,
+    "actividades": 0.6,
+}
+
+# Caché de resultados de búsqueda (global_search y ?search= de clientes /
+# inmuebles). Se invalida por versión en cada save/delete (api/signals.py);
+# el TTL es solo una red de seguridad. FileBasedCache para que las versiones
+# se compartan entre workers; en producción puede apuntar a Redis/Memcached.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "busqueda": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / ".cache" / "busqueda",
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+}
+HAWKEYE_SEARCH_CACHE = "busqueda"
+HAWKEYE_SEARCH_CACHE_TTL = 600
+
+# Listados de solo lectura con values() + dicts en vez de ModelSerializer
+# (api/fast_serializers.py). Misma salida; se comprueba con
+# `manage.py check_fast_list`.
+HAWKEYE_FAST_LIST = True
+
+# Sincronización incremental (/sync/, api/sync.py): filas por respuesta y
+# días que se guardan los tombstones (purge_sync_tombstones). Un token más
+# antiguo que la retención recibe un volcado completo. El margen (segundos
+# por detrás de now() para no perder transacciones en curso) solo lo usa
+# move_franquicia; /sync/ corta por txid (version_tx).
+HAWKEYE_SYNC_LIMITE = 500
+HAWKEYE_SYNC_LIMITE_MAX = 2000
+HAWKEYE_SYNC_MARGEN = 5
+HAWKEYE_SYNC_RETENCION_DIAS = 30
+
+# api_actividad está particionada por mes (api/particiones.py): meses por
+# delante que create_activity_partitions deja creados.
+HAWKEYE_ACTIVIDAD_PARTICIONES_FUTURAS = 3
@@ -0,0 +1,37 @@
+# ============================================================
+# HAWKEYE — ENTORNO LOCAL CON VARIAS BASES DE DATOS
+# ============================================================
+#
+# Tres Postgres locales (mismo usuario y nombre de base que "default"):
+#   default  → tablas globales y franquicias sin asignar
+#   tenant_a → franquicias de HAWKEYE_TENANT_A (códigos separados por comas)
+#   tenant_b → franquicias de HAWKEYE_TENANT_B
+# Puertos en HAWKEYE_PG_PUERTOS (por defecto 5432,5433,5434).
+#
+#   export DJANGO_SETTINGS_MODULE=hawkeye_core.settings_multidb
+#   python manage.py migrate
+#   python manage.py migrate --database=tenant_a
+#   python manage.py migrate --database=tenant_b
+#   python manage.py check_tenant_routing
+#
+# `manage.py test` crea una base de pruebas en cada instancia; los tests
+# que toquen tablas de tenant necesitan `databases = "__all__"`.
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+_PUERTOS = [p.strip() for p in os.environ.get("HAWKEYE_PG_PUERTOS", "5432,5433,5434").split(",")]
+
+DATABASES = {
+    alias: {**DATABASES["default"], "PORT": puerto}
+    for alias, puerto in zip(["default", "tenant_a", "tenant_b"], _PUERTOS)
+}
+
+HAWKEYE_BASES_FRANQUICIA = {
+    codigo.strip(): alias
+    for alias, variable in [("tenant_a", "HAWKEYE_TENANT_A"), ("tenant_b", "HAWKEYE_TENANT_B")]
+    for codigo in os.environ.get(variable, "").split(",")
+    if codigo.strip()
+}